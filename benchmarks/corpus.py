@@ -0,0 +1,51 @@
+"""
+the module to read and write the corpus of benchmarks
+
+この module はベンチマークに使う問題の集合 (corpus) を読み書きします。
+corpus は ``benchmarks/corpus/`` 以下の JSON ファイルで、それぞれが問題の URL と HTML とサンプルケースを含みます。
+ベンチマークはネットワークに接続せずにこれらのファイルだけを使います。
+HTML は解析器が読む部分を残して短くしてあります。
+"""
+
+import json
+import pathlib
+from typing import *
+
+from onlinejudge_template.types import *
+
+default_corpus_dir = pathlib.Path(__file__).parent / 'corpus'
+
+
+class CorpusProblem(NamedTuple):
+    name: str
+    url: str
+    html: bytes
+    sample_cases: List[SampleCase]
+
+
+def load_problem(path: pathlib.Path) -> CorpusProblem:
+    with open(path, encoding='utf-8') as fh:
+        data = json.load(fh)
+    return CorpusProblem(
+        name=path.stem,
+        url=data['url'],
+        html=data['html'].encode(),
+        sample_cases=[SampleCase(input=case['input'].encode(), output=case['output'].encode()) for case in data['sample_cases']],
+    )
+
+
+def load_corpus(corpus_dir: pathlib.Path = default_corpus_dir) -> List[CorpusProblem]:
+    return [load_problem(path) for path in sorted(corpus_dir.glob('*.json'))]
+
+
+def dump_problem(problem: CorpusProblem, *, corpus_dir: pathlib.Path = default_corpus_dir) -> pathlib.Path:
+    data = {
+        'url': problem.url,
+        'html': problem.html.decode(),
+        'sample_cases': [{'input': case.input.decode(), 'output': case.output.decode()} for case in problem.sample_cases],
+    }
+    path = corpus_dir / (problem.name + '.json')
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(data, fh, indent=2, ensure_ascii=False, sort_keys=True)
+        fh.write('\n')
+    return path
@@ -0,0 +1,138 @@
+"""
+the script to measure the peak memory of analyzers for large synthetic samples
+
+usage: ``python3 -m benchmarks.memory [--size N] [--memory-budget BYTES] [--output FILE]``
+
+この script は Library Checker のような巨大なサンプルを合成し、:any:`onlinejudge_template.analyzer.combined.run` の段階ごとのメモリ使用量のピークを JSON で出力します。
+段階ごとのピークは :py:mod:`tracemalloc` で計測し (Python 3.9 以降のみ)、プロセス全体の最大 RSS も記録します。
+それぞれのケースは他のケースの影響を受けないように新しいプロセスで実行されます。
+tracemalloc は Python のオブジェクトのメモリのみを数え、また実行時間を数倍に増やすことに注意してください。
+"""
+
+import argparse
+import concurrent.futures
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from logging import WARNING, basicConfig, getLogger
+from typing import *
+
+import onlinejudge_template.analyzer.combined as analyzer
+from onlinejudge_template.__about__ import __version__
+from onlinejudge_template.types import *
+
+try:
+    import resource
+except ImportError:
+    resource = None  # type: ignore
+
+logger = getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+def _make_array(n: int) -> SampleCase:
+    """a sequence in a line, e.g. https://judge.yosupo.jp/problem/static_range_sum
+    """
+
+    input = f"""{n}\n""" + ' '.join(str(i * 7919 % 1000000007) for i in range(n)) + '\n'
+    return SampleCase(input=input.encode(), output=f"""{n}\n""".encode())
+
+
+def _make_edges(n: int) -> SampleCase:
+    """a graph with lines of pairs, e.g. https://judge.yosupo.jp/problem/unionfind
+    """
+
+    input = f"""{n} {n - 1}\n""" + ''.join(f"""{i} {i + 1}\n""" for i in range(n - 1))
+    output = ''.join(f"""{i % 2}\n""" for i in range(n - 1))
+    return SampleCase(input=input.encode(), output=output.encode())
+
+
+def _make_grid(n: int) -> SampleCase:
+    """a grid of characters with about `n` cells
+    """
+
+    w = max(2, int(n**0.5))
+    h = max(2, n // w)
+    input = f"""{h} {w}\n""" + ''.join(''.join('#.' [(y * x) % 2] for x in range(w)) + '\n' for y in range(h))
+    return SampleCase(input=input.encode(), output=b'Yes\n')
+
+
+generators: Dict[str, Callable[[int], SampleCase]] = {
+    'array': _make_array,
+    'edges': _make_edges,
+    'grid': _make_grid,
+}
+
+
+def measure_case(name: str, size: int, *, memory_budget: Optional[int] = None) -> Dict[str, Any]:
+    """measure_case runs analyzers for a synthetic problem and returns the peak memory in bytes. This should be called in a new process, because the maximum RSS is of the whole process.
+    """
+
+    sample_case = generators[name](size)
+    resources = AnalyzerResources(url=None, html=None, input_format_string=None, output_format_string=None, sample_cases=[sample_case])
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        analyzed = analyzer.run(resources, memory_budget=memory_budget)
+        seconds = time.perf_counter() - start
+    finally:
+        tracemalloc.stop()
+    assert analyzed.metrics is not None
+
+    prefix = 'peak_memory:'
+    max_rss: Optional[int] = None
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)  # bytes on macOS, kilobytes on Linux
+    return {
+        'sample_bytes': len(sample_case.input) + len(sample_case.output),
+        'seconds': seconds,
+        'peak_memory': {key[len(prefix):]: value for key, value in analyzed.metrics.counters.items() if key.startswith(prefix)},
+        'max_rss': max_rss,
+        'input_format': str(analyzed.input_format),
+    }
+
+
+def run_benchmarks(*, names: List[str], sizes: List[int], memory_budget: Optional[int] = None) -> Dict[str, Any]:
+    cases: Dict[str, Dict[str, Any]] = {}
+    for name in names:
+        for size in sizes:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+                cases[f"""{name}_{size}"""] = executor.submit(measure_case, name, size, memory_budget=memory_budget).result()
+    return {
+        'version': FORMAT_VERSION,
+        'environment': {
+            'package_version': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'memory_budget': memory_budget,
+        'unit': 'bytes',
+        'cases': cases,
+    }
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, action='append', dest='sizes', help='the number of values in samples (default: 100000)')
+    parser.add_argument('--case', choices=sorted(generators.keys()), action='append', dest='names', help='default: all')
+    parser.add_argument('--memory-budget', type=int, metavar='BYTES', help='the memory budget given to analyzers')
+    parser.add_argument('-o', '--output', help='default: stdout')
+    parsed = parser.parse_args(args=args)
+    basicConfig(level=WARNING)
+    if not hasattr(tracemalloc, 'reset_peak'):
+        logger.warning('the peak memory of each stage is not available: Python 3.9 or later is required')
+
+    result = run_benchmarks(names=parsed.names or sorted(generators.keys()), sizes=parsed.sizes or [100000], memory_budget=parsed.memory_budget)
+    s = json.dumps(result, indent=2, sort_keys=True) + '\n'
+    if parsed.output is None:
+        sys.stdout.write(s)
+    else:
+        with open(parsed.output, 'w') as fh:
+            fh.write(s)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+the script to benchmark oj-prepare with a recorded HTTP fixture (without network access)
+
+usage: ``python3 -m benchmarks.prepare FIXTURE URL [--repeat N] [--workers N] [--output FILE]``
+
+この script は ``oj-prepare --record-http FIXTURE URL`` で記録した通信を再生しながら oj-prepare のパイプライン全体を繰り返し実行し、全体の実行時間、最初のファイルと最後のファイルが書かれるまでの時間、HTTP の要求の数を JSON で出力します。
+解析器のキャッシュは使わず、ファイルは一時ディレクトリに書かれます。
+"""
+
+import argparse
+import contextlib
+import json
+import pathlib
+import platform
+import sys
+import tempfile
+import time
+from logging import WARNING, basicConfig, getLogger
+from typing import *
+
+import requests
+
+import onlinejudge.dispatch
+import onlinejudge_prepare.main as prepare
+import onlinejudge_template.http_fixtures as http_fixtures
+from benchmarks.run import summarize
+from onlinejudge_template.__about__ import __version__
+
+logger = getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+default_templates = ['main.cpp', 'main.py', 'generate.py']
+
+
+def measure(url: str, *, exchanges: List[http_fixtures.Exchange], workers: int, templates: List[str], executor: str = 'process') -> Dict[str, float]:
+    """measure prepares the problem or the contest once in a temporary directory, and returns the wall-times in seconds and the number of HTTP requests.
+    """
+
+    adapter = http_fixtures.ReplayAdapter(exchanges)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    config = {'templates': {template: template for template in templates}}
+    clock = prepare.FileClock()
+    with tempfile.TemporaryDirectory() as tmpdir, prepare.chdir(pathlib.Path(tmpdir)):
+        start = time.perf_counter()
+        problem = onlinejudge.dispatch.problem_from_url(url)
+        contest = onlinejudge.dispatch.contest_from_url(url)
+        try:
+            if problem is not None:
+                prepare.prepare_problem(problem, config=config, session=session, use_cache=False, clock=clock)
+            elif contest is not None:
+                prepare.prepare_contest(contest, config=config, session=session, use_cache=False, workers=workers, executor=executor, clock=clock)
+            else:
+                raise ValueError(f"""unrecognized URL: {url}""")
+        except Exception as e:
+            logger.warning('failed to prepare: %s', e)
+        seconds = time.perf_counter() - start
+    return {
+        'total': seconds,
+        'time_to_first_file': clock.first if clock.first is not None else seconds,
+        'time_to_last_file': clock.last if clock.last is not None else seconds,
+        'requests': float(adapter.request_count),
+    }
+
+
+def run_benchmarks(url: str, *, exchanges: List[http_fixtures.Exchange], repeat: int = 3, workers: int = prepare.default_workers, templates: List[str] = default_templates, executor: str = 'process') -> Dict[str, Any]:
+    samples: Dict[str, List[float]] = {}
+    for _ in range(repeat):
+        for name, value in measure(url, exchanges=exchanges, workers=workers, templates=templates, executor=executor).items():
+            samples.setdefault(name, []).append(value)
+    return {
+        'version': FORMAT_VERSION,
+        'environment': {
+            'package_version': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'url': url,
+        'repeat': repeat,
+        'workers': workers,
+        'templates': templates,
+        'unit': 'seconds',
+        'stats': {name: summarize(values) for name, values in samples.items()},
+    }
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('fixture', type=pathlib.Path, help='a file recorded with `oj-prepare --record-http`')
+    parser.add_argument('url')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('-j', '--workers', type=int, default=prepare.default_workers)
+    parser.add_argument('-t', '--template', action='append', dest='templates', help='default: {}'.format(', '.join(default_templates)))
+    parser.add_argument('-o', '--output', type=pathlib.Path, help='default: stdout')
+    parsed = parser.parse_args(args=args)
+    basicConfig(level=WARNING)
+
+    exchanges = http_fixtures.load_fixture(parsed.fixture)
+    with contextlib.redirect_stdout(sys.stderr):  # some analyzers and templates print messages
+        result = run_benchmarks(parsed.url, exchanges=exchanges, repeat=parsed.repeat, workers=parsed.workers, templates=parsed.templates or default_templates)
+    s = json.dumps(result, indent=2, sort_keys=True) + '\n'
+    if parsed.output is None:
+        sys.stdout.write(s)
+    else:
+        with open(parsed.output, 'w') as fh:
+            fh.write(s)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+the script to add problems to the corpus of benchmarks (with network access)
+
+usage: ``python3 -m benchmarks.record NAME URL``
+
+この script は問題の HTML とサンプルケースをダウンロードし、ベンチマークの corpus に追加します。
+ベンチマークの実行時にはネットワークに接続しないので、corpus を更新するときにだけ使います。
+"""
+
+import argparse
+import pathlib
+from logging import INFO, basicConfig, getLogger
+from typing import *
+
+import onlinejudge_template.network as network
+from benchmarks.corpus import CorpusProblem, default_corpus_dir, dump_problem
+
+logger = getLogger(__name__)
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('name', help='e.g. atcoder_abc080_a')
+    parser.add_argument('url')
+    parser.add_argument('--corpus', type=pathlib.Path, default=default_corpus_dir)
+    parsed = parser.parse_args(args=args)
+    basicConfig(level=INFO)
+
+    html, sample_cases = network.download_problem(parsed.url)
+    problem = CorpusProblem(name=parsed.name, url=parsed.url, html=html, sample_cases=sample_cases or [])
+    path = dump_problem(problem, corpus_dir=parsed.corpus)
+    logger.info('write file: %s', str(path))
+
+
+if __name__ == '__main__':
+    main()
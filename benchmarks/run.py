@@ -0,0 +1,150 @@
+"""
+the script to run benchmarks of analyzers and generators (without network access)
+
+usage: ``python3 -m benchmarks.run [--repeat N] [--output FILE]``
+
+この script は corpus の各問題に対して解析器と生成器を繰り返し実行し、段階ごとの実行時間の中央値やパーセンタイルを JSON で出力します。
+解析器の段階ごとの実行時間は :any:`AnalyzerResult` の ``metrics`` から取得します。
+生成器の時間は ``generate:<template>`` という名前で、フィルタコマンド (clang-format や yapf) の実行時間を含みます。
+"""
+
+import argparse
+import contextlib
+import json
+import pathlib
+import platform
+import re
+import sys
+import time
+from logging import WARNING, basicConfig, getLogger
+from typing import *
+
+import onlinejudge_template.analyzer.combined as analyzer
+import onlinejudge_template.analyzer.match
+import onlinejudge_template.analyzer.simplify
+import onlinejudge_template.generator._main as generator
+from benchmarks.corpus import CorpusProblem, default_corpus_dir, load_corpus
+from onlinejudge_template.__about__ import __version__
+
+logger = getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+default_templates = ['main.cpp', 'main.py', 'generate.py']
+
+
+def _clear_caches() -> None:
+    onlinejudge_template.analyzer.simplify._parse.cache_clear()
+    onlinejudge_template.analyzer.match._get_index_expr.cache_clear()
+
+
+def measure_problem(problem: CorpusProblem, *, templates: List[str], cold: bool = False) -> Dict[str, float]:
+    """measure_problem runs analyzers and generators once, and returns the wall-time of each stage in seconds.
+    """
+
+    if cold:
+        _clear_caches()
+    timers: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    resources = analyzer.prepare_from_html(problem.html, url=problem.url, sample_cases=problem.sample_cases)
+    timers['prepare_from_html'] = time.perf_counter() - start
+
+    analyzed = analyzer.run(resources)
+    assert analyzed.metrics is not None
+    for name, seconds in analyzed.metrics.timers.items():
+        timers['analyze:' + name] = seconds
+
+    for template in templates:
+        start = time.perf_counter()
+        generator.run(analyzed, template_file=template)
+        timers['generate:' + template] = time.perf_counter() - start
+    return timers
+
+
+def percentile(values: List[float], q: float) -> float:
+    """percentile computes the `q`-th percentile with linear interpolation.
+    """
+
+    assert values
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        'count': len(values),
+        'min': min(values),
+        'median': percentile(values, 50),
+        'p90': percentile(values, 90),
+        'p99': percentile(values, 99),
+        'max': max(values),
+        'mean': sum(values) / len(values),
+    }
+
+
+def run_benchmarks(problems: List[CorpusProblem], *, repeat: int = 10, templates: List[str] = default_templates, cold: bool = False) -> Dict[str, Any]:
+    """run_benchmarks measures each problem `repeat` times, and returns statistics as a JSON-compatible object.
+    The statistics of all problems are also aggregated in ``"total"``: for each stage, the sum over problems is computed for each repetition.
+    """
+
+    samples: Dict[str, Dict[str, List[float]]] = {}
+    totals: Dict[str, List[float]] = {}
+    for i in range(repeat):
+        total: Dict[str, float] = {}
+        for problem in problems:
+            timers = measure_problem(problem, templates=templates, cold=cold)
+            for name, seconds in timers.items():
+                samples.setdefault(problem.name, {}).setdefault(name, []).append(seconds)
+                total[name] = total.get(name, 0.0) + seconds
+        for name, seconds in total.items():
+            totals.setdefault(name, []).append(seconds)
+
+    return {
+        'version': FORMAT_VERSION,
+        'environment': {
+            'package_version': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'repeat': repeat,
+        'cold': cold,
+        'templates': templates,
+        'unit': 'seconds',
+        'problems': {name: {stage: summarize(values) for stage, values in stages.items()} for name, stages in samples.items()},
+        'total': {stage: summarize(values) for stage, values in totals.items()},
+    }
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', type=pathlib.Path, default=default_corpus_dir)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('-t', '--template', action='append', dest='templates', help='default: {}'.format(', '.join(default_templates)))
+    parser.add_argument('--filter', help='a regular expression for names of problems')
+    parser.add_argument('--cold', action='store_true', help='clear in-memory caches of analyzers before each run')
+    parser.add_argument('-o', '--output', type=pathlib.Path, help='default: stdout')
+    parsed = parser.parse_args(args=args)
+    basicConfig(level=WARNING)
+
+    problems = load_corpus(parsed.corpus)
+    if parsed.filter is not None:
+        problems = [problem for problem in problems if re.search(parsed.filter, problem.name)]
+    if not problems:
+        parser.error('no problems are found in the corpus')
+
+    with contextlib.redirect_stdout(sys.stderr):  # some analyzers and templates print messages
+        result = run_benchmarks(problems, repeat=parsed.repeat, templates=parsed.templates or default_templates, cold=parsed.cold)
+    s = json.dumps(result, indent=2, sort_keys=True) + '\n'
+    if parsed.output is None:
+        sys.stdout.write(s)
+    else:
+        with open(parsed.output, 'w') as fh:
+            fh.write(s)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,17 @@
 import argparse
+import concurrent.futures
 import contextlib
+import functools
+import logging
+import multiprocessing
 import os
 import pathlib
+import queue
 import stat
 import subprocess
 import sys
+import threading
+import time
 import urllib.parse
 from logging import DEBUG, INFO, basicConfig, getLogger
 from typing import *
@@ -16,9 +23,19 @@ import toml
 
 import onlinejudge
 import onlinejudge.utils
+import onlinejudge_prepare.manifest as manifest
+import onlinejudge_template.analyzer.cache
 import onlinejudge_template.analyzer.combined as analyzer
+import onlinejudge_template.analyzer.metrics
 import onlinejudge_template.generator._main as generator
+import onlinejudge_template.http_cache as http_cache
+import onlinejudge_template.http_fixtures as http_fixtures
+import onlinejudge_template.http_rate as http_rate
 import onlinejudge_template.network as network
+import onlinejudge_template.profiling as profiling
+import onlinejudge_template.tracing as tracing
+from onlinejudge_template.types import *
+from onlinejudge_template.utils import LazyFormat
 
 logger = getLogger(__name__)
 
@@ -74,9 +91,75 @@ def get_directory(*, problem: onlinejudge.type.Problem, contest: Optional[online
     return contest_directory / problem_directory
 
 
-def prepare_problem(problem: onlinejudge.type.Problem, *, contest: Optional[onlinejudge.type.Contest] = None, config: Dict[str, Any], session: requests.Session) -> None:
-    logger.info('prepare the problem: %s', problem.get_url())
+def _write_sample_files(sample_cases: List[SampleCase], *, problem: onlinejudge.type.Problem, directory: pathlib.Path, recorded: Dict[str, str]) -> Tuple[Dict[str, str], List[pathlib.Path]]:
+    files: Dict[str, bytes] = {}
+    for i, case in enumerate(sample_cases):
+        files[f"""test/sample-{i + 1}.in"""] = case.input
+        files[f"""test/sample-{i + 1}.out"""] = case.output
+
+    hashes: Dict[str, str] = {}
+    writes: List[Tuple[pathlib.Path, bytes]] = []
+    for name, data in files.items():
+        path = directory / name
+        hashes[name] = manifest.hash_bytes(data)
+        current_hash = manifest.hash_file(path)
+        if current_hash == hashes[name]:
+            continue
+        if current_hash is not None:
+            if name not in recorded:
+                raise FileExistsError(f"""file already exists: {str(path)}""")
+            if current_hash != recorded[name]:
+                logger.warning('file is edited, so it is not updated: %s', str(path))
+                hashes[name] = recorded[name]  # don't update it until it is removed
+                continue
+        writes.append((path, data))
+
+    test_directory = directory / 'test'
+    if writes:
+        try:
+            import onlinejudge_command.download_history
+        except ImportError:
+            logger.debug('failed to import onlinejudge_command, so the history of downloading is not recorded')
+        else:
+            history = onlinejudge_command.download_history.DownloadHistory()
+            if not list(test_directory.glob('*')):
+                history.remove(directory=directory)  # the same to `oj download`
+            history.add(problem, directory=directory)
+
+    test_directory.mkdir(parents=True, exist_ok=True)
+    for path, data in writes:
+        if path.exists():
+            logger.info('update file: %s', str(path))
+        else:
+            logger.info('write file: %s', str(path))
+        with open(path, 'wb') as fh:
+            fh.write(data)
+
+    # remove sample cases which were written last time and are not used any more
+    for name, recorded_hash in recorded.items():
+        path = directory / name
+        if name not in files and manifest.hash_file(path) == recorded_hash:
+            logger.info('remove file: %s', str(path))
+            path.unlink()
+
+    return hashes, [path for path, _ in writes]
+
+
+def write_sample_cases(sample_cases: List[SampleCase], *, problem: onlinejudge.type.Problem, directory: pathlib.Path, recorded: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """write_sample_cases writes sample cases as files in the same layout to `oj download` (e.g. ``test/sample-1.in`` and ``test/sample-1.out`` in the `directory`), and records the history of downloading for `oj submit`.
+    Files which already have the same contents are not written again.
+
+    :param directory: is the directory of the problem, which is the current directory when `oj download` is used.
+    :param recorded: is the hashes of the files which were written last time (see :any:`onlinejudge_prepare.manifest`). They are updated or removed unless they are edited.
+    :raises FileExistsError: if some files already exist with different contents and are not recorded. No files are written in this case.
+    :returns: the hashes of the files, whose keys are paths relative to the `directory`
+    """
+
+    hashes, _ = _write_sample_files(sample_cases, problem=problem, directory=directory, recorded=recorded or {})
+    return hashes
 
+
+def _get_templates(config: Dict[str, Any]) -> Dict[str, str]:
     table = config.get('templates')
     if table is None:
         table = {
@@ -85,85 +168,524 @@ def prepare_problem(problem: onlinejudge.type.Problem, *, contest: Optional[onli
             'generate.py': 'generate.py',
         }
         logger.info('setting "templates" is not found in your config; use %s', repr(table))
+    return table
 
-    dir = get_directory(problem=problem, contest=contest, config=config)
-    logger.info('use directory: %s', str(dir))
-
-    dir.parent.mkdir(parents=True, exist_ok=True)
-    with chdir(dir):
-        exceptions: List[Exception] = []
 
-        url = problem.get_url()
+def _get_template_hashes(table: Dict[str, str]) -> Dict[str, Optional[str]]:
+    template_hashes: Dict[str, Optional[str]] = {}
+    for template in table.values():
+        try:
+            template_hashes[template] = generator.get_template_hash(template)
+        except Exception as e:
+            logger.debug('failed to read the template %s: %s', template, e)
+            template_hashes[template] = None  # this makes files stale, and the error is reported when generating
+    return template_hashes
+
+
+def _get_memory_budget(config: Dict[str, Any]) -> Optional[int]:
+    if config.get('memory_budget') is None:
+        return None
+    return int(config['memory_budget']) * 1024 * 1024  # in MiB
+
+
+class FileClock:
+    """FileClock records when files are written, to measure the time to the first file and the time to the last file from the creation of the clock.
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self.count = 0
+
+    def record(self, path: pathlib.Path, *, count: int = 1) -> None:
+        elapsed = time.perf_counter() - self._start
+        with self._lock:
+            if self.first is None:
+                self.first = elapsed
+                tracing.instant('first_file', path=path)
+            self.last = elapsed
+            self.count += count
+
+    def log(self) -> None:
+        if self.first is None or self.last is None:
+            logger.info('no files are written')
+            return
+        logger.info('time to the first file: %.3f sec, time to the last file: %.3f sec (%d files)', self.first, self.last, self.count)
+
+
+class _ProblemState:
+    """_ProblemState is a problem which goes through the stages of preparation.
+    """
+    def __init__(self, problem: onlinejudge.type.Problem, *, contest: Optional[onlinejudge.type.Contest]):
+        self.problem = problem
+        self.contest = contest
+        self.url = problem.get_url()
+        self.dir = pathlib.Path('.')
+        self.html = b''
+        self.sample_cases: Optional[List[SampleCase]] = None
+        self.downloaded = False  # True if the HTML and the sample cases are already downloaded from the page of all problems
+        self.download_failed = False  # True if the error is already reported by the download stage
+        self.analyzed: Optional[AnalyzerResult] = None
+        self.content_hash: Optional[str] = None  # None if downloading failed
+        self.manifest: Optional[manifest.Manifest] = None
+        self.samples: Dict[str, str] = {}  # hashes of sample files which are written by oj-prepare
+        self.up_to_date = False  # True if the problem is already prepared and nothing is changed
+        self.exceptions: List[Exception] = []
+        self.records: List[logging.LogRecord] = []  # buffered logs
+        self.skipped = False
+        self.done = threading.Event()
+
+
+def _download_stage(state: _ProblemState, *, config: Dict[str, Any], session: requests.Session) -> None:
+    state.dir = get_directory(problem=state.problem, contest=state.contest, config=config).resolve()
+    logger.info('use directory: %s', str(state.dir))
+    state.dir.mkdir(parents=True, exist_ok=True)
+
+    if state.downloaded:
+        logger.debug('use the HTML in the page of all problems')
+    else:
         try:
-            html = network.download_html(url, session=session)
-            sample_cases = network.download_sample_cases(url, session=session)
+            with tracing.span('download_problem', url=state.url):
+                state.html, state.sample_cases = network.download_problem(state.url, session=session)
         except Exception as e:
             logger.error('failed to download sample cases')
-            exceptions.append(e)
-            html = b''
-            sample_cases = []
+            state.exceptions.append(e)
+            state.download_failed = True
+            state.html = b''
+            state.sample_cases = []
+            return
+    with tracing.span('hash_problem', url=state.url):
+        state.content_hash = manifest.get_content_hash(url=state.url, statement=network.get_statement(state.html, url=state.url), sample_cases=state.sample_cases)
+
+
+def _revalidate_stage(state: _ProblemState, *, table: Dict[str, str], template_hashes: Dict[str, Optional[str]]) -> None:
+    """_revalidate_stage compares the downloaded problem and the templates with the manifest in the directory, and marks the problem up to date if all files are fresh.
+    """
+
+    state.manifest = manifest.load(state.dir, url=state.url)
+    if state.manifest is None or state.content_hash is None or state.manifest.content_hash != state.content_hash:
+        return
+    for dest_str, template in table.items():
+        entry = state.manifest.files.get(dest_str)
+        if not manifest.is_fresh(entry, template=template, template_hash=template_hashes[template], content_hash=state.content_hash):
+            return
+        if not (state.dir / dest_str).exists():
+            return
+    logger.info('the problem is already prepared and not changed')
+    state.up_to_date = True
+
+
+def _write_sample_cases_stage(state: _ProblemState, *, config: Dict[str, Any], clock: FileClock) -> None:
+    if state.up_to_date:
+        return
+    recorded = state.manifest.samples if state.manifest is not None else {}
+    if state.sample_cases:
+        try:
+            with tracing.span('write_sample_cases', url=state.url):
+                state.samples, written = _write_sample_files(state.sample_cases, problem=state.problem, directory=state.dir, recorded=recorded)
+        except OSError as e:
+            logger.error('failed to write sample cases: %s', e)
+            state.exceptions.append(e)
+        else:
+            if written:
+                clock.record(state.dir / 'test', count=len(written))
+            else:
+                logger.info('sample cases are not changed')
+    elif state.manifest is not None and state.manifest.content_hash == state.content_hash and list((state.dir / 'test').glob('*')):
+        logger.info('sample cases are not changed')
+        state.samples = recorded
+    elif config.get('oj_download'):
+        logger.info('use `oj download` because sample cases are not downloaded')
+        try:
+            with tracing.span('oj_download', url=state.url):
+                subprocess.check_call(['oj', 'download', state.url], stdout=sys.stdout, stderr=sys.stderr, cwd=str(state.dir))
+        except subprocess.CalledProcessError as e:
+            logger.error('failed to download sample cases: %s', e)
+            state.exceptions.append(e)
+        else:
+            clock.record(state.dir / 'test', count=len(list((state.dir / 'test').glob('*'))))
+    elif not state.download_failed:
+        logger.error('no sample cases are written')
+        state.exceptions.append(RuntimeError('no sample cases are written'))
 
-        # analyze
-        resources = analyzer.prepare_from_html(html, url=url, sample_cases=sample_cases)
+
+def _analyze(resources: AnalyzerResources, *, use_cache: bool, memory_budget: Optional[int]) -> AnalyzerResult:
+    if use_cache:
+        return onlinejudge_template.analyzer.cache.run(resources, memory_budget=memory_budget)
+    else:
+        return analyzer.run(resources, memory_budget=memory_budget)
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # make the record picklable
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
+
+
+def _init_analyze_process(level: int) -> None:
+    logging.getLogger().setLevel(level)
+
+
+def _make_process_pool(*, max_workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    """_make_process_pool makes a process pool for :any:`_analyze_in_process`.
+    Workers are started with forkserver (or spawn) instead of fork, because workers start lazily when other threads already exist, and a forked child can deadlock on a lock (e.g. of logging or queues) held by another thread.
+    """
+
+    level = logging.getLogger().getEffectiveLevel()
+    if sys.version_info < (3, 7):
+        return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)  # mp_context and initializer are not available
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method), initializer=_init_analyze_process, initargs=(level, ))
+
+
+def _analyze_in_process(resources: AnalyzerResources, *, use_cache: bool, memory_budget: Optional[int], level: Optional[int] = None, profile_path: Optional[pathlib.Path] = None) -> Tuple[Optional[AnalyzerResult], Optional[Exception], List[logging.LogRecord]]:
+    """_analyze_in_process runs in a worker process of :any:`_analyze_stage`. Log records are returned to the main process instead of being emitted.
+
+    :param level: is the level of logging. None means that it is already set by :any:`_init_analyze_process`.
+    :param profile_path: is written by the worker process, because the profiler of the main process sees only the wait for the result.
+    """
+
+    root = logging.getLogger()
+    handler = _ListHandler()
+    handlers, root_level = root.handlers, root.level
+    root.handlers = [handler]
+    if level is not None:
+        root.setLevel(level)
+    try:
+        with profiling.profile(profile_path):
+            result = _analyze(resources, use_cache=use_cache, memory_budget=memory_budget)
+        return result, None, handler.records
+    except Exception as e:
+        logger.exception('failed to analyze the problem')
+        return None, e, handler.records
+    finally:
+        root.handlers = handlers
+        root.setLevel(root_level)
+
+
+def _analyze_stage(state: _ProblemState, *, use_cache: bool, memory_budget: Optional[int], executor: Optional[concurrent.futures.Executor] = None, profile_path: Optional[pathlib.Path] = None) -> None:
+    """
+    :param executor: is a process pool to run analyzers, made by :any:`_make_process_pool`. None means the current thread.
+    :param profile_path: is a prefix of paths to write profiles of analyzers. This is used only with `executor`; profile the current thread by yourself otherwise.
+    """
+
+    if state.up_to_date:
+        return
+    with tracing.span('analyze', url=state.url):
+        resources = analyzer.prepare_from_html(state.html, url=state.url, sample_cases=state.sample_cases)
+        analyzed: Optional[AnalyzerResult] = None
+        level = logging.getLogger().getEffectiveLevel() if sys.version_info < (3, 7) else None  # see _make_process_pool
         try:
-            analyzed = analyzer.run(resources)
+            if executor is None:
+                analyzed = _analyze(resources, use_cache=use_cache, memory_budget=memory_budget)
+            else:
+                analyzed, exception, records = executor.submit(_analyze_in_process, resources, use_cache=use_cache, memory_budget=memory_budget, level=level, profile_path=profile_path).result()
+                _emit_logs(records)
+                if exception is not None:
+                    state.exceptions.append(exception)
         except Exception as e:
             logger.exception('failed to analyze the problem')
-            exceptions.append(e)
+            state.exceptions.append(e)
+        if analyzed is None:
             analyzed = analyzer.get_empty_analyzer_result(resources)
-
-        for dest_str, template in table.items():
-            dest = pathlib.Path(dest_str)
-
-            # generate
-            try:
-                code = generator.run(analyzed, template_file=template)
-            except Exception as e:
-                logger.exception('failed to generate code: template = %s, dest = %s', template, dest_str)
-                exceptions.append(e)
-                continue
-
-            # write
-            dest.parent.mkdir(parents=True, exist_ok=True)
-            if dest.exists():
+    if analyzed.metrics is not None:
+        logger.debug('metrics of analyzers: %s', LazyFormat(functools.partial(onlinejudge_template.analyzer.metrics.format_metrics, analyzed.metrics)))
+    state.analyzed = analyzed
+
+
+def _generate_stage(state: _ProblemState, *, table: Dict[str, str], template_hashes: Dict[str, Optional[str]], clock: FileClock) -> None:
+    """_generate_stage generates files which are not fresh, and updates the manifest.
+    An existing file is overwritten only when it is the same to the file which was written last time, so files edited by users are kept.
+    The manifest is not updated when the preparation has already failed (e.g. analyzers failed), to retry next time.
+    """
+
+    if state.up_to_date:
+        return
+    assert state.analyzed is not None
+    files: Dict[str, manifest.FileEntry] = dict(state.manifest.files) if state.manifest is not None else {}
+    failed = bool(state.exceptions)
+    for dest_str, template in table.items():
+        dest = state.dir / dest_str
+        entry = files.get(dest_str)
+        template_hash = template_hashes[template]
+        if manifest.is_fresh(entry, template=template, template_hash=template_hash, content_hash=state.content_hash) and dest.exists():
+            logger.debug('file is not changed: %s', str(dest))
+            continue
+
+        # generate
+        try:
+            with tracing.span('generate', url=state.url, template=template):
+                code = generator.run(state.analyzed, template_file=template)
+        except Exception as e:
+            logger.exception('failed to generate code: template = %s, dest = %s', template, dest_str)
+            state.exceptions.append(e)
+            continue
+
+        # write
+        output_hash: Optional[str] = manifest.hash_bytes(code)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        current_hash = manifest.hash_file(dest)
+        if current_hash == output_hash:
+            logger.debug('file is not changed: %s', str(dest))
+        elif current_hash is not None and (entry is None or current_hash != entry.output_hash):
+            if entry is None:
                 logger.error('file already exists: %s', str(dest))
             else:
+                logger.warning('file is edited, so it is not updated: %s', str(dest))
+            output_hash = entry.output_hash if entry is not None else None  # don't update it until it is removed
+        else:
+            if current_hash is None:
                 logger.info('write file: %s', str(dest))
+            else:
+                logger.info('update file: %s', str(dest))
+            with tracing.span('write', url=state.url, template=template, path=dest):
                 with open(dest, 'wb') as fh:
                     fh.write(code)
                 if code.startswith(b'#!'):
                     os.chmod(dest, os.stat(dest).st_mode | stat.S_IEXEC)
+            clock.record(dest)
+        if state.content_hash is not None:
+            files[dest_str] = manifest.FileEntry(template=template, template_hash=template_hash, content_hash=state.content_hash, output_hash=output_hash)
+
+    if failed or state.content_hash is None:
+        return
+    try:
+        manifest.store(manifest.Manifest(url=state.url, content_hash=state.content_hash, files=files, samples=state.samples), state.dir)
+    except OSError as e:
+        logger.warning('failed to write the manifest: %s', e)
+
+
+def prepare_problem(problem: onlinejudge.type.Problem, *, contest: Optional[onlinejudge.type.Contest] = None, config: Dict[str, Any], session: requests.Session, use_cache: bool = True, profile_dir: Optional[pathlib.Path] = None, clock: Optional[FileClock] = None) -> None:
+    """prepare_problem writes generated code and sample cases into the directory of the problem. This doesn't change the current directory, so this can run concurrently in threads.
+    When the problem is already prepared, only files whose templates or problems are changed are generated again, with the manifest in the directory (see :any:`onlinejudge_prepare.manifest`).
+
+    :param profile_dir: is a directory to write profiles of cProfile for this problem. None means no profiling.
+    :param clock: records when files are written. A new one is used if this is None.
+    """
+
+    logger.info('prepare the problem: %s', problem.get_url())
+    table = _get_templates(config)
+    template_hashes = _get_template_hashes(table)
+    memory_budget = _get_memory_budget(config)
+    clock = clock or FileClock()
+
+    profile_path: Optional[pathlib.Path] = None
+    if profile_dir is not None:
+        profile_path = profile_dir / profiling.get_profile_name(problem.get_url())
+
+    state = _ProblemState(problem, contest=contest)
+    with tracing.span('prepare_problem', url=state.url), profiling.profile(profile_path):
+        _download_stage(state, config=config, session=session)
+        _revalidate_stage(state, table=table, template_hashes=template_hashes)
+        _write_sample_cases_stage(state, config=config, clock=clock)
+        _analyze_stage(state, use_cache=use_cache, memory_budget=memory_budget)
+        _generate_stage(state, table=table, template_hashes=template_hashes, clock=clock)
+    clock.log()
+
+    if state.exceptions:
+        raise state.exceptions[0]
+
+
+_log_buffer = threading.local()
+
+
+class _LogBufferFilter(logging.Filter):
+    """_LogBufferFilter holds log records in threads which have buffers, instead of letting handlers emit them.
+    """
+    def filter(self, record: logging.LogRecord) -> bool:
+        records: Optional[List[logging.LogRecord]] = getattr(_log_buffer, 'records', None)
+        if records is None:
+            return True
+        if not records or records[-1] is not record:  # the same record comes once for each handler
+            records.append(record)
+        return False
+
+
+@contextlib.contextmanager
+def _install_log_buffer_filter() -> Iterator[None]:
+    filter = _LogBufferFilter()
+    handlers = list(logging.getLogger().handlers)
+    for handler in handlers:
+        handler.addFilter(filter)
+    try:
+        yield
+    finally:
+        for handler in handlers:
+            handler.removeFilter(filter)
+
+
+@contextlib.contextmanager
+def _buffer_logs(records: Optional[List[logging.LogRecord]] = None) -> Iterator[List[logging.LogRecord]]:
+    """_buffer_logs holds log records in the current thread. This requires :any:`_install_log_buffer_filter`.
+
+    :param records: is a buffer to append records. A new buffer is used if this is None.
+    """
+
+    if records is None:
+        records = []
+    _log_buffer.records = records
+    try:
+        yield records
+    finally:
+        _log_buffer.records = None
 
-        # download
-        try:
-            # TODO: remove this and use the result of `network.download_sample_cases` instead
-            subprocess.check_call(['oj', 'download', problem.get_url()], stdout=sys.stdout, stderr=sys.stderr)
-        except subprocess.CalledProcessError as e:
-            logger.error('failed to download sample cases: %s', e)
-            exceptions.append(e)
 
-        if exceptions:
-            raise exceptions[0]
+def _emit_logs(records: List[logging.LogRecord]) -> None:
+    for record in records:
+        logging.getLogger(record.name).handle(record)
 
 
-def prepare_contest(contest: onlinejudge.type.Contest, *, config: Dict[str, Any], session: requests.Session) -> None:
+def prepare_contest(contest: onlinejudge.type.Contest, *, config: Dict[str, Any], session: requests.Session, use_cache: bool = True, profile_dir: Optional[pathlib.Path] = None, workers: int = 1, fail_fast: bool = False, executor: str = 'process', clock: Optional[FileClock] = None) -> None:
+    """prepare_contest prepares the problems of the contest in a pipeline.
+    Each problem goes through three stages connected with bounded queues: downloading (and writing sample cases), analyzing, and generating (rendering, formatting, and writing code).
+    If the service has a page of all problems (e.g. AtCoder and Codeforces), it is downloaded once at first, and only problems which are not found in it are downloaded separately.
+    Downloading and generating run in threads, and analyzing runs in a process pool, so downloads of later problems proceed while earlier problems are analyzed.
+    Logs of each problem are held until the problem is prepared, and are shown in the order of problems.
+
+    :param workers: is the number of threads of each stage, i.e. the number of problems which are downloaded at the same time. The number of processes to analyze is also limited by the number of CPUs.
+    :param fail_fast: stops preparing problems which are not started yet after the first failure.
+    :param executor: is ``"process"`` or ``"thread"``. It specifies where analyzers run.
+    :param clock: records when files are written. A new one is used if this is None.
+    """
+
     logger.info('prepare the contest: %s', contest.get_url())
+    table = _get_templates(config)
+    template_hashes = _get_template_hashes(table)
+    memory_budget = _get_memory_budget(config)
+    clock = clock or FileClock()
 
     exceptions: List[Exception] = []
 
-    for problem in contest.list_problems():
-        try:
-            prepare_problem(problem, contest=contest, config=config, session=session)
+    with tracing.span('list_problems', url=contest.get_url()):
+        problems = contest.list_problems(session=session)
+    states = [_ProblemState(problem, contest=contest) for problem in problems]
+
+    with tracing.span('download_contest_problems', url=contest.get_url()):
+        downloaded = network.download_contest_problems(contest.get_url(), problem_urls=[state.url for state in states], session=session)
+    for state in states:
+        if state.url in downloaded:
+            state.html, state.sample_cases = downloaded[state.url]
+            state.downloaded = True
+
+    workers = max(1, workers)
+    analyze_workers = max(1, min(workers, os.cpu_count() or 1))
+    download_queue: 'queue.Queue[Optional[_ProblemState]]' = queue.Queue()
+    analyze_queue: 'queue.Queue[Optional[_ProblemState]]' = queue.Queue(maxsize=workers)
+    generate_queue: 'queue.Queue[Optional[_ProblemState]]' = queue.Queue(maxsize=workers)
+    stopped = threading.Event()  # for fail_fast
+
+    with contextlib.ExitStack() as stack:
+        process_pool: Optional[concurrent.futures.Executor] = None
+        if executor == 'process':
+            process_pool = stack.enter_context(_make_process_pool(max_workers=analyze_workers))
+        elif executor != 'thread':
+            raise ValueError(f"""invalid executor: {executor}""")
+
+        def download(state: _ProblemState) -> None:
+            logger.info('prepare the problem: %s', state.url)
+            _download_stage(state, config=config, session=session)
+            _revalidate_stage(state, table=table, template_hashes=template_hashes)
+            _write_sample_cases_stage(state, config=config, clock=clock)
+
+        def get_profile_path(state: _ProblemState, name: str) -> Optional[pathlib.Path]:
+            if profile_dir is None:
+                return None
+            return profile_dir / (profiling.get_profile_name(state.url) + '-' + name)
+
+        def analyze(state: _ProblemState) -> None:
+            with profiling.profile(get_profile_path(state, 'analyze') if process_pool is None else None):
+                _analyze_stage(state, use_cache=use_cache, memory_budget=memory_budget, executor=process_pool, profile_path=get_profile_path(state, 'analyze'))
+
+        def generate(state: _ProblemState) -> None:
+            _generate_stage(state, table=table, template_hashes=template_hashes, clock=clock)
+
+        def run_stage(name: str, process: Callable[[_ProblemState], None], input: 'queue.Queue[Optional[_ProblemState]]', output: 'Optional[queue.Queue[Optional[_ProblemState]]]') -> None:
+            while True:
+                state = input.get()
+                if state is None:
+                    break
+                if input is download_queue and stopped.is_set():
+                    state.skipped = True
+                    state.done.set()
+                    continue
+                profile_path = get_profile_path(state, name) if name != 'analyze' else None  # the analyze stage profiles analyzers by itself
+                with _buffer_logs(state.records), profiling.profile(profile_path):
+                    try:
+                        process(state)
+                    except Exception as e:
+                        logger.exception('failed to %s the problem: %s', name, state.url)
+                        state.exceptions.append(e)
+                if state.exceptions and fail_fast:
+                    stopped.set()
+                if output is None:
+                    state.done.set()
+                else:
+                    output.put(state)
+
+        stages: List[Tuple[str, Callable[[_ProblemState], None], 'queue.Queue[Optional[_ProblemState]]', 'Optional[queue.Queue[Optional[_ProblemState]]]', int]] = [
+            ('download', download, download_queue, analyze_queue, workers),
+            ('analyze', analyze, analyze_queue, generate_queue, analyze_workers),
+            ('generate', generate, generate_queue, None, workers),
+        ]
+        threads: List[Tuple[threading.Thread, 'queue.Queue[Optional[_ProblemState]]']] = []
+        for name, process, input, output, count in stages:
+            for i in range(count):
+                thread = threading.Thread(target=run_stage, args=(name, process, input, output), name=f"""{name}-{i}""", daemon=True)
+                threads.append((thread, input))
+
+        stack.enter_context(_install_log_buffer_filter())
+        for thread, _ in threads:
+            thread.start()
+        for state in states:
+            download_queue.put(state)
+
+        # show logs in the order of problems
+        for state in states:
+            state.done.wait()
+            if state.skipped:
+                logger.info('skip the problem: %s', state.url)
+                continue
+            _emit_logs(state.records)
+            if state.exceptions:
+                logger.error('failed to prepare the problem: %s', state.url)
+                exceptions.append(state.exceptions[0])
 
-        except Exception as e:
-            logger.exception('failed to prepare the problem: %s', problem.get_url())
-            exceptions.append(e)
+        for thread, input in threads:
+            input.put(None)
+        for thread, _ in threads:
+            thread.join()
+    clock.log()
 
     if exceptions:
         raise exceptions[0]
 
 
 default_config_path = pathlib.Path(appdirs.user_config_dir('online-judge-tools')) / 'prepare.config.toml'
+default_workers = 4
+
+
+def get_rate_controller(config: Dict[str, Any]) -> http_rate.RateController:
+    """get_rate_controller makes a controller of HTTP requests from the setting "http".
+    """
+
+    table = dict(config.get('http', {}))
+    kwargs: Dict[str, Any] = {}
+    for key in ('max_connections_per_host', 'requests_per_second', 'burst', 'max_retries', 'backoff_base', 'backoff_max', 'max_requests'):
+        if key in table:
+            kwargs[key] = table.pop(key)
+    if table:
+        logger.warning('unknown keys in the setting "http": %s', ', '.join(sorted(table.keys())))
+    return http_rate.RateController(**kwargs)
 
 
 def get_config(*, config_path: Optional[pathlib.Path] = None) -> Dict[str, Any]:
@@ -179,9 +701,19 @@ def main(args: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument('url')
     parser.add_argument('-v', '--verbose', action='store_true')
-    parser.add_argument('-c', '--cookie', default=onlinejudge.utils.default_cookie_path)
+    parser.add_argument('-c', '--cookie', type=pathlib.Path, default=onlinejudge.utils.default_cookie_path)
     parser.add_argument('--config-file', type=pathlib.Path, help=f"""default: {str(default_config_path)}""")
+    parser.add_argument('--no-cache', action='store_true', help='analyze problems without the cache of results of analyzers')
+    parser.add_argument('--no-http-cache', action='store_true', help='download pages without the cache of HTTP responses')
+    parser.add_argument('--record-http', type=pathlib.Path, metavar='FILE', help='record HTTP requests and responses to the file as a fixture for tests and benchmarks')
+    parser.add_argument('--replay-http', type=pathlib.Path, metavar='FILE', help='use HTTP responses recorded with --record-http instead of accessing the network')
+    parser.add_argument('--profile', type=pathlib.Path, metavar='DIR', help='write profiles of cProfile (.pstats) and collapsed stacks for flamegraphs (.collapsed.txt) for each problem to the directory')
+    parser.add_argument('--trace', type=pathlib.Path, metavar='FILE', help='write a timeline of the preparation as JSON in the trace event format of Chrome, for about:tracing or Perfetto')
+    parser.add_argument('-j', '--workers', type=int, help=f"""the number of problems of a contest which are downloaded at the same time (default: the setting "workers", or {default_workers})""")
+    parser.add_argument('--fail-fast', action='store_true', help='stop preparing the other problems of a contest after the first failure')
     parsed = parser.parse_args(args=args)
+    if parsed.record_http is not None and parsed.replay_http is not None:
+        parser.error('--record-http and --replay-http cannot be used together')
 
     # configure logging
     handler = colorlog.StreamHandler()
@@ -194,15 +726,49 @@ def main(args: Optional[List[str]] = None) -> None:
     config = get_config(config_path=parsed.config_file)
     logger.info('config: %s', config)
 
-    with onlinejudge.utils.with_cookiejar(onlinejudge.utils.get_default_session(), path=parsed.cookie) as session:
+    profile_dir: Optional[pathlib.Path] = None
+    if parsed.profile is not None:
+        profile_dir = parsed.profile.resolve()
+
+    trace_path: Optional[pathlib.Path] = None
+    if parsed.trace is not None:
+        trace_path = parsed.trace.resolve()
+
+    workers = parsed.workers
+    if workers is None:
+        workers = int(config.get('workers', default_workers))
+
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(tracing.trace(trace_path))
+        if parsed.replay_http is not None:
+            session = requests.Session()  # don't touch the cookie file of the user
+        else:
+            session = stack.enter_context(onlinejudge.utils.with_cookiejar(onlinejudge.utils.get_default_session(), path=parsed.cookie))
+
+        # share connections and limits of requests among threads
+        pool_maxsize = max(workers, requests.adapters.DEFAULT_POOLSIZE)
+        controller = get_rate_controller(config)
+        if parsed.replay_http is not None:
+            http_fixtures.replay(session, parsed.replay_http)
+        elif parsed.record_http is not None:
+            stack.enter_context(http_fixtures.record(session, parsed.record_http, pool_maxsize=pool_maxsize, controller=controller))
+        elif parsed.no_http_cache:
+            adapter = http_rate.RateLimitedAdapter(pool_maxsize=pool_maxsize, controller=controller)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        else:
+            http_cache.mount(session, pool_maxsize=pool_maxsize, controller=controller)
+
         problem = onlinejudge.dispatch.problem_from_url(parsed.url)
         contest = onlinejudge.dispatch.contest_from_url(parsed.url)
         if problem is not None:
-            prepare_problem(problem, config=config, session=session)
+            prepare_problem(problem, config=config, session=session, use_cache=not parsed.no_cache, profile_dir=profile_dir)
         elif contest is not None:
-            prepare_contest(contest, config=config, session=session)
+            prepare_contest(contest, config=config, session=session, use_cache=not parsed.no_cache, profile_dir=profile_dir, workers=workers, fail_fast=parsed.fail_fast)
         else:
             raise ValueError(f"""unrecognized URL: {parsed.url}""")
+        if parsed.replay_http is None:
+            controller.log_stats()
 
 
 if __name__ == '__main__':
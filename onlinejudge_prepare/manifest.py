@@ -0,0 +1,143 @@
+"""
+the module of manifests, which record how files of a problem were prepared
+
+この module は oj-prepare が問題のディレクトリに書き込む manifest (``.oj-prepare.json``) を扱います。
+manifest には問題の URL、問題の内容 (問題文の HTML とサンプルケース) のハッシュ値、生成したファイルごとのテンプレートのハッシュ値と出力のハッシュ値、書き込んだサンプルケースのファイルのハッシュ値、このパッケージのバージョンが記録されます。
+再実行時にはこれを使って、内容もテンプレートも変わっていない問題の解析と生成を省略し、変更のあったファイルだけを生成し直します。
+出力のハッシュ値と一致しないファイルはユーザが編集したものとみなし、上書きしません。
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+from logging import getLogger
+from typing import *
+
+from onlinejudge_template.__about__ import __version__
+from onlinejudge_template.types import *
+
+logger = getLogger(__name__)
+
+MANIFEST_FILENAME = '.oj-prepare.json'
+
+_MANIFEST_FORMAT_VERSION = 1
+
+
+class FileEntry(NamedTuple):
+    template: str
+    template_hash: Optional[str]
+    content_hash: str  # the hash of the problem when the file is generated
+    output_hash: Optional[str]  # None if the file is not written by oj-prepare
+
+
+class Manifest(NamedTuple):
+    url: str
+    content_hash: Optional[str]
+    files: Dict[str, FileEntry]
+    samples: Dict[str, str]  # the hashes of sample files which are written by oj-prepare
+    tool_version: str = __version__
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: pathlib.Path) -> Optional[str]:
+    """
+    :returns: None if the file doesn't exist
+    """
+
+    try:
+        with open(path, 'rb') as fh:
+            return hash_bytes(fh.read())
+    except FileNotFoundError:
+        return None
+
+
+def get_content_hash(*, url: str, statement: bytes, sample_cases: Optional[List[SampleCase]]) -> str:
+    """get_content_hash computes the hash of the problem, which is the input of analyzers.
+
+    :param statement: is the statement in the HTML (see :any:`onlinejudge_template.network.get_statement`), not to depend on other parts of the page
+    """
+
+    h = hashlib.sha256()
+
+    def update(data: Optional[bytes]) -> None:
+        if data is None:
+            h.update(b'N')
+        else:
+            h.update(b'B' + str(len(data)).encode() + b':' + data)
+
+    update(url.encode())
+    update(statement)
+    if sample_cases is None:
+        update(None)
+    else:
+        update(str(len(sample_cases)).encode())
+        for case in sample_cases:
+            update(case.input)
+            update(case.output)
+    return h.hexdigest()
+
+
+def is_fresh(entry: Optional[FileEntry], *, template: str, template_hash: Optional[str], content_hash: Optional[str]) -> bool:
+    """is_fresh checks whether the file of the entry is generated from the same template and the same problem.
+    """
+
+    if entry is None or template_hash is None or content_hash is None:
+        return False
+    return entry.template == template and entry.template_hash == template_hash and entry.content_hash == content_hash
+
+
+def load(directory: pathlib.Path, *, url: str) -> Optional[Manifest]:
+    """load reads the manifest in the directory.
+
+    :returns: None if the manifest doesn't exist, is broken, or is for another problem. If the manifest is written by another version of this package, all files in it become stale.
+    """
+
+    path = directory / MANIFEST_FILENAME
+    try:
+        with open(path, encoding='utf-8') as fh:
+            data = json.load(fh)
+        if data['version'] != _MANIFEST_FORMAT_VERSION:
+            logger.debug('the manifest has an unsupported version: %s', str(path))
+            return None
+        files = {dest: FileEntry(template=item['template'], template_hash=item['template_hash'], content_hash=item['content_hash'], output_hash=item['output_hash']) for dest, item in data['files'].items()}
+        manifest = Manifest(url=data['url'], content_hash=data['content_hash'], files=files, samples=dict(data['samples']), tool_version=data['tool_version'])
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        logger.warning('broken manifest: %s: %s', str(path), e)
+        return None
+    if manifest.url != url:
+        logger.warning('the manifest is for another problem: %s', str(path))
+        return None
+    if manifest.tool_version != __version__:
+        logger.info('the manifest is written by another version (%s); generate files again', manifest.tool_version)
+        files = {dest: entry._replace(template_hash=None) for dest, entry in manifest.files.items()}  # keep output hashes to find edited files
+        return manifest._replace(files=files, tool_version=__version__)
+    return manifest
+
+
+def store(manifest: Manifest, directory: pathlib.Path) -> None:
+    data = {
+        'version': _MANIFEST_FORMAT_VERSION,
+        'tool_version': manifest.tool_version,
+        'url': manifest.url,
+        'content_hash': manifest.content_hash,
+        'files': {dest: entry._asdict() for dest, entry in sorted(manifest.files.items())},
+        'samples': dict(sorted(manifest.samples.items())),
+    }
+    path = directory / MANIFEST_FILENAME
+    fd, tmp = tempfile.mkstemp(dir=str(directory), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump(data, fh, indent=2)
+            fh.write('\n')
+        os.replace(tmp, str(path))  # replace atomically not to leave a broken manifest
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    logger.debug('write the manifest: %s', str(path))
@@ -0,0 +1,159 @@
+"""
+the module to cache results of analyzers on disk
+
+この module は解析結果 (:any:`AnalyzerResult`) をディスク上にキャッシュします。
+キャッシュのキーは問題の URL と HTML とサンプルケースとこのパッケージのバージョンのハッシュ値です。
+キャッシュの合計サイズが上限を超えると、最も古くに使われたものから削除されます。
+キャッシュに存在しない場合でも、同じ URL の問題に対する以前の解析結果があれば、それを再利用して解析を行います。
+"""
+
+import hashlib
+import pathlib
+import time
+from logging import getLogger
+from typing import *
+
+import appdirs
+
+import onlinejudge_template.analyzer.combined
+import onlinejudge_template.analyzer.metrics as metrics
+import onlinejudge_template.disk_cache as disk_cache
+from onlinejudge_template.__about__ import __version__
+from onlinejudge_template.types import *
+
+logger = getLogger(__name__)
+
+default_cache_dir = pathlib.Path(appdirs.user_cache_dir('online-judge-tools')) / 'template-generator' / 'analyzer'
+default_max_size = 32 * 1024 * 1024  # in bytes
+
+_CACHE_FORMAT_VERSION = 2
+
+
+def get_cache_key(resources: AnalyzerResources) -> str:
+    """get_cache_key computes the key of the given resources. The key also depends on the version of this package, so caches become invalid when the analyzers are updated.
+    """
+
+    h = hashlib.sha256()
+
+    def update(data: Optional[bytes]) -> None:
+        if data is None:
+            h.update(b'N')
+        else:
+            h.update(b'B' + str(len(data)).encode() + b':' + data)
+
+    update(str(_CACHE_FORMAT_VERSION).encode())
+    update(__version__.encode())
+    update(resources.url.encode() if resources.url is not None else None)
+    update(resources.html)
+    update(resources.input_format_string.encode() if resources.input_format_string is not None else None)
+    update(resources.output_format_string.encode() if resources.output_format_string is not None else None)
+    if resources.sample_cases is None:
+        update(None)
+    else:
+        update(str(len(resources.sample_cases)).encode())
+        for case in resources.sample_cases:
+            update(case.input)
+            update(case.output)
+    return h.hexdigest()
+
+
+def _get_path(key: str, *, cache_dir: pathlib.Path) -> pathlib.Path:
+    return cache_dir / (key + '.pickle')
+
+
+def _get_latest_path(url: str, *, cache_dir: pathlib.Path) -> pathlib.Path:
+    return cache_dir / 'latest' / (hashlib.sha256(url.encode()).hexdigest() + '.txt')
+
+
+def _load_by_key(key: str, *, cache_dir: pathlib.Path) -> Optional[AnalyzerResult]:
+    path = _get_path(key, cache_dir=cache_dir)
+    result = disk_cache.load(path)
+    if result is None:
+        return None
+    if not isinstance(result, AnalyzerResult):
+        logger.warning('broken cache: %s', str(path))
+        disk_cache.remove(path)
+        return None
+    disk_cache.touch(path)  # for LRU eviction
+    logger.debug('cache hit: %s', str(path))
+    return result
+
+
+def load(resources: AnalyzerResources, *, cache_dir: pathlib.Path = default_cache_dir) -> Optional[AnalyzerResult]:
+    """load returns the cached result for the given resources if exists.
+    """
+
+    result = _load_by_key(get_cache_key(resources), cache_dir=cache_dir)
+    if result is None:
+        return None
+    return result._replace(resources=resources)
+
+
+def load_latest(url: str, *, cache_dir: pathlib.Path = default_cache_dir) -> Optional[AnalyzerResult]:
+    """load_latest returns the last stored result for the problem of the given URL. Its resources are empty, so this is only for the `previous` argument of :any:`onlinejudge_template.analyzer.combined.run`.
+    """
+
+    latest = _get_latest_path(url, cache_dir=cache_dir)
+    try:
+        key = latest.read_text().strip()
+    except OSError:
+        return None
+    result = _load_by_key(key, cache_dir=cache_dir)
+    if result is None:
+        disk_cache.remove(latest)  # the result is already evicted
+    return result
+
+
+def evict(*, cache_dir: pathlib.Path = default_cache_dir, max_size: int = default_max_size) -> None:
+    """evict removes least recently used caches until the total size becomes at most `max_size` bytes. Pointers to the last results of URLs are also removed with the results.
+    """
+
+    if not disk_cache.evict(cache_dir, max_size=max_size):
+        return
+    for latest in (cache_dir / 'latest').glob('*.txt'):
+        try:
+            key = latest.read_text().strip()
+        except OSError:
+            continue  # removed by another process
+        if not _get_path(key, cache_dir=cache_dir).exists():
+            disk_cache.remove(latest)
+
+
+def store(result: AnalyzerResult, *, cache_dir: pathlib.Path = default_cache_dir, max_size: int = default_max_size) -> None:
+    """store writes the result to the cache. The resources in the result are not written because they are the key of the cache.
+    """
+
+    key = get_cache_key(result.resources)
+    path = _get_path(key, cache_dir=cache_dir)
+    stripped = result._replace(resources=AnalyzerResources(url=None, html=None, input_format_string=None, output_format_string=None, sample_cases=None))
+    disk_cache.store(stripped, path)
+    if result.resources.url is not None:
+        latest = _get_latest_path(result.resources.url, cache_dir=cache_dir)
+        latest.parent.mkdir(parents=True, exist_ok=True)
+        latest.write_text(key)
+    evict(cache_dir=cache_dir, max_size=max_size)
+
+
+def run(resources: AnalyzerResources, *, cache_dir: pathlib.Path = default_cache_dir, max_size: int = default_max_size, memory_budget: Optional[int] = None) -> AnalyzerResult:
+    """run is :any:`onlinejudge_template.analyzer.combined.run` with the cache.
+    When the result is not cached but there is a result for the same URL, the result is used to skip some stages of analyzers.
+    Results degraded by `memory_budget` are not stored, because they depend on the budget.
+    """
+
+    start = time.perf_counter()
+    result = load(resources, cache_dir=cache_dir)
+    if result is not None:
+        return result._replace(metrics=AnalyzerMetrics(timers={'total': time.perf_counter() - start}, counters={'cache_hits': 1}))
+    previous: Optional[AnalyzerResult] = None
+    if resources.url is not None:
+        previous = load_latest(resources.url, cache_dir=cache_dir)
+    result = onlinejudge_template.analyzer.combined.run(resources, previous=previous, memory_budget=memory_budget)
+    if result.metrics is not None:
+        result = result._replace(metrics=result.metrics._replace(counters={**result.metrics.counters, 'cache_misses': 1}))
+        if result.metrics.counters.get('memory_budget_exceeded'):
+            return result
+    try:
+        store(result, cache_dir=cache_dir, max_size=max_size)
+    except OSError as e:
+        logger.warning('failed to write the cache: %s', e)
+    return result
@@ -1,12 +1,18 @@
+import concurrent.futures
+import hashlib
 from logging import getLogger
 from typing import *
 
 import onlinejudge_template.analyzer.codeforces
 import onlinejudge_template.analyzer.constants
+import onlinejudge_template.analyzer.constraints
 import onlinejudge_template.analyzer.html
+import onlinejudge_template.analyzer.match
+import onlinejudge_template.analyzer.metrics as metrics
 import onlinejudge_template.analyzer.minimum_tree
 import onlinejudge_template.analyzer.output_types
 import onlinejudge_template.analyzer.parser
+import onlinejudge_template.analyzer.prefix
 import onlinejudge_template.analyzer.simple_patterns
 import onlinejudge_template.analyzer.topcoder
 import onlinejudge_template.analyzer.typing
@@ -45,14 +51,72 @@ def prepare_from_html(html: bytes, *, url: str, sample_cases: Optional[List[Samp
     return resources
 
 
-def run(resources: AnalyzerResources) -> AnalyzerResult:
+def _guess_input_format_from_samples(input_samples: List[str], *, multiple_test_cases: bool) -> Optional[FormatNode]:
+    input_format: Optional[FormatNode] = None
+    if not multiple_test_cases:
+        with metrics.timer('pattern_match'):
+            input_format = onlinejudge_template.analyzer.simple_patterns.guess_format_with_pattern_matching(instances=input_samples)
+    if input_format is None:
+        with metrics.timer('minimum_tree'):
+            input_format = onlinejudge_template.analyzer.minimum_tree.construct_minimum_input_format_tree(instances=input_samples, multiple_test_cases=multiple_test_cases)
+    return input_format
+
+
+# The peak memory usage of analyzers per byte of sample cases. This is a conservative estimate from `python3 -m benchmarks.memory`, which shows about 40 bytes per byte for the worst stages (pattern matching and minimum trees).
+MEMORY_USAGE_PER_SAMPLE_BYTE = 64
+
+
+def estimate_memory_usage(sample_cases: List[SampleCase]) -> int:
+    """estimate_memory_usage estimates the peak memory usage in bytes of analyzers for the given sample cases.
+    """
+
+    return MEMORY_USAGE_PER_SAMPLE_BYTE * sum(len(case.input) + len(case.output) for case in sample_cases)
+
+
+def _shrink_sample_cases(sample_cases: List[SampleCase], *, memory_budget: int, max_sample_lines: int, max_sample_tokens: int) -> Tuple[List[SampleCase], List[str]]:
+    """_shrink_sample_cases chooses sample cases within the memory budget. The inputs of other sample cases are truncated if possible.
+
+    :returns: the sample cases which are used as they are, and the inputs (including truncated ones) to use for input formats.
+    """
+
+    used: List[SampleCase] = []
+    input_samples: List[str] = []
+    total = 0
+    for case in sample_cases:
+        usage = estimate_memory_usage([case])
+        if total + usage <= memory_budget:
+            used.append(case)
+            input_samples.append(case.input.decode())
+            total += usage
+            continue
+        truncated = onlinejudge_template.analyzer.prefix.truncate_sample(case.input.decode(), max_lines=max_sample_lines, max_tokens=max_sample_tokens)
+        if truncated is not None:
+            input_samples.append(truncated)
+        else:
+            logger.info('ignore a sample case because it is too large and cannot be truncated')
+    return used, input_samples
+
+
+_Constraints = Dict[VarName, Tuple[Optional[Expr], Optional[Expr]]]
 
+
+class _HTMLAnalysis(NamedTuple):
+    """_HTMLAnalysis is the information which analyzers use from the HTML, other than the format strings.
+    """
+
+    topcoder_class_definition: Optional[TopcoderClassDefinition]
+    multiple_test_cases: bool
+    constraints: Optional[_Constraints]
+
+
+def _analyze_html(resources: AnalyzerResources) -> _HTMLAnalysis:
     # It seems that topcoder_class_definition should be included in resources.
     topcoder_class_definition: Optional[TopcoderClassDefinition] = None
     try:
         if resources.url is not None and onlinejudge_template.analyzer.topcoder.is_topcoder_url(resources.url):
             if resources.html is not None:
-                topcoder_class_definition = onlinejudge_template.analyzer.topcoder.parse_topcoder_class_definition(resources.html, url=resources.url)
+                with metrics.timer('html'):
+                    topcoder_class_definition = onlinejudge_template.analyzer.topcoder.parse_topcoder_class_definition(resources.html, url=resources.url)
     except AnalyzerError as e:
         logger.exception('failed to analyze the class definition of the Topcoder problem: %s', e)
 
@@ -60,28 +124,154 @@ def run(resources: AnalyzerResources) -> AnalyzerResult:
     try:
         if resources.url is not None and onlinejudge_template.analyzer.codeforces.is_codeforces_url(resources.url):
             if resources.html is not None:
-                multiple_test_cases = onlinejudge_template.analyzer.codeforces.has_multiple_testcases(resources.html, url=resources.url)
+                with metrics.timer('html'):
+                    multiple_test_cases = onlinejudge_template.analyzer.codeforces.has_multiple_testcases(resources.html, url=resources.url)
                 if multiple_test_cases:
                     logger.info('Each input of this problem has multiple test cases.')
     except AnalyzerError as e:
         logger.exception('failed to decide wheter the Codeforces problem has multiple test cases: %s', e)
 
+    constraints: Optional[_Constraints] = None
+    try:
+        # The names of variables in the constraints are meaningful only when the format tree is parsed from the format string.
+        if resources.input_format_string is not None and resources.html is not None and resources.url is not None:
+            with metrics.timer('html'):
+                constraints = onlinejudge_template.analyzer.constraints.parse_constraints(resources.html, url=resources.url)
+    except AnalyzerError as e:
+        logger.info('failed to analyze the constraints: %s', e)
+    except NotImplementedError as e:
+        logger.debug('The analysis of constraints is not supported for this problem: %s', e)
+
+    return _HTMLAnalysis(topcoder_class_definition=topcoder_class_definition, multiple_test_cases=multiple_test_cases, constraints=constraints)
+
+
+def _get_fingerprints(resources: AnalyzerResources, *, html: _HTMLAnalysis) -> Dict[str, str]:
+    def digest(items: Iterable[Optional[bytes]]) -> str:
+        h = hashlib.sha256()
+        for item in items:
+            if item is None:
+                h.update(b'N')
+            else:
+                h.update(b'B' + str(len(item)).encode() + b':' + item)
+        return h.hexdigest()
+
+    def encode(s: Optional[str]) -> Optional[bytes]:
+        return s.encode() if s is not None else None
+
+    sample_cases = resources.sample_cases if resources.sample_cases is not None else []
+    return {
+        'url': digest([encode(resources.url)]),
+        'topcoder_class_definition': digest([encode(repr(html.topcoder_class_definition))]),
+        'multiple_test_cases': digest([encode(repr(html.multiple_test_cases))]),
+        'constraints': digest([encode(repr(sorted(html.constraints.items())) if html.constraints is not None else None)]),
+        'input_format_string': digest([encode(resources.input_format_string)]),
+        'output_format_string': digest([encode(resources.output_format_string)]),
+        'input_samples': digest([b'N' if resources.sample_cases is None else b'L'] + [case.input for case in sample_cases]),
+        'output_samples': digest([b'N' if resources.sample_cases is None else b'L'] + [case.output for case in sample_cases]),
+    }
+
+
+def get_fingerprints(resources: AnalyzerResources) -> Dict[str, str]:
+    """get_fingerprints computes hashes of the parts of resources. They are used to decide which stages of analyzers can be skipped.
+    The HTML itself is not hashed. Only the information which analyzers read from it (e.g. constraints) is hashed, so fixes of the statement or tokens in the page don't invalidate results.
+    """
+
+    return _get_fingerprints(resources, html=_analyze_html(resources))
+
+
+def _is_output_format_matched(output_format: FormatNode, *, input_format: Optional[FormatNode], input_variables: Optional[Dict[VarName, VarDecl]], sample_cases: List[SampleCase]) -> bool:
+    if input_format is None or input_variables is None:
+        return onlinejudge_template.analyzer.prefix.is_matched(output_format, instances=[case.output.decode() for case in sample_cases])
+    try:
+        output_variables = onlinejudge_template.analyzer.variables.list_declared_variables(output_format)
+        for case in sample_cases:
+            input_values = onlinejudge_template.analyzer.match.match_format(input_format, case.input.decode(), variables=input_variables)
+            values = {name: value for name, value in input_values.items() if name not in output_variables}
+            onlinejudge_template.analyzer.match.match_format(output_format, case.output.decode(), variables=output_variables, values=values)
+    except AnalyzerError as e:
+        logger.debug('failed to match: %s', e)
+        return False
+    return True
+
+
+def run(resources: AnalyzerResources, *, previous: Optional[AnalyzerResult] = None, max_sample_lines: Optional[int] = 100, max_sample_tokens: Optional[int] = 100, memory_budget: Optional[int] = None) -> AnalyzerResult:
+    """run analyzes the problem. This function is thread-safe.
+    The wall-time of each stage and some counters are stored in the `metrics` field of the result.
+
+    :param previous: is an optional result for an old version of the problem (e.g. before adding sample cases). Its format trees are reused if the parts of resources which they depend on are not changed, or if they still match with the new sample cases.
+    :param max_sample_lines: is the number of lines of samples to guess formats. Larger samples are shrunk if possible, and the guessed formats are verified with the original samples. None means no limits.
+    :param max_sample_tokens: is the number of tokens in a line of samples to guess formats.
+    :param memory_budget: is the limit in bytes of the memory usage, compared with :any:`estimate_memory_usage`. When sample cases exceed this, the analysis is degraded instead of running out of memory: large sample cases are truncated without verification with the original ones, or ignored if they cannot be truncated. Observed ranges of variables are not recorded in this case. None means no limits.
+    """
+
+    with metrics.collect() as collector:
+        with metrics.timer('total'):
+            result = _run(resources, previous=previous, max_sample_lines=max_sample_lines, max_sample_tokens=max_sample_tokens, memory_budget=memory_budget)
+    return result._replace(metrics=collector.get_metrics())
+
+
+def _run(resources: AnalyzerResources, *, previous: Optional[AnalyzerResult], max_sample_lines: Optional[int], max_sample_tokens: Optional[int], memory_budget: Optional[int]) -> AnalyzerResult:
+    html = _analyze_html(resources)
+    topcoder_class_definition = html.topcoder_class_definition
+    multiple_test_cases = html.multiple_test_cases
+    fingerprints = _get_fingerprints(resources, html=html)
+
+    def is_unchanged(*keys: str) -> bool:
+        if previous is None or previous.fingerprints is None:
+            return False
+        return all(previous.fingerprints.get(key) == fingerprints[key] for key in keys)
+
+    # decode sample cases only once
+    sample_cases: List[SampleCase] = resources.sample_cases or []
+    degraded = False
+    if memory_budget is not None and estimate_memory_usage(sample_cases) > memory_budget:
+        logger.warning('the sample cases are too large for the memory budget (%d bytes), so they are analyzed only partially', memory_budget)
+        metrics.count('memory_budget_exceeded')
+        degraded = True
+        sample_cases, input_samples = _shrink_sample_cases(sample_cases, memory_budget=memory_budget, max_sample_lines=max_sample_lines or 100, max_sample_tokens=max_sample_tokens or 100)
+    else:
+        input_samples = [case.input.decode() for case in sample_cases]
+    output_samples = [case.output.decode() for case in sample_cases]
+
     # parse the format tree for input
     input_format: Optional[FormatNode] = None
+    input_format_reused = False
+    if previous is not None and is_unchanged('url', 'topcoder_class_definition', 'multiple_test_cases', 'constraints', 'input_format_string', 'input_samples'):
+        logger.info('reuse the input format because the problem is not changed')
+        input_format = previous.input_format
+        input_format_reused = True
+        metrics.count('reused_formats')
+    elif previous is not None and previous.input_format is not None and resources.input_format_string is None and topcoder_class_definition is None and input_samples and is_unchanged('url', 'topcoder_class_definition', 'multiple_test_cases', 'constraints', 'input_format_string'):
+        if onlinejudge_template.analyzer.prefix.is_matched(previous.input_format, instances=input_samples):
+            logger.info('reuse the input format because it matches with the new sample cases')
+            input_format = previous.input_format
+            input_format_reused = True
+            metrics.count('reused_formats')
     try:
-        if resources.input_format_string is not None:
-            input_format = onlinejudge_template.analyzer.parser.run(resources.input_format_string)
+        if input_format_reused:
+            pass
+        elif resources.input_format_string is not None:
+            with metrics.timer('format_parse'):
+                input_format = onlinejudge_template.analyzer.parser.run(resources.input_format_string)
         elif topcoder_class_definition is not None:
             input_format = onlinejudge_template.analyzer.topcoder.convert_topcoder_class_definition_to_input_format(topcoder_class_definition)
     except AnalyzerError as e:
         logger.info('failed to parse the input format string: %s', e)
     try:
-        if input_format is None and resources.sample_cases:
-            input_samples = [case.input.decode() for case in resources.sample_cases]
-            if not multiple_test_cases:
-                input_format = onlinejudge_template.analyzer.simple_patterns.guess_format_with_pattern_matching(instances=input_samples)
+        if not input_format_reused and input_format is None and input_samples:
+            truncated_samples: Optional[List[str]] = None
+            if max_sample_lines is not None and max_sample_tokens is not None and not degraded:
+                with metrics.timer('prefix'):
+                    truncated_samples = onlinejudge_template.analyzer.prefix.truncate_samples(input_samples, max_lines=max_sample_lines, max_tokens=max_sample_tokens)
+            if truncated_samples is not None:
+                input_format = _guess_input_format_from_samples(truncated_samples, multiple_test_cases=multiple_test_cases)
+                with metrics.timer('prefix'):
+                    is_matched = input_format is not None and onlinejudge_template.analyzer.prefix.is_matched(input_format, instances=input_samples)
+                if input_format is not None and not is_matched:
+                    logger.info('the input format guessed from the truncated sample cases does not match with the original ones')
+                    input_format = None
             if input_format is None:
-                input_format = onlinejudge_template.analyzer.minimum_tree.construct_minimum_input_format_tree(instances=input_samples, multiple_test_cases=multiple_test_cases)
+                input_format = _guess_input_format_from_samples(input_samples, multiple_test_cases=multiple_test_cases)
     except AnalyzerError as e:
         logger.info('failed to analyze the input format from the input sample cases: %s', e)
     if input_format is None:
@@ -95,34 +285,61 @@ def run(resources: AnalyzerResources) -> AnalyzerResult:
 
         elif input_format is not None:
             input_variables = onlinejudge_template.analyzer.variables.list_declared_variables(input_format)
-            if input_format is not None and input_variables is not None and resources.sample_cases:
-                input_samples = [case.input.decode() for case in resources.sample_cases]
-                input_types = onlinejudge_template.analyzer.typing.infer_types_from_instances(input_format, variables=input_variables, instances=input_samples)
+            if input_format is not None and input_variables is not None and input_samples:
+                with metrics.timer('typing'):
+                    input_types, input_ranges = onlinejudge_template.analyzer.typing.infer_types_and_ranges_from_instances(input_format, variables=input_variables, instances=input_samples)
                 input_variables = onlinejudge_template.analyzer.typing.update_variables_with_types(variables=input_variables, types=input_types)
+                if not degraded:  # the values in truncated samples are not the original ones
+                    input_variables = onlinejudge_template.analyzer.typing.update_variables_with_ranges(variables=input_variables, ranges=input_ranges)
     except AnalyzerError as e:
         logger.info('failed to list variables in the input format: %s', e)
 
+    # attach constraints to the variables for input
+    try:
+        if input_variables is not None and html.constraints is not None:
+            input_variables = onlinejudge_template.analyzer.constraints.update_variables_with_constraints(variables=input_variables, constraints=html.constraints)
+    except AnalyzerError as e:
+        logger.info('failed to analyze the constraints: %s', e)
+
     # parse the format tree for output
     output_format: Optional[FormatNode] = None
+    output_format_reused = False
+    if previous is not None and is_unchanged('url', 'topcoder_class_definition', 'multiple_test_cases', 'constraints', 'input_format_string', 'output_format_string', 'input_samples', 'output_samples'):
+        logger.info('reuse the output format because the problem is not changed')
+        output_format = previous.output_format
+        output_format_reused = True
+        metrics.count('reused_formats')
+    elif previous is not None and previous.output_format is not None and resources.output_format_string is None and topcoder_class_definition is None and sample_cases and is_unchanged('url', 'topcoder_class_definition', 'multiple_test_cases', 'constraints', 'input_format_string', 'output_format_string'):
+        if _is_output_format_matched(previous.output_format, input_format=input_format, input_variables=input_variables, sample_cases=sample_cases):
+            logger.info('reuse the output format because it matches with the new sample cases')
+            output_format = previous.output_format
+            output_format_reused = True
+            metrics.count('reused_formats')
     try:
-        if resources.output_format_string is not None:
-            output_format = onlinejudge_template.analyzer.parser.run(resources.output_format_string)
+        if output_format_reused:
+            pass
+        elif resources.output_format_string is not None:
+            with metrics.timer('format_parse'):
+                output_format = onlinejudge_template.analyzer.parser.run(resources.output_format_string)
         elif topcoder_class_definition is not None:
             output_format = onlinejudge_template.analyzer.topcoder.convert_topcoder_class_definition_to_output_format(topcoder_class_definition)
     except AnalyzerError as e:
         logger.info('failed to parse the output format string: %s', e)
     try:
-        if output_format is None and resources.sample_cases:
+        if not output_format_reused and output_format is None and sample_cases:
             if input_format is not None and input_variables is not None:
                 if not multiple_test_cases:
-                    output_format = onlinejudge_template.analyzer.simple_patterns.guess_output_format_with_pattern_matching_using_input_format(instances=resources.sample_cases, input_format=input_format, input_variables=input_variables)
+                    with metrics.timer('pattern_match'):
+                        output_format = onlinejudge_template.analyzer.simple_patterns.guess_output_format_with_pattern_matching_using_input_format(instances=sample_cases, input_format=input_format, input_variables=input_variables)
                 if output_format is None:
-                    output_format = onlinejudge_template.analyzer.minimum_tree.construct_minimum_output_format_tree_using_input_format(instances=resources.sample_cases, input_format=input_format, input_variables=input_variables, multiple_test_cases=multiple_test_cases)
+                    with metrics.timer('minimum_tree'):
+                        output_format = onlinejudge_template.analyzer.minimum_tree.construct_minimum_output_format_tree_using_input_format(instances=sample_cases, input_format=input_format, input_variables=input_variables, multiple_test_cases=multiple_test_cases)
             else:
-                output_samples = [case.output.decode() for case in resources.sample_cases]
-                output_format = onlinejudge_template.analyzer.simple_patterns.guess_format_with_pattern_matching(instances=output_samples)
+                with metrics.timer('pattern_match'):
+                    output_format = onlinejudge_template.analyzer.simple_patterns.guess_format_with_pattern_matching(instances=output_samples)
                 if output_format is None:
-                    output_format = onlinejudge_template.analyzer.minimum_tree.construct_minimum_output_format_tree(instances=output_samples)
+                    with metrics.timer('minimum_tree'):
+                        output_format = onlinejudge_template.analyzer.minimum_tree.construct_minimum_output_format_tree(instances=output_samples)
     except AnalyzerError as e:
         logger.info('failed to analyze the output format from the sample cases: %s', e)
     if output_format is None:
@@ -136,18 +353,20 @@ def run(resources: AnalyzerResources) -> AnalyzerResult:
 
         elif output_format is not None:
             output_variables = onlinejudge_template.analyzer.variables.list_declared_variables(output_format)
-            if output_format is not None and output_variables is not None and resources.sample_cases:
-                output_samples = [case.output.decode() for case in resources.sample_cases]
-                output_types = onlinejudge_template.analyzer.typing.infer_types_from_instances(output_format, variables=output_variables, instances=output_samples)
+            if output_format is not None and output_variables is not None and output_samples:
+                with metrics.timer('typing'):
+                    output_types, output_ranges = onlinejudge_template.analyzer.typing.infer_types_and_ranges_from_instances(output_format, variables=output_variables, instances=output_samples)
                 output_variables = onlinejudge_template.analyzer.typing.update_variables_with_types(variables=output_variables, types=output_types)
+                output_variables = onlinejudge_template.analyzer.typing.update_variables_with_ranges(variables=output_variables, ranges=output_ranges)
     except AnalyzerError as e:
         logger.info('failed to list variables in the output format: %s', e)
 
     # list constants
     constants: Dict[VarName, ConstantDecl] = {}
     try:
-        if resources.html is not None or resources.sample_cases:
-            constants.update(onlinejudge_template.analyzer.constants.list_constants(html=resources.html, sample_cases=resources.sample_cases))
+        if resources.html is not None or sample_cases:
+            with metrics.timer('constants'):
+                constants.update(onlinejudge_template.analyzer.constants.list_constants(html=resources.html, sample_cases=sample_cases if resources.sample_cases is not None else None))
     except AnalyzerError as e:
         logger.exception('failed to list used constants: %s', e)
 
@@ -155,7 +374,8 @@ def run(resources: AnalyzerResources) -> AnalyzerResult:
     output_type: Optional[OutputType] = None
     try:
         if output_format is not None and output_variables is not None:
-            output_type = onlinejudge_template.analyzer.output_types.analyze_output_type(output_format=output_format, output_variables=output_variables, constants=constants)
+            with metrics.timer('output_type'):
+                output_type = onlinejudge_template.analyzer.output_types.analyze_output_type(output_format=output_format, output_variables=output_variables, constants=constants)
     except AnalyzerError as e:
         logger.info('failed to analyze the type of the output format: %s', e)
 
@@ -168,9 +388,39 @@ def run(resources: AnalyzerResources) -> AnalyzerResult:
         constants=constants,
         output_type=output_type,
         topcoder_class_definition=topcoder_class_definition,
+        fingerprints=fingerprints,
     )
 
 
+def run_many(resources_list: List[AnalyzerResources], *, workers: Optional[int] = None, executor: str = 'thread', max_sample_lines: Optional[int] = 100, max_sample_tokens: Optional[int] = 100, memory_budget: Optional[int] = None) -> List[Tuple[AnalyzerResult, Optional[Exception]]]:
+    """run_many runs :any:`run` for many problems concurrently.
+
+    :param workers: is the number of workers. None means the default of :py:mod:`concurrent.futures`.
+    :param executor: is either ``thread`` or ``process``.
+    :param memory_budget: is the limit for each problem. See :any:`run`.
+    :returns: pairs of results and exceptions in the same order to `resources_list`. If the analysis of a problem fails, its result is an empty result and the exception is returned instead of being raised.
+    """
+
+    pool: concurrent.futures.Executor
+    if executor == 'thread':
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    elif executor == 'process':
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    else:
+        raise ValueError(f"""executor must be 'thread' or 'process': {repr(executor)}""")
+
+    results: List[Tuple[AnalyzerResult, Optional[Exception]]] = []
+    with pool:
+        futures = [pool.submit(run, resources, max_sample_lines=max_sample_lines, max_sample_tokens=max_sample_tokens, memory_budget=memory_budget) for resources in resources_list]
+        for resources, future in zip(resources_list, futures):
+            try:
+                results.append((future.result(), None))
+            except Exception as e:
+                logger.exception('failed to analyze the problem: %s', resources.url)
+                results.append((get_empty_analyzer_result(resources), e))
+    return results
+
+
 def get_empty_analyzer_result(resources: AnalyzerResources) -> AnalyzerResult:
     return AnalyzerResult(
         resources=resources,
@@ -0,0 +1,248 @@
+"""
+the module to extract constraints of variables from HTML
+
+この module は問題文の HTML から制約 (たとえば ``1 \\leq N \\leq 2 \\times 10^5``) を抜き出し、変数ごとの下界と上界を求めます。
+
+たとえば
+::
+
+    <h3>Constraints</h3><ul>
+    <li><var>1 \\leq N \\leq 2 \\times 10^5</var></li>
+    <li><var>1 \\leq A_i \\leq N</var></li>
+    <li>All values in input are integers.</li>
+    </ul>
+
+という部分文字列を含む HTML からは
+::
+
+    {
+        "N": ("1", "200000"),
+        "A": ("1", "N"),
+    }
+
+に相当する結果を返します。
+AtCoder では Constraints の節を、yukicoder では入力の節を、Codeforces では Input の節を読みます。
+"""
+
+import re
+from logging import getLogger
+from typing import *
+
+import bs4
+
+import onlinejudge_template.analyzer.simplify as simplify
+from onlinejudge_template.types import *
+
+logger = getLogger(__name__)
+
+
+class ConstraintsParserError(AnalyzerError):
+    pass
+
+
+table = {
+    'atcoder': ('Constraints', '制約'),
+    'yukicoder': ('入力', '制約', 'Input', 'Constraints'),
+}
+
+
+def _list_math_fragments(text: str) -> List[str]:
+    """_list_math_fragments lists formulas enclosed with ``$ ... $`` (or ``$$$ ... $$$`` in Codeforces) or ``\\( ... \\)``.
+    """
+
+    fragments: List[str] = []
+    for i, fragment in enumerate(re.split(r'\$+', text)):
+        if i % 2 == 1:
+            fragments.append(fragment)
+        else:
+            fragments.extend(re.findall(r'\\\((.*?)\\\)', fragment))
+    return fragments
+
+
+def list_constraint_fragments(html: bytes, *, url: str) -> List[str]:
+    """list_constraint_fragments lists the formulas in the section about constraints.
+
+    :raises ConstraintsParserError:
+    :raises NotImplementedError:
+    """
+
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+
+    if 'atcoder.jp' in url:
+        for h3 in soup.find_all('h3'):
+            if h3.string in table['atcoder']:
+                return [var.text for var in h3.parent.find_all('var')]
+        raise ConstraintsParserError('the section about constraints is not found')
+
+    elif 'yukicoder.me' in url:
+        fragments: List[str] = []
+        for h4 in soup.find_all('h4'):
+            if h4.string in table['yukicoder']:
+                for tag in h4.parent.find_all(['p', 'li', 'div'], recursive=False):
+                    fragments.extend(_list_math_fragments(tag.text))
+        if not fragments:
+            raise ConstraintsParserError('the section about constraints is not found')
+        return fragments
+
+    elif 'codeforces.com' in url:
+        input_specifications = soup.find_all('div', class_='input-specification')
+        if len(input_specifications) != 1:
+            raise ConstraintsParserError("""<div class="input-specification"> is not found or not unique.""")
+        return _list_math_fragments(input_specifications[0].text)
+
+    else:
+        raise NotImplementedError
+
+
+def _normalize_formula(s: str) -> str:
+    replace = [
+        (r'\\(mathrm|mathit|mathtt|mathbf|text)\s*\{([^{}]*)\}', r'\2'),
+        (r'\\(left|right)\b', ''),
+        (r'\\(leqq|leqslant|leq|le)\b|≤|≦|⩽', ' <= '),
+        (r'\\(geqq|geqslant|geq|ge)\b|≥|≧|⩾', ' >= '),
+        (r'\\lt\b', ' < '),
+        (r'\\gt\b', ' > '),
+        (r'\\(times|cdot)\b|×|⋅', ' * '),
+        (r'(\d)(\{,\}|\\,)(?=\d{3})', r'\1'),
+        (r'\\[ ,:;!]|~|\\q?quad\b', ' '),
+    ]
+    for pattern, repl in replace:
+        s = re.sub(pattern, repl, s)
+
+    def power(m: Match[str]) -> str:
+        base, exp = int(m.group(1)), int(m.group(2))
+        if exp > 100:
+            return m.group(0)
+        return str(base**exp)
+
+    s = re.sub(r'(\d+)\s*\^\s*\{?\s*(\d+)\s*\}?', power, s)
+
+    # remove qualifiers like "(1 <= i <= N)"
+    s = re.sub(r'\([^()]*(<=|>=|<|>)[^()]*\)', ' ', s)
+    return s.strip()
+
+
+def _split_at_top_level_commas(s: str) -> List[str]:
+    items = []
+    depth = 0
+    last = 0
+    for i, c in enumerate(s):
+        if c in '({':
+            depth += 1
+        elif c in ')}':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            items.append(s[last:i])
+            last = i + 1
+    items.append(s[last:])
+    return [item.strip() for item in items]
+
+
+def _parse_variables(s: str) -> Optional[List[VarName]]:
+    """
+    :returns: names of variables if the given string is a list of (subscripted) variables like ``N, M`` or ``A_i``
+    """
+
+    names: List[VarName] = []
+    for item in _split_at_top_level_commas(s):
+        try:
+            name, _ = simplify.parse_subscripted_variable(item)
+        except simplify.ExprParserError:
+            return None
+        names.append(VarName(name))
+    return names
+
+
+def _parse_bound(s: str, *, delta: int) -> Optional[Expr]:
+    if not s or '_' in s:
+        return None  # bounds with subscripts (e.g. A_{i + 1}) are not for the variable itself
+    try:
+        expr = simplify.rename_variables_in_expr(Expr(s), replace={})  # This raises an error when the expr is not well-formed.
+    except simplify.ExprParserError:
+        return None
+    return simplify.simplify(Expr(f"""{expr} + ({delta})"""))
+
+
+def _tighter_bound(a: Optional[Expr], b: Optional[Expr], *, lower: bool) -> Optional[Expr]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    x = simplify.evaluate(a)
+    y = simplify.evaluate(b)
+    if x is None or y is None:
+        return a  # use the first one
+    if lower:
+        return a if x >= y else b
+    else:
+        return a if x <= y else b
+
+
+def parse_constraints_from_fragments(fragments: List[str]) -> Dict[VarName, Tuple[Optional[Expr], Optional[Expr]]]:
+    """
+    :returns: a dict from names of variables to the pairs of lower bounds and upper bounds. Both bounds are inclusive.
+    """
+
+    constraints: Dict[VarName, Tuple[Optional[Expr], Optional[Expr]]] = {}
+
+    def update(name: VarName, lower: Optional[Expr], upper: Optional[Expr]) -> None:
+        if (lower is not None and re.search(r'\b' + re.escape(name) + r'\b', lower)) or (upper is not None and re.search(r'\b' + re.escape(name) + r'\b', upper)):
+            return
+        l, r = constraints.get(name, (None, None))
+        constraints[name] = (_tighter_bound(l, lower, lower=True), _tighter_bound(r, upper, lower=False))
+
+    for fragment in fragments:
+        items = re.split(r'(<=|>=|<|>)', _normalize_formula(fragment))
+        for i in range(1, len(items) - 1, 2):
+            lhs, op, rhs = items[i - 1].strip(), items[i], items[i + 1].strip()
+            if op in ('>=', '>'):
+                lhs, rhs = rhs, lhs
+            delta = 1 if op in ('<', '>') else 0
+
+            # lhs <= rhs
+            rhs_names = _parse_variables(rhs)
+            if rhs_names is not None:
+                lower = _parse_bound(lhs, delta=delta)
+                if lower is not None:
+                    for name in rhs_names:
+                        update(name, lower, None)
+            lhs_names = _parse_variables(lhs)
+            if lhs_names is not None:
+                upper = _parse_bound(rhs, delta=-delta)
+                if upper is not None:
+                    for name in lhs_names:
+                        update(name, None, upper)
+
+    logger.debug('constraints: %s', constraints)
+    return constraints
+
+
+def parse_constraints(html: bytes, *, url: str) -> Dict[VarName, Tuple[Optional[Expr], Optional[Expr]]]:
+    """
+    :raises ConstraintsParserError:
+    :raises NotImplementedError:
+    """
+
+    fragments = list_constraint_fragments(html, url=url)
+    logger.debug('fragments of constraints: %s', fragments)
+    return parse_constraints_from_fragments(fragments)
+
+
+def update_variables_with_constraints(*, variables: Dict[VarName, VarDecl], constraints: Dict[VarName, Tuple[Optional[Expr], Optional[Expr]]]) -> Dict[VarName, VarDecl]:
+    """update_variables_with_constraints sets bounds to integer variables.
+    Constraints which contradict the values in sample cases are ignored because they seem to be misrecognized.
+    """
+
+    updated: Dict[VarName, VarDecl] = {}
+    for name, decl in variables.items():
+        if decl.type in (VarType.IndexInt, VarType.ValueInt) and name in constraints:
+            lower, upper = constraints[name]
+            if decl.observed_range is not None:
+                l = simplify.evaluate(lower) if lower is not None else None
+                r = simplify.evaluate(upper) if upper is not None else None
+                if (l is not None and decl.observed_range[0] < l) or (r is not None and r < decl.observed_range[1]):
+                    logger.warning('ignored constraints of %s because they contradict sample cases: %s <= %s <= %s', name, lower, decl.observed_range, upper)
+                    lower, upper = None, None
+            decl = decl._replace(lower_bound=lower, upper_bound=upper)
+        updated[name] = decl
+    return updated
@@ -26,6 +26,7 @@ from typing import *
 import bs4
 
 from onlinejudge_template.types import AnalyzerError
+from onlinejudge_template.utils import LazyFormat
 
 logger = getLogger(__name__)
 
@@ -72,7 +73,7 @@ def parse_generic_format_string(html: bytes, *, kind: str, url: str) -> str:
     """
 
     soup = bs4.BeautifulSoup(html, 'html.parser')
-    logger.debug('parsed HTML: %s...', repr(str(soup))[:200])
+    logger.debug('parsed HTML: %s...', LazyFormat(lambda: repr(str(soup))[:200]))
 
     if 'atcoder.jp' in url:
         for h3 in soup.find_all('h3'):
@@ -31,10 +31,13 @@ the module to match format trees and sample strings
 に相当する結果を返します。
 """
 
+import functools
+import re
 from logging import getLogger
 from typing import *
 
-from onlinejudge_template.analyzer.simplify import evaluate
+import onlinejudge_template.analyzer.metrics as metrics
+from onlinejudge_template.analyzer.simplify import ExprParserError, evaluate, simplify
 from onlinejudge_template.types import *
 
 logger = getLogger(__name__)
@@ -44,9 +47,11 @@ class FormatMatchError(AnalyzerError):
     pass
 
 
-def _get_env(values: Dict[VarName, Dict[Tuple[int, ...], Union[int, float, str]]]) -> Dict[VarName, Union[int, List[int], List[List[int]]]]:
+def _get_env(values: Dict[VarName, Dict[Tuple[int, ...], Union[int, float, str]]], *, names: Set[VarName]) -> Dict[VarName, Union[int, List[int], List[List[int]]]]:
     env: Dict[VarName, Union[int, List[int], List[List[int]]]] = {}
     for name, value in values.items():
+        if name not in names:
+            continue
         if () in value and isinstance(value[()], int):
             env[name] = value[()]
         elif (0, ) in value and isinstance(value[(0, )], int):
@@ -62,7 +67,59 @@ def _get_env(values: Dict[VarName, Dict[Tuple[int, ...], Union[int, float, str]]
     return env
 
 
-def _match_format_dfs(node: FormatNode, tokens: List[str], *, variables: Dict[VarName, VarDecl], values: Dict[VarName, Dict[Tuple[int, ...], Union[int, float, str]]]) -> None:
+@functools.lru_cache(maxsize=None)
+def _get_index_expr(index: str, base: str) -> Expr:
+    expr = Expr(f"""{index} - ({base})""")
+    try:
+        return simplify(expr)  # e.g. "i + 1 - (1)" becomes "i"
+    except ExprParserError:
+        return expr
+
+
+def _evaluate_in_env(expr: Expr, *, env: Dict[VarName, Union[int, List[int], List[List[int]]]]) -> Optional[int]:
+    """_evaluate_in_env is :any:`evaluate` with shortcuts for exprs which are just a variable or a number. Most exprs in format trees are so.
+    """
+
+    value = env.get(VarName(expr))
+    if isinstance(value, int):
+        return value
+    if expr.isdigit():
+        return int(expr)
+    return evaluate(expr, env=env)
+
+
+def _list_referenced_variables(node: FormatNode, *, variables: Dict[VarName, VarDecl]) -> Set[VarName]:
+    """_list_referenced_variables lists variables (including loop counters) which are used in sizes of loops or indices, i.e. variables whose values are required to continue matching.
+    """
+
+    exprs: List[str] = []
+
+    def dfs(node: FormatNode) -> None:
+        if isinstance(node, ItemNode):
+            exprs.extend(node.indices)
+        elif isinstance(node, NewlineNode):
+            pass
+        elif isinstance(node, SequenceNode):
+            for item in node.items:
+                dfs(item)
+        elif isinstance(node, LoopNode):
+            exprs.append(node.size)
+            dfs(node.body)
+        else:
+            assert False
+
+    dfs(node)
+    for decl in variables.values():
+        exprs.extend(decl.dims)
+        exprs.extend(decl.bases)
+    referenced: Set[VarName] = set()
+    for expr in exprs:
+        for name in re.findall(r'[A-Za-z]+', expr):  # the same to t_IDENT of simplify
+            referenced.add(VarName(name))
+    return referenced
+
+
+def _match_format_dfs(node: FormatNode, tokens: List[str], *, variables: Dict[VarName, VarDecl], values: Dict[VarName, Dict[Tuple[int, ...], Union[int, float, str]]], callback: Optional[Callable[[VarName, Tuple[int, ...], Union[int, float, str]], None]], referenced: Set[VarName], keep: bool) -> None:
     """
     :raises FormatMatchError:
     """
@@ -96,10 +153,10 @@ def _match_format_dfs(node: FormatNode, tokens: List[str], *, variables: Dict[Va
 
         # update
         ix = []
-        env = _get_env(values)
+        env = _get_env(values, names=referenced) if node.indices else {}
         for str_i, str_dim, str_base in zip(node.indices, variables[node.name].dims, variables[node.name].bases):
-            i = evaluate(Expr(f"""{str_i} - ({str_base})"""), env=env)
-            dim = evaluate(str_dim, env=env)
+            i = _evaluate_in_env(_get_index_expr(str_i, str_base), env=env)
+            dim = _evaluate_in_env(str_dim, env=env)
             if i is None:
                 raise FormatMatchError(f"""failed to evaluate: {str_i} - ({str_base})""")
             if dim is None:
@@ -107,7 +164,10 @@ def _match_format_dfs(node: FormatNode, tokens: List[str], *, variables: Dict[Va
             if i < 0 or dim <= i:
                 raise FormatMatchError(f"""out of bound: index is {i} but size is {dim}""")
             ix.append(i)
-        values[node.name][tuple(ix)] = value
+        if callback is not None:
+            callback(node.name, tuple(ix), value)
+        if keep or node.name in referenced:
+            values[node.name][tuple(ix)] = value
 
     elif isinstance(node, NewlineNode):
         if not tokens:
@@ -118,16 +178,16 @@ def _match_format_dfs(node: FormatNode, tokens: List[str], *, variables: Dict[Va
 
     elif isinstance(node, SequenceNode):
         for item in node.items:
-            _match_format_dfs(item, tokens, variables=variables, values=values)
+            _match_format_dfs(item, tokens, variables=variables, values=values, callback=callback, referenced=referenced, keep=keep)
 
     elif isinstance(node, LoopNode):
-        size = evaluate(node.size, env=_get_env(values))
+        size = _evaluate_in_env(Expr(node.size), env=_get_env(values, names=referenced))
         if size is None:
             raise FormatMatchError(f"""failed to evaluate: {node.size}""")
         for i in range(size):
             assert node.name not in values
             values[node.name] = {(): i}
-            _match_format_dfs(node.body, tokens, variables=variables, values=values)
+            _match_format_dfs(node.body, tokens, variables=variables, values=values, callback=callback, referenced=referenced, keep=keep)
             del values[node.name]
 
     else:
@@ -140,12 +200,16 @@ def match_format(
     *,
     variables: Dict[VarName, VarDecl],
     values: Optional[Dict[VarName, Dict[Tuple[int, ...], Union[int, float, str]]]] = None,
+    callback: Optional[Callable[[VarName, Tuple[int, ...], Union[int, float, str]], None]] = None,
 ) -> Dict[VarName, Dict[Tuple[int, ...], Union[int, float, str]]]:
     """
     :raises FormatMatchError:
     :param values: is an optional argument to specify pre-defined variables.
+    :param callback: is an optional function which is called for each matched value in order. When this is given, the returned dict contains only the values of variables used in sizes of loops or indices, to keep memory usage small. Exceptions raised in the callback stop the matching.
     """
 
+    metrics.count('match')
+
     # prepare buffer
     if values is None:
         values = {}
@@ -161,7 +225,8 @@ def match_format(
     tokens.reverse()
 
     # match
-    _match_format_dfs(node, tokens, variables=variables, values=values)
+    referenced = _list_referenced_variables(node, variables=variables)
+    _match_format_dfs(node, tokens, variables=variables, values=values, callback=callback, referenced=referenced, keep=(callback is None))
     if tokens:
         raise FormatMatchError(f"""end of tokens is expected, but {repr(tokens[0])} found""")
     return values
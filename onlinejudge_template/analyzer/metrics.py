@@ -0,0 +1,140 @@
+"""
+the module to collect metrics of analyzers
+
+この module は解析器の各段階の実行時間と、関数の呼び出し回数などのカウンタを集計します。
+集計は :any:`collect` の内側で行われたものだけが対象で、スレッドごとに独立しています。
+:any:`collect` の外側で :any:`count` や :any:`timer` を呼んでも何もしません。
+
+たとえば
+::
+
+    with metrics.collect() as collector:
+        with metrics.timer('typing'):
+            ...
+        metrics.count('evaluate')
+    collector.get_metrics()
+
+とすると
+::
+
+    AnalyzerMetrics(timers={'typing': 0.012}, counters={'evaluate': 1})
+
+に相当する結果を返します。
+
+:py:mod:`tracemalloc` が有効な場合 (Python 3.9 以降のみ) は、各 :any:`timer` の区間でのメモリ使用量のピークも ``peak_memory:<name>`` という名前のカウンタとしてバイト単位で記録します。
+これは区間の開始時点からの増加量です。
+"""
+
+import contextlib
+import threading
+import time
+import tracemalloc
+from typing import *
+
+from onlinejudge_template.types import *
+
+_local = threading.local()
+
+
+class MetricsCollector:
+    def __init__(self) -> None:
+        self.timers: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self._memory_frames: List[List[int]] = []  # pairs of the memory usage at the beginning and the peak seen so far, for nested timers
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def maximize(self, name: str, value: int) -> None:
+        self.counters[name] = max(self.counters.get(name, value), value)
+
+    def begin_memory(self) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        if self._memory_frames:
+            self._memory_frames[-1][1] = max(self._memory_frames[-1][1], peak)  # because the peak is reset for the inner frame
+        tracemalloc.reset_peak()  # type: ignore
+        self._memory_frames.append([current, current])
+
+    def end_memory(self) -> int:
+        """end_memory returns the peak of the memory usage since the corresponding :any:`begin_memory`, relative to the usage at that time.
+        """
+
+        _, peak = tracemalloc.get_traced_memory()
+        begin, seen = self._memory_frames.pop()
+        peak = max(peak, seen)
+        if self._memory_frames:
+            self._memory_frames[-1][1] = max(self._memory_frames[-1][1], peak)
+        return peak - begin
+
+    def get_metrics(self) -> AnalyzerMetrics:
+        return AnalyzerMetrics(timers=dict(self.timers), counters=dict(self.counters))
+
+
+def _get_collector() -> Optional[MetricsCollector]:
+    return getattr(_local, 'collector', None)
+
+
+@contextlib.contextmanager
+def collect() -> Iterator[MetricsCollector]:
+    """collect starts collecting metrics in the current thread. This can be nested, and the inner one hides the outer one.
+    """
+
+    collector = MetricsCollector()
+    previous = _get_collector()
+    _local.collector = collector
+    try:
+        yield collector
+    finally:
+        _local.collector = previous
+
+
+def count(name: str, n: int = 1) -> None:
+    collector = _get_collector()
+    if collector is not None:
+        collector.count(name, n)
+
+
+def maximize(name: str, value: int) -> None:
+    """maximize records the maximum of the values given with the name, e.g. the size of a queue.
+    """
+
+    collector = _get_collector()
+    if collector is not None:
+        collector.maximize(name, value)
+
+
+@contextlib.contextmanager
+def timer(name: str) -> Iterator[None]:
+    """timer adds the wall-time of the block to the timer with the name. Timers with the same name are accumulated.
+    """
+
+    collector = _get_collector()
+    if collector is None:
+        yield
+        return
+    trace_memory = tracemalloc.is_tracing() and hasattr(tracemalloc, 'reset_peak')
+    if trace_memory:
+        collector.begin_memory()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        collector.add_time(name, time.perf_counter() - start)
+        if trace_memory:
+            collector.maximize('peak_memory:' + name, collector.end_memory())
+
+
+def format_metrics(metrics: AnalyzerMetrics) -> str:
+    """format_metrics makes a compact one-line summary like ``total=0.123s typing=0.012s evaluate=42``.
+    """
+
+    items: List[str] = []
+    timers = sorted(metrics.timers.items(), key=lambda item: item[0] != 'total')  # put the total first
+    for name, seconds in timers:
+        items.append(f"""{name}={seconds:.3f}s""")
+    for name, value in sorted(metrics.counters.items()):
+        items.append(f"""{name}={value}""")
+    return ' '.join(items)
@@ -92,6 +92,7 @@ import string
 from logging import getLogger
 from typing import *
 
+import onlinejudge_template.analyzer.metrics as metrics
 import onlinejudge_template.analyzer.node_util as node_util
 from onlinejudge_template.analyzer.match import FormatMatchError, match_format
 from onlinejudge_template.types import *
@@ -328,6 +329,9 @@ class _PriorityQueue:
     def empty(self) -> bool:
         return not self._heap
 
+    def __len__(self) -> int:
+        return len(self._heap)
+
 
 def tokenize_content(content: str) -> Iterator[_Token]:
     # The int tokens are tokens which can be used as loop sizes. Only small integers satisfy this condition.
@@ -393,12 +397,16 @@ def list_next_possible_node(states: List[_MatchState]) -> Iterator[_Node]:
     return
 
 
-def _construct_minimum_input_format_internal_tree(*, instances: List[List[_Token]], initial_env: Optional[List[List[int]]] = None, iteration_limit: int = 10000, size_limit: int = 20, initial_node: _Node = _PlaceholderNode()) -> Optional[_Node]:
+def _construct_minimum_input_format_internal_tree(*, instances: List[List[_Token]], initial_env: Optional[List[List[int]]] = None, iteration_limit: int = 10000, size_limit: int = 20, initial_node: Optional[_Node] = None) -> Optional[_Node]:
     # init
+    if initial_node is None:
+        initial_node = _PlaceholderNode()
     que = _PriorityQueue()
     que.push(get_tree_size(initial_node), initial_node)
     while not que.empty():
         # pop
+        metrics.count('minimum_tree_iterations')
+        metrics.maximize('minimum_tree_queue_size', len(que))
         cur = que.pop()
 
         # calc
@@ -437,6 +445,67 @@ def _construct_minimum_input_format_internal_tree(*, instances: List[List[_Token
     return None
 
 
+def _split_test_cases(instances: List[List[_Token]]) -> Optional[List[List[_Token]]]:
+    """_split_test_cases splits each instance which has the number of test cases `t` in the first line into `t` small instances.
+    This assumes that all test cases have the same number of lines.
+
+    :returns: None if splitting is impossible
+    """
+
+    cases: List[List[_Token]] = []
+    lines_per_case: Optional[int] = None
+    for tokens in instances:
+        if len(tokens) < 3 or not isinstance(tokens[0], _IntToken) or not isinstance(tokens[1], _NewlineToken) or not isinstance(tokens[-1], _NewlineToken):
+            return None
+        t = tokens[0].value
+        if t <= 0:
+            return None
+
+        # split into lines
+        lines: List[List[_Token]] = [[]]
+        for token in tokens[2:]:
+            lines[-1].append(token)
+            if isinstance(token, _NewlineToken):
+                lines.append([])
+        lines.pop()
+
+        # split into cases
+        if len(lines) % t != 0:
+            return None
+        k = len(lines) // t
+        if lines_per_case is not None and lines_per_case != k:
+            return None
+        lines_per_case = k
+        for i in range(t):
+            cases.append([token for line in lines[i * k:(i + 1) * k] for token in line])
+    return cases
+
+
+def _construct_minimum_input_format_internal_tree_with_splitting(*, instances: List[List[_Token]]) -> Optional[_Node]:
+    """_construct_minimum_input_format_internal_tree_with_splitting finds the tree for multiple test cases using small instances for each test case.
+    This is much faster than searching with the whole instances, because each candidate is matched against short token lists and wrong candidates are pruned early.
+    The result is verified with the whole instances.
+    """
+
+    cases = _split_test_cases(instances)
+    if cases is None:
+        logger.debug('failed to split the instances into test cases')
+        return None
+    logger.debug('split the instances into %d test cases', len(cases))
+    body = _construct_minimum_input_format_internal_tree(instances=cases)
+    if body is None:
+        return None
+
+    # The indices in the body don't need to be shifted, because the body uses only values which are read in the body.
+    node = _IntNode(next=_NewlineNode(next=_LoopNode(index=0, delta=0, body=body, next=_EOFNode())))
+    for instance in instances:
+        state = run_match(node, _MatchState(tokens=instance, offset=0, env=[]))
+        if state is None or state.offset != len(state.tokens):
+            logger.debug('the tree found with splitting does not match the whole instance: %s', node)
+            return None
+    return node
+
+
 class EnvItem(NamedTuple):
     name: VarName
     is_counter: bool
@@ -505,11 +574,14 @@ def _convert_to_format_node(node: _Node, *, env: List[EnvItem], used: Set[VarNam
 
 def construct_minimum_input_format_tree(*, instances: List[str], multiple_test_cases: bool = False) -> Optional[FormatNode]:
     tokenized_instances = [list(tokenize_content(instance)) for instance in instances]
+    node: Optional[_Node] = None
     if multiple_test_cases:
+        node = _construct_minimum_input_format_internal_tree_with_splitting(instances=tokenized_instances)
         initial_node: _Node = _IntNode(next=_NewlineNode(next=_LoopNode(index=0, delta=0, body=_PlaceholderNode(), next=_EOFNode())))
     else:
         initial_node = _PlaceholderNode()
-    node = _construct_minimum_input_format_internal_tree(instances=tokenized_instances, initial_node=initial_node)
+    if node is None:
+        node = _construct_minimum_input_format_internal_tree(instances=tokenized_instances, initial_node=initial_node)
     if node is None:
         return None
     format_node = _convert_to_format_node(node, env=[], used=set(), fixed_names=(multiple_test_cases and [node_util.testcases_varname] or []))
@@ -38,6 +38,7 @@ import ply.yacc as yacc
 
 from onlinejudge_template.analyzer.simplify import simplify
 from onlinejudge_template.types import *
+from onlinejudge_template.utils import LazyFormat
 
 logger = getLogger(__name__)
 
@@ -182,11 +183,21 @@ def build_parser(*, input: str) -> yacc.LRParser:
             'column': find_column(p.lexpos(1)),
         }
 
+    # The rules `main` and `items` are right-recursive, so they collect their items in the reversed order to avoid quadratic list concatenations.
+    # The lists are reversed once in `start` and `line`.
+
+    def p_start(p: yacc.YaccProduction) -> None:
+        """start : main"""
+        p[1].items.reverse()
+        p[0] = p[1]
+
     def p_main(p: yacc.YaccProduction) -> None:
         """main : lines main
                 | lines"""
         if len(p) == 3:
-            p[0] = SequenceParserNode(items=[p[1]] + p[2].items, **loc(p))
+            p[0] = p[2]
+            p[0].items.append(p[1])
+            p[0].line, p[0].column = p[1].line, p[1].column
         elif len(p) == 2:
             p[0] = SequenceParserNode(items=[p[1]], **loc(p))
 
@@ -205,7 +216,10 @@ def build_parser(*, input: str) -> yacc.LRParser:
 
     def p_line(p: yacc.YaccProduction) -> None:
         """line : items newline"""
-        p[0] = SequenceParserNode(items=p[1].items + [p[2]], **loc(p))
+        items = p[1].items
+        items.reverse()
+        items.append(p[2])
+        p[0] = SequenceParserNode(items=items, **loc(p))
 
     def p_items(p: yacc.YaccProduction) -> None:
         """items : item DOTS item items
@@ -214,12 +228,16 @@ def build_parser(*, input: str) -> yacc.LRParser:
                  | item"""
         if len(p) == 5:
             dots = DotsParserNode(first=p[1], last=p[3], **loc(p))
-            p[0] = SequenceParserNode(items=[dots] + p[4].items, **loc(p))
-        if len(p) == 4:
+            p[0] = p[4]
+            p[0].items.append(dots)
+            p[0].line, p[0].column = dots.line, dots.column
+        elif len(p) == 4:
             dots = DotsParserNode(first=p[1], last=p[3], **loc(p))
             p[0] = SequenceParserNode(items=[dots], **loc(p))
         elif len(p) == 3:
-            p[0] = SequenceParserNode(items=[p[1]] + p[2].items, **loc(p))
+            p[0] = p[2]
+            p[0].items.append(p[1])
+            p[0].line, p[0].column = p[1].line, p[1].column
         elif len(p) == 2:
             p[0] = SequenceParserNode(items=[p[1]], **loc(p))
 
@@ -267,8 +285,11 @@ def build_parser(*, input: str) -> yacc.LRParser:
                  | DIV"""
         p[0] = p[1]
 
-    def p_error(t: lex.LexToken) -> None:
-        raise FormatStringParserError("parser: unexpected token: {} \"{}\" at line {} column {}".format(t.type, t.value, t.lineno, find_column(t.lexpos)))
+    def p_error(t: Optional[lex.LexToken]) -> None:
+        if t is None:
+            raise FormatStringParserError("parser: unexpected end of input")
+        else:
+            raise FormatStringParserError("parser: unexpected token: {} \"{}\" at line {} column {}".format(t.type, t.value, t.lineno, find_column(t.lexpos)))
 
     return yacc.yacc(debug=False, write_tables=False)
 
@@ -391,25 +412,26 @@ def analyze_parsed_node(node: ParserNode) -> FormatNode:
 
     elif isinstance(node, SequenceParserNode):
         items: List[FormatNode] = []
-        que: List[FormatNode] = list(map(analyze_parsed_node, node.items))
-        while que:
-            item, *que = que
+        stack: List[FormatNode] = list(map(analyze_parsed_node, node.items))
+        stack.reverse()  # use as a queue whose head is the last element, to pop and push items in O(1)
+        while stack:
+            item = stack.pop()
             if isinstance(item, SequenceNode):
                 # flatten SequenceNode in SequenceNode
-                que = item.items + que
+                stack.extend(reversed(item.items))
             elif isinstance(item, LoopNode) and items:
                 # merge FormatNode with LoopNode if possible
                 if isinstance(item.body, SequenceNode) and len(items) >= len(item.body.items):
-                    items_init = items[:-len(item.body.items)]
-                    items_tail: FormatNode = SequenceNode(items=items[-len(item.body.items):])
+                    tail_length = len(item.body.items)
+                    items_tail: FormatNode = SequenceNode(items=items[-tail_length:])
                 else:
-                    items_init = items[:-1]
+                    tail_length = 1
                     items_tail = items[-1]
                 extended_body = extend_loop_node(items_tail, item.body, loop=item)
                 if extended_body is not None:
                     extended_loop: FormatNode = LoopNode(size=simplify(Expr(f"""{item.size} + 1""")), name=item.name, body=extended_body)
-                    items = items_init
-                    que = [extended_loop] + que
+                    del items[-tail_length:]
+                    stack.append(extended_loop)
                 else:
                     items.append(item)
             else:
@@ -449,7 +471,7 @@ def run(pre: str) -> FormatNode:
     # list tokens with lex
     lexer = build_lexer()
     lexer.input(pre)
-    logger.debug('Lex tokens: %s', list(lexer.clone()))
+    logger.debug('Lex tokens: %s', LazyFormat(lambda: list(lexer.clone())))
 
     # make a tree with yacc
     parser = build_parser(input=pre)
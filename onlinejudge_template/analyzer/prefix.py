@@ -0,0 +1,183 @@
+"""
+the module to make small prefixes of very large sample strings
+
+この module は巨大なサンプル文字列 (たとえば Library Checker のもの) から、構造を保った小さなサンプル文字列を作ります。
+フォーマット木の推測は小さなサンプル文字列に対して行い、得られたフォーマット木が元のサンプル文字列にマッチするかを線形時間で確認することが想定されています。
+
+たとえば
+::
+
+    200000 3
+    1 2 3 ... 200000
+
+というサンプル文字列 (制限が 100 行 100 要素の場合) から
+::
+
+    100 3
+    1 2 3 ... 100
+
+というサンプル文字列を作ります。
+1 行目に含まれる整数であって、その後の行数や、ある行の要素数と一致するものを、ループの回数とみなして書き換えています。
+"""
+
+import io
+import itertools
+import re
+from logging import getLogger
+from typing import *
+
+import onlinejudge_template.analyzer.variables
+from onlinejudge_template.analyzer.match import FormatMatchError, match_format
+from onlinejudge_template.types import *
+
+logger = getLogger(__name__)
+
+
+def _is_int_token(token: str) -> bool:
+    return token.isdigit() and (token == '0' or not token.startswith('0'))
+
+
+_TOKEN_PATTERN = re.compile(r'\S+')
+_LONG_LINE = 65536  # lines longer than this are not split at once, to keep memory usage small
+
+
+def _iterate_lines(data: str) -> Iterator[str]:
+    return iter(io.StringIO(data))
+
+
+def _count_tokens(line: str) -> int:
+    if len(line) <= _LONG_LINE:
+        return len(line.split())
+    return sum(1 for _ in _TOKEN_PATTERN.finditer(line))
+
+
+def _take_tokens(line: str, k: int) -> List[str]:
+    if len(line) <= _LONG_LINE:
+        return line.split()[:k]
+    return [match.group() for match in itertools.islice(_TOKEN_PATTERN.finditer(line), k)]
+
+
+def _scan_sample(data: str) -> Optional[Tuple[List[str], List[int]]]:
+    """_scan_sample returns the tokens of the first line and the numbers of tokens of the other lines. Only one line is split at a time.
+    """
+
+    lines = _iterate_lines(data)
+    first = next(lines, None)
+    if first is None:
+        return None
+    return first.split(), [_count_tokens(line) for line in lines]
+
+
+def _truncate_with_count(header: List[str], counts: List[int], data: str, *, position: int, max_lines: int, max_tokens: int) -> Optional[List[List[str]]]:
+    """_truncate_with_count tries to shrink the sample assuming that the `position`-th token of the header is the size of loops.
+
+    :param counts: is the numbers of tokens of lines after the header.
+    """
+
+    n = int(header[position])
+
+    # decide the number of lines for each iteration
+    lines_per_iteration: Optional[int] = None
+    if len(counts) > max_lines:
+        if n == 0 or len(counts) % n != 0:
+            return None
+        lines_per_iteration = len(counts) // n
+
+    # decide the new size
+    k = max_tokens
+    if lines_per_iteration is not None:
+        k = min(k, max_lines // lines_per_iteration)
+    others = {int(token) for i, token in enumerate(header) if i != position and _is_int_token(token)}
+    while k in others:  # avoid confusing the new size with other values
+        k -= 1
+    if k < 2 or n <= k:
+        return None
+
+    # shrink
+    new_header = list(header)
+    new_header[position] = str(k)
+    new_length = len(counts) if lines_per_iteration is None else k * lines_per_iteration
+    result = [new_header]
+    lines = _iterate_lines(data)
+    next(lines)  # skip the header
+    for line, count in zip(lines, counts[:new_length]):
+        if count == n:
+            result.append(_take_tokens(line, k))
+        elif count > max_tokens:
+            return None
+        else:
+            result.append(line.split())
+    return result
+
+
+def _is_small(header: List[str], counts: List[int], *, max_lines: int, max_tokens: int) -> bool:
+    return len(counts) <= max_lines and len(header) <= max_tokens and all(count <= max_tokens for count in counts)
+
+
+def truncate_sample(data: str, *, max_lines: int, max_tokens: int) -> Optional[str]:
+    """truncate_sample makes a small sample string which seems to have the same structure to the given one.
+    This reads the sample line by line, so the memory usage is small even if the sample is very large.
+
+    :param max_lines: is the maximum number of lines after the first line.
+    :param max_tokens: is the maximum number of tokens in a line.
+    :returns: None if the given sample is small enough or it failed to shrink the sample.
+    """
+
+    scanned = _scan_sample(data)
+    if scanned is None:
+        return None
+    header, counts = scanned
+    if _is_small(header, counts, max_lines=max_lines, max_tokens=max_tokens):
+        return None
+    if len(header) > max_tokens:
+        return None
+
+    # use the largest value first, because the sizes of loops are usually the largest values in the header
+    positions = sorted([i for i, token in enumerate(header) if _is_int_token(token)], key=lambda i: -int(header[i]))
+    for position in positions:
+        truncated = _truncate_with_count(header, counts, data, position=position, max_lines=max_lines, max_tokens=max_tokens)
+        if truncated is not None:
+            logger.debug('truncated a sample with %d lines to %d lines, assuming %s is the size', len(counts) + 1, len(truncated), header[position])
+            return ''.join(' '.join(line) + '\n' for line in truncated)
+    return None
+
+
+def truncate_samples(instances: List[str], *, max_lines: int, max_tokens: int) -> Optional[List[str]]:
+    """truncate_samples applies :any:`truncate_sample` to each sample.
+
+    :returns: None if no samples are truncated or some large samples cannot be truncated.
+    """
+
+    truncated: List[str] = []
+    is_truncated = False
+    for data in instances:
+        small = truncate_sample(data, max_lines=max_lines, max_tokens=max_tokens)
+        if small is None:
+            scanned = _scan_sample(data)
+            if scanned is not None and not _is_small(*scanned, max_lines=max_lines, max_tokens=max_tokens):
+                return None  # a large sample which cannot be truncated
+            truncated.append(data)
+        else:
+            truncated.append(small)
+            is_truncated = True
+    if not is_truncated:
+        return None
+    return truncated
+
+
+def is_matched(node: FormatNode, *, instances: List[str]) -> bool:
+    """is_matched checks whether the given format tree matches with all the samples. This takes linear time, because matched values are not stored unless they are used as sizes of loops.
+    """
+
+    try:
+        variables = onlinejudge_template.analyzer.variables.list_declared_variables(node)
+    except onlinejudge_template.analyzer.variables.DeclaredVariablesError as e:
+        logger.debug('failed to list variables: %s', e)
+        return False
+    try:
+        for data in instances:
+            match_format(node, data, variables=variables, callback=lambda name, index, value: None)
+    except FormatMatchError as e:
+        logger.debug('failed to match: %s', e)
+        return False
+    return True
@@ -15,13 +15,16 @@ the module to manipulate mathematical expressions (e.g. ``2 * n + 1``, ``a_i + i
 
 import abc
 import fractions
+import functools
 import re
+import threading
 from logging import getLogger
 from typing import *
 
 import ply.lex as lex
 import ply.yacc as yacc
 
+import onlinejudge_template.analyzer.metrics as metrics
 from onlinejudge_template.types import *
 
 logger = getLogger(__name__)
@@ -117,18 +120,13 @@ def _build_lexer() -> lex.Lexer:
     return lex.lex()
 
 
-def _build_parser(*, input: str) -> yacc.LRParser:
-    tokens = _tokens
+def _find_column(input: str, lexpos: int) -> int:
+    line_start = input.rfind('\n', 0, lexpos) + 1
+    return lexpos - line_start + 1
 
-    def find_column(lexpos: int) -> int:
-        line_start = input.rfind('\n', 0, lexpos) + 1
-        return lexpos - line_start + 1
 
-    def loc(p: yacc.YaccProduction) -> Dict[str, int]:
-        return {
-            'line': p.lineno(1),
-            'column': find_column(p.lexpos(1)),
-        }
+def _build_parser() -> yacc.LRParser:
+    tokens = _tokens
 
     def p_expr(p: yacc.YaccProduction) -> None:
         """expr : expr ADD term
@@ -198,23 +196,38 @@ def _build_parser(*, input: str) -> yacc.LRParser:
         if t is None:
             raise ExprParserError("parser: something wrong")
         else:
-            raise ExprParserError("parser: unexpected token: {} \"{}\" at line {} column {}".format(t.type, t.value, t.lineno, find_column(t.lexpos)))
+            raise ExprParserError("parser: unexpected token: {} \"{}\" at line {} column {}".format(t.type, t.value, t.lineno, _find_column(t.lexer.lexdata, t.lexpos)))
 
     return yacc.yacc(debug=False, write_tables=False)
 
 
-def _parse(s: str) -> _Expr:
+_local = threading.local()
+
+
+def _get_lexer_and_parser() -> Tuple[lex.Lexer, yacc.LRParser]:
+    """_get_lexer_and_parser returns the lexer and the parser for the current thread. They are built only once for each thread because building them is slow, and they are not shared among threads because they have states during parsing.
     """
+
+    if not hasattr(_local, 'parser'):
+        _local.lexer = _build_lexer()
+        _local.parser = _build_parser()
+    return _local.lexer, _local.parser
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse(s: str) -> _Expr:
+    """_parse parses the given string. The results are cached because the same strings are parsed many times, so the returned exprs are shared and must not be modified.
+
     :raises ExprParserError:
     """
 
     try:
-        lexer = _build_lexer()
+        lexer, parser = _get_lexer_and_parser()
+        lexer.lineno = 1
         lexer.input(s)
-        parser = _build_parser(input=s)
         return parser.parse(lexer=lexer)
     except ExprParserError as e:
-        logger.debug('failed to parse {}: {}'.format(repr(s), e))
+        logger.debug('failed to parse %r: %s', s, e)
         raise
 
 
@@ -273,20 +286,24 @@ def _get_subscripted_value(value: Union[int, List[int], List[List[int]], List[Li
     return result
 
 
-def evaluate(s: Expr, *, env: Mapping[VarName, Union[int, List[int], List[List[int]], List[List[List[int]]]]] = {}) -> Optional[int]:
+def evaluate(s: Expr, *, env: Optional[Mapping[VarName, Union[int, List[int], List[List[int]], List[List[List[int]]]]]] = None) -> Optional[int]:
     """evaluate converts the given expr to an integer.
     """
-    def go(e: _Expr) -> fractions.Fraction:
+
+    metrics.count('evaluate')
+    defined: Mapping[VarName, Union[int, List[int], List[List[int]], List[List[List[int]]]]] = env if env is not None else {}
+
+    def go(e: _Expr) -> Union[int, fractions.Fraction]:
         if isinstance(e, _Variable):
-            if e.name not in env:
+            if e.name not in defined:
                 raise ExprParserError('{} is not defined'.format(e.name))
-            args: List[fractions.Fraction] = list(map(go, e.args))
+            args: List[Union[int, fractions.Fraction]] = list(map(go, e.args))
             indices: List[int] = []
             for arg in args:
                 if arg.denominator != 1:
                     raise ExprParserError('indices must be an integer, not fraction: {}[{}]'.format(e.name, ', '.join(map(str, args))))
                 indices.append(arg.numerator)
-            return fractions.Fraction(_get_subscripted_value(env[VarName(e.name)], indices, name_for_error_message=e.name))
+            return _get_subscripted_value(defined[VarName(e.name)], indices, name_for_error_message=e.name)
         elif isinstance(e, _Function):
             args = list(map(go, e.args))
             if e.value == _Function.ADD and len(e.args) == 2:
@@ -296,28 +313,28 @@ def evaluate(s: Expr, *, env: Mapping[VarName, Union[int, List[int], List[List[i
             elif e.value == _Function.MUL and len(e.args) == 2:
                 return args[0] * args[1]
             elif e.value == _Function.DIV and len(e.args) == 2:
-                return args[0] / args[1]
+                return fractions.Fraction(args[0]) / args[1]  # use fractions only for division, because they are slow
             elif e.value == _Function.NEG and len(e.args) == 1:
                 return -args[0]
             else:
                 assert False
         elif isinstance(e, _Constant):
-            return fractions.Fraction(e.value)
+            return e.value
         else:
             assert False
 
     try:
         expr = _parse(s)
     except ExprParserError as e:
-        logger.debug('failed to parse {}: {}'.format(repr(s), e))
+        logger.debug('failed to parse %r: %s', s, e)
         return None
     try:
         evaluated = go(expr)
     except ExprParserError as e:
-        logger.debug('failed to evaluate {} in {}: {}'.format(repr(s), env, e))
+        logger.debug('failed to evaluate %r in %s: %s', s, env, e)
         return None
     if evaluated.denominator != 1:
-        logger.debug('failed to evaluate {} in {}: {} is not an integer'.format(repr(s), env, evaluated))
+        logger.debug('failed to evaluate %r in %s: %s is not an integer', s, env, evaluated)
         return None
     return evaluated.numerator
 
@@ -461,15 +478,16 @@ def simplify(s: Expr) -> Expr:
     """simplify converts the given expr to a simple expr.
     """
 
+    metrics.count('simplify')
     try:
         expr = _parse(s)
     except ExprParserError as e:
-        logger.debug('failed to parse %s: %s', repr(s), e)
+        logger.debug('failed to parse %r: %s', s, e)
         return s
     try:
         simplified = _simplify_expr(expr)
     except ExprParserError as e:
-        logger.debug('failed to simplify %s: %s', repr(s), e)
+        logger.debug('failed to simplify %r: %s', s, e)
         return s
     return Expr(_format(simplified))
 
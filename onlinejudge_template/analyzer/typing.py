@@ -78,22 +78,44 @@ def unify_types(t1: VarType, t2: VarType) -> VarType:
     assert False
 
 
-def get_var_types_from_match_result(values: Dict[VarName, Dict[Tuple[int, ...], Union[int, float, str]]], *, variables: Dict[VarName, VarDecl]) -> Dict[VarName, VarType]:
+class _TypingState:
+    """_TypingState keeps the current types and ranges of variables, and updates them in place for each matched value.
+
+    Types form a small lattice whose top is :any:`VarType.String`. When all variables reach the top, no more values can change the types.
+    """
+    def __init__(self, *, variables: Dict[VarName, VarDecl]):
+        self.types: Dict[VarName, VarType] = {}
+        self.ranges: Dict[VarName, Tuple[int, int]] = {}
+        self._unsaturated: Set[VarName] = set(variables.keys())
+
+    def update(self, name: VarName, value: Union[int, float, str]) -> None:
+        t = get_var_type(value)
+        if name in self.types:
+            t = unify_types(self.types[name], t)
+        self.types[name] = t
+        if t == VarType.String:
+            self.ranges.pop(name, None)
+            self._unsaturated.discard(name)
+        elif isinstance(value, int):
+            if name in self.ranges:
+                l, r = self.ranges[name]
+                self.ranges[name] = (min(l, value), max(r, value))
+            else:
+                self.ranges[name] = (value, value)
+
+    def is_saturated(self) -> bool:
+        return not self._unsaturated
+
+
+def _finalize_var_types(types: Dict[VarName, VarType], *, variables: Dict[VarName, VarDecl]) -> Dict[VarName, VarType]:
     """
     :raises TypingError:
     """
 
-    types: Dict[VarName, VarType] = {}
+    types = dict(types)
     for name in variables.keys():
-        ts = set(map(get_var_type, values[name].values()))
-        while len(ts) >= 2:
-            t1 = ts.pop()
-            t2 = ts.pop()
-            t3 = unify_types(t1, t2)
-            ts.add(t3)
-        if not ts:
+        if name not in types:
             raise TypingError(f"""failed to infer type: {name} has no candidate types""")
-        types[name] = ts.pop()
     for decl in variables.values():
         for name in decl.depending:
             if types[name] not in (VarType.IndexInt, VarType.ValueInt):
@@ -106,6 +128,18 @@ def get_var_types_from_match_result(values: Dict[VarName, Dict[Tuple[int, ...],
     return types
 
 
+def get_var_types_from_match_result(values: Dict[VarName, Dict[Tuple[int, ...], Union[int, float, str]]], *, variables: Dict[VarName, VarDecl]) -> Dict[VarName, VarType]:
+    """
+    :raises TypingError:
+    """
+
+    state = _TypingState(variables=variables)
+    for name in variables.keys():
+        for value in values[name].values():
+            state.update(name, value)
+    return _finalize_var_types(state.types, variables=variables)
+
+
 def unify_var_types(t1: Dict[VarName, VarType], t2: Dict[VarName, VarType]) -> Dict[VarName, VarType]:
     assert set(t1.keys()) == set(t2.keys())
     t3: Dict[VarName, VarType] = {}
@@ -115,24 +149,47 @@ def unify_var_types(t1: Dict[VarName, VarType], t2: Dict[VarName, VarType]) -> D
     return t3
 
 
-def infer_types_from_instances(node: FormatNode, *, variables: Dict[VarName, VarDecl], instances: List[str]) -> Dict[VarName, VarType]:
-    """
+def infer_types_and_ranges_from_instances(node: FormatNode, *, variables: Dict[VarName, VarDecl], instances: List[str]) -> Tuple[Dict[VarName, VarType], Dict[VarName, Tuple[int, int]]]:
+    """infer_types_and_ranges_from_instances infers types of variables and also records the minimum and maximum values of integer variables in the given instances.
+
+    Matched values are consumed one by one and are not stored, except for the values used as sizes of loops.
+    When all variables become strings, the types are not updated any more, but the rest of instances are still matched with the format.
+
     :raises FormatMatchError:
     :raises TypingError:
     """
 
     assert instances
-    types: Optional[Dict[VarName, VarType]] = None
+    state = _TypingState(variables=variables)
+
+    def callback(name: VarName, index: Tuple[int, ...], value: Union[int, float, str]) -> None:
+        if not state.is_saturated():
+            state.update(name, value)
+
+    def ignore(name: VarName, index: Tuple[int, ...], value: Union[int, float, str]) -> None:
+        pass
+
     for i, data in enumerate(instances):
-        values = match_format(node, data, variables=variables)
-        logger.debug("match result for %d-th data: %s", i, values)
-        types2 = get_var_types_from_match_result(values, variables=variables)
-        if types is None:
-            types = types2
+        if state.is_saturated():
+            match_format(node, data, variables=variables, callback=ignore)  # only check that the format matches
         else:
-            types = unify_var_types(types, types2)
-    assert types is not None
+            match_format(node, data, variables=variables, callback=callback)
+            if state.is_saturated():
+                logger.debug("all variables are saturated at %d-th data", i)
+    types = _finalize_var_types(state.types, variables=variables)
+    ranges = {name: r for name, r in state.ranges.items() if types[name] in (VarType.IndexInt, VarType.ValueInt)}
     logger.debug("infered types: %s", types)
+    logger.debug("observed ranges: %s", ranges)
+    return types, ranges
+
+
+def infer_types_from_instances(node: FormatNode, *, variables: Dict[VarName, VarDecl], instances: List[str]) -> Dict[VarName, VarType]:
+    """
+    :raises FormatMatchError:
+    :raises TypingError:
+    """
+
+    types, _ = infer_types_and_ranges_from_instances(node, variables=variables, instances=instances)
     return types
 
 
@@ -154,5 +211,20 @@ def update_variables_with_types(*, variables: Dict[VarName, VarDecl], types: Dic
             dims=decl.dims,
             bases=decl.bases,
             depending=decl.depending,
+            observed_range=decl.observed_range,
+            lower_bound=decl.lower_bound,
+            upper_bound=decl.upper_bound,
         )
     return updated
+
+
+def update_variables_with_ranges(*, variables: Dict[VarName, VarDecl], ranges: Dict[VarName, Tuple[int, int]]) -> Dict[VarName, VarDecl]:
+    """update_variables_with_ranges sets observed ranges to integer variables. Variables with other types are not updated.
+    """
+
+    updated: Dict[VarName, VarDecl] = {}
+    for name, decl in variables.items():
+        if decl.type in (VarType.IndexInt, VarType.ValueInt) and name in ranges:
+            decl = decl._replace(observed_range=ranges[name])
+        updated[name] = decl
+    return updated
@@ -0,0 +1,88 @@
+"""
+the module of files of caches on disk
+
+この module は :py:mod:`onlinejudge_template.analyzer.cache` と :py:mod:`onlinejudge_template.http_cache` が共有する、pickle ファイルによるキャッシュの読み書きを提供します。
+書き込みは一時ファイルからの置き換えで行うので、複数のプロセスが同時に読み書きしても壊れたファイルは見えません。
+キャッシュの合計サイズが上限を超えると、最も古くに使われた (更新時刻が古い) ものから削除されます。
+"""
+
+import os
+import pathlib
+import pickle
+import tempfile
+from logging import getLogger
+from typing import *
+
+logger = getLogger(__name__)
+
+
+def remove(path: pathlib.Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass  # removed by another process
+
+
+def load(path: pathlib.Path) -> Optional[Any]:
+    """load reads a pickled object. Broken files are removed.
+
+    :returns: None if the file doesn't exist or is broken
+    """
+
+    try:
+        with open(path, 'rb') as fh:
+            return pickle.load(fh)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning('failed to load the cache %s: %s', str(path), e)
+        remove(path)
+        return None
+
+
+def touch(path: pathlib.Path) -> None:
+    """touch marks the file as recently used, for LRU eviction.
+    """
+
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def store(obj: Any, path: pathlib.Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            pickle.dump(obj, fh)
+        os.replace(tmp, str(path))  # replace atomically for concurrent writers
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    logger.debug('write the cache: %s', str(path))
+
+
+def evict(cache_dir: pathlib.Path, *, max_size: int) -> List[pathlib.Path]:
+    """evict removes least recently used ``*.pickle`` files in the directory until the total size becomes at most `max_size` bytes.
+
+    :returns: the removed files
+    """
+
+    entries: List[Tuple[float, int, pathlib.Path]] = []
+    for path in cache_dir.glob('*.pickle'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue  # removed by another process
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    removed: List[pathlib.Path] = []
+    for _, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        logger.debug('remove the cache: %s', str(path))
+        remove(path)
+        removed.append(path)
+        total -= size
+    return removed
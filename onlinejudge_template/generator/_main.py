@@ -1,3 +1,4 @@
+import hashlib
 import pathlib
 from logging import getLogger
 from typing import *
@@ -8,12 +9,13 @@ import mako.template
 import pkg_resources
 
 import onlinejudge_template.generator.hook as hook
+import onlinejudge_template.tracing as tracing
 from onlinejudge_template.types import *
 
 logger = getLogger(__name__)
 
 
-def _get_template(template_file: str) -> mako.template.Template:
+def _lookup_template(template_file: str) -> mako.template.Template:
     directories = [
         str(pathlib.Path(appdirs.user_config_dir('online-judge-tools')) / 'template'),
         pkg_resources.resource_filename('onlinejudge_template_resources', 'template'),
@@ -24,11 +26,25 @@ def _get_template(template_file: str) -> mako.template.Template:
     if has_slash and path.exists():
         with open(path, "rb") as fh:
             lookup.put_string(template_file, fh.read())
-    template = lookup.get_template(template_file)
+    return lookup.get_template(template_file)
+
+
+def _get_template(template_file: str) -> mako.template.Template:
+    template = _lookup_template(template_file)
     logger.info('use template file: %s', template.filename)
     return template
 
 
+def get_template_hash(template_file: str) -> str:
+    """get_template_hash returns the hash of the source of the template, to detect updates of the template. Templates which are included from the template are not considered.
+
+    :raises: mako.exceptions.MakoException
+    """
+
+    template = _lookup_template(template_file)
+    return hashlib.sha256(template.source.encode()).hexdigest()
+
+
 def run(analyzed: AnalyzerResult, *, template_file: str) -> bytes:
     """
     :raises: mako.exceptions.MakoException
@@ -39,7 +55,8 @@ def run(analyzed: AnalyzerResult, *, template_file: str) -> bytes:
         'config': {},
     }
     hook._prepare_hook(data=data)
-    template = _get_template(template_file)
-    rendered = template.render(data=data)
+    with tracing.span('render', template=template_file):
+        template = _get_template(template_file)
+        rendered = template.render(data=data)
     rendered = hook._execute_hook(rendered, data=data)
     return rendered
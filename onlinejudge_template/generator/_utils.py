@@ -1,5 +1,6 @@
 from typing import *
 
+from onlinejudge_template.analyzer.simplify import evaluate
 from onlinejudge_template.types import *
 
 
@@ -11,6 +12,19 @@ def get_indent(data: Dict[str, Any]) -> str:
     return data['config'].get('indent', ' ' * 4)
 
 
+def get_constant_bounds(decl: Optional[VarDecl]) -> Tuple[Optional[int], Optional[int]]:
+    """get_constant_bounds returns the bounds of the variable given in constraints, if they are constant integers.
+    """
+
+    if decl is None:
+        return None, None
+    l = evaluate(decl.lower_bound) if decl.lower_bound is not None else None
+    r = evaluate(decl.upper_bound) if decl.upper_bound is not None else None
+    if l is not None and r is not None and l > r:
+        return None, None
+    return l, r
+
+
 # TODO: refactoring
 def _filter_ignored_variables(decls: Dict[VarName, VarDecl], *, data: Dict[str, Any]) -> Dict[VarName, VarDecl]:
     if get_analyzed(data).topcoder_class_definition is None:
@@ -152,14 +152,92 @@ def _generate_variable(expr: Tuple[str, Optional[VarType]], *, data: Dict[str, A
     else:
         raise CPlusPlusGeneratorError(f"""cannot generate a variable of type {type}: {repr(name)}""")
 
-    yield f"""{name} = std::uniform_int_distribution<{_get_base_type(type, data=data)}>({l}, {r - 1})(gen);"""
+    # use the constraints if exist
+    decl = _find_decl(name, data=data)
+    lower, upper = utils.get_constant_bounds(decl)
+    if lower is not None:
+        l = lower
+        r = max(r, l + 1)
+    if upper is not None:
+        r = upper + 1
+        l = min(l, r - 1)
 
+    yield f"""{name} = std::uniform_int_distribution<{_get_base_type(type, data=data, decl=decl)}>({l}, {r - 1})(gen);"""
 
-def _get_base_type(type: Optional[VarType], *, data: Dict[str, Any]) -> str:
+
+def _find_decl(expr: str, *, data: Dict[str, Any]) -> Optional[VarDecl]:
+    """_find_decl finds the declaration of the variable which is used in the given expr like `a[i][j]`.
+
+    :returns: None if the declaration is not found or not unique
+    """
+
+    name = VarName(expr.split('[', 1)[0])
+    analyzed = utils.get_analyzed(data)
+    found = []
+    for variables in (analyzed.input_variables, analyzed.output_variables):
+        if variables is not None and name in variables:
+            found.append(variables[name])
+    if len(found) != 1:
+        return None
+    return found[0]
+
+
+_INT32_MIN = -2**31
+_INT32_MAX = 2**31 - 1
+_INT64_MIN = -2**63
+_INT64_MAX = 2**63 - 1
+_UINT64_MAX = 2**64 - 1
+
+
+def _get_value_int_width(decl: Optional[VarDecl], *, data: Dict[str, Any]) -> str:
+    """_get_value_int_width chooses the width of the integer type for a variable of VarType.ValueInt.
+
+    Bounds in constraints are used first.
+    Values in sample cases only give lower bounds of ranges, so they are used to make types wider. They are used to make types narrower only if `data["config"]["narrow_int_from_samples"]` is set.
+    Only elements of arrays are narrowed to 32 bits, to save memory. Scalars are kept in 64 bits even if they fit in 32 bits, because they are often summed or multiplied (e.g. `N` and `A_i` with N <= 2 * 10^5 and A_i <= 10^9).
+    If the range fits in neither signed nor unsigned 64-bit integers, this warns and uses 64 bits.
+
+    :returns: one of "int32", "int64" and "uint64"
+    """
+
+    if decl is None:
+        return "int64"
+    lower, upper = utils.get_constant_bounds(decl)
+    ranges: List[Tuple[int, int]] = []
+    if lower is not None and upper is not None:
+        ranges.append((lower, upper))
+    if decl.observed_range is not None:
+        ranges.append(decl.observed_range)
+    for l, r in ranges:
+        if 0 <= l and _INT64_MAX < r <= _UINT64_MAX:
+            return "uint64"
+        if l < _INT64_MIN or _INT64_MAX < r:
+            logger.warning('the values of %s do not fit in 64-bit integers: [%d, %d]', decl.name, l, r)
+            return "int64"
+
+    if not decl.dims:
+        return "int64"
+    if lower is not None and upper is not None:
+        if _INT32_MIN <= lower and upper <= _INT32_MAX:
+            return "int32"
+    if decl.observed_range is not None and data['config'].get('narrow_int_from_samples'):
+        l, r = decl.observed_range
+        if _INT32_MIN <= l and r <= _INT32_MAX:
+            return "int32"
+    return "int64"
+
+
+def _get_base_type(type: Optional[VarType], *, data: Dict[str, Any], decl: Optional[VarDecl] = None) -> str:
     if type == VarType.IndexInt:
         return "int"
     elif type == VarType.ValueInt:
-        return data['config'].get('long_long_int', "long long")
+        width = _get_value_int_width(decl, data=data)
+        if width == "int32":
+            return data['config'].get('narrow_int', "int")
+        elif width == "uint64":
+            return data['config'].get('unsigned_long_long_int', "unsigned long long")
+        else:
+            return data['config'].get('long_long_int', "long long")
     elif type == VarType.Float:
         return "double"
     elif type == VarType.String:
@@ -180,7 +258,13 @@ def _get_base_type_format_specifier(type: Optional[VarType], *, name: str, data:
     if type == VarType.IndexInt:
         return "%d"
     elif type == VarType.ValueInt:
-        return "%lld"
+        width = _get_value_int_width(_find_decl(name, data=data), data=data)
+        if width == "int32":
+            return "%d"
+        elif width == "uint64":
+            return "%llu"
+        else:
+            return "%lld"
     elif type == VarType.Float:
         return "%lf"
     elif type == VarType.String:
@@ -194,7 +278,7 @@ def _get_base_type_format_specifier(type: Optional[VarType], *, name: str, data:
 
 
 def _get_type_and_ctor(decl: VarDecl, *, data: Dict[str, Any]) -> Tuple[str, str]:
-    type = _get_base_type(decl.type, data=data)
+    type = _get_base_type(decl.type, data=data, decl=decl)
     ctor = ""
     for dim in reversed(decl.dims):
         sndarg = f""", {type}({ctor})""" if ctor else ''
@@ -527,7 +611,7 @@ def formal_arguments(data: Dict[str, Any]) -> str:
 
     args = []
     for name, decl in decls.items():
-        type = _get_base_type(decl.type, data=data)
+        type = _get_base_type(decl.type, data=data, decl=decl)
         for _ in reversed(decl.dims):
             space = ' ' if type.endswith('>') else ''
             type = f"""std::vector<{type}{space}>"""
@@ -551,13 +635,15 @@ def return_type(data: Dict[str, Any]) -> str:
     analyzed = utils.get_analyzed(data)
     output_type = analyzed.output_type
     if isinstance(output_type, OneOutputType):
-        return _get_base_type(output_type.type, data=data)
+        return _get_base_type(output_type.type, data=data, decl=_find_decl(output_type.name, data=data))
     elif isinstance(output_type, TwoOutputType):
-        return f"""std::pair<{_get_base_type(output_type.type1, data=data)}, {_get_base_type(output_type.type2, data=data)}>"""
+        type1 = _get_base_type(output_type.type1, data=data, decl=_find_decl(output_type.name1, data=data))
+        type2 = _get_base_type(output_type.type2, data=data, decl=_find_decl(output_type.name2, data=data))
+        return f"""std::pair<{type1}, {type2}>"""
     elif isinstance(output_type, YesNoOutputType):
         return "bool"
     elif isinstance(output_type, VectorOutputType):
-        return f"""std::vector<{_get_base_type(output_type.type, data=data)}>"""
+        return f"""std::vector<{_get_base_type(output_type.type, data=data, decl=_find_decl(output_type.name, data=data))}>"""
     elif output_type is None:
         return "auto"
     else:
@@ -5,6 +5,8 @@ import traceback
 from logging import getLogger
 from typing import *
 
+import onlinejudge_template.tracing as tracing
+
 logger = getLogger(__name__)
 
 
@@ -25,7 +27,8 @@ def _execute_hook(rendered: bytes, *, data: Dict[str, Any]) -> bytes:
         return rendered
     logger.info('execute filter command: $ %s', ' '.join(map(shlex.quote, data['hook'])))
     try:
-        return subprocess.check_output(data['hook'], input=rendered, stderr=sys.stderr)
+        with tracing.span('filter', command=' '.join(map(shlex.quote, data['hook']))):
+            return subprocess.check_output(data['hook'], input=rendered, stderr=sys.stderr)
     except Exception as e:
         logger.exception(e)
         return b'\n'.join([
@@ -107,7 +107,20 @@ def _generate_input_dfs(node: FormatNode, *, declared: Set[VarName], initialized
         var = _get_variable(decl=decls[node.name], indices=node.indices)
         type_ = decls[node.name].type
         initialized.add(node.name)
-        if type_ == VarType.IndexInt:
+        lower, upper = utils.get_constant_bounds(decls[node.name])
+        if type_ in (VarType.IndexInt, VarType.ValueInt) and (lower is not None or upper is not None):
+            if type_ == VarType.IndexInt:
+                l, r = 1, 1000
+            else:
+                l, r = 1, 10**9
+            if lower is not None:
+                l = lower
+                r = max(r, l)
+            if upper is not None:
+                r = upper
+                l = min(l, r)
+            return OtherNode(line=f"""{var} = random.randint({l}, {r})  # TODO: edit here""")
+        elif type_ == VarType.IndexInt:
             return OtherNode(line=f"""{var} = random.randint(1, 1000)  # TODO: edit here""")
         elif type_ == VarType.ValueInt:
             return OtherNode(line=f"""{var} = random.randint(1, 10 ** 9)  # TODO: edit here""")
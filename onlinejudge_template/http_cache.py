@@ -0,0 +1,174 @@
+"""
+the module to cache HTTP responses on disk
+
+この module は GET の応答 (ステータスコード 200 のもの) をディスク上にキャッシュする transport adapter :any:`CachingAdapter` を提供します。
+キャッシュのキーは URL です。応答と一緒に要求の cookie のハッシュ値を保存し、cookie が異なる要求 (ログインの前後など) に対してはキャッシュを使わずに取得し直して置き換えます。ログインの前後やコンテストの開始の前後で別の応答が返されうるため、標準ではキャッシュされた応答も毎回 ``ETag`` や ``Last-Modified`` を使った条件付きリクエスト (``If-None-Match``, ``If-Modified-Since``) で再検証します。
+``max_age`` を指定すると、保存されてからその秒数以内の応答はサーバに問い合わせずに返します。
+``Cache-Control: no-store`` の応答は保存せず、``Cache-Control: no-cache`` の応答は常に再検証します。
+ネットワークに接続できない場合は古さに関係なくキャッシュされた応答を返すので、一度取得した問題はオフラインでも扱えます。
+キャッシュの合計サイズが上限を超えると、最も古くに使われたものから削除されます。
+"""
+
+import hashlib
+import io
+import pathlib
+import time
+from logging import getLogger
+from typing import *
+
+import appdirs
+import requests
+import requests.adapters
+import requests.structures
+import requests.utils
+
+import onlinejudge_template.disk_cache as disk_cache
+from onlinejudge_template.http_rate import RateLimitedAdapter
+
+logger = getLogger(__name__)
+
+default_cache_dir = pathlib.Path(appdirs.user_cache_dir('online-judge-tools')) / 'template-generator' / 'http'
+default_max_age = 0  # in seconds; always revalidate
+default_max_size = 64 * 1024 * 1024  # in bytes
+
+_CACHE_FORMAT_VERSION = 2
+
+# headers which are not valid for the decoded body
+_IGNORED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie')
+
+
+class CacheEntry(NamedTuple):
+    version: int
+    url: str
+    cookie_hash: Optional[str]  # the hash of the Cookie header of the request, not to use responses for logged-in users for others, and vice versa
+    stored_at: float  # the UNIX time
+    headers: Dict[str, str]
+    body: bytes
+
+
+def _get_path(url: str, *, cache_dir: pathlib.Path) -> pathlib.Path:
+    return cache_dir / (hashlib.sha256(url.encode()).hexdigest() + '.pickle')
+
+
+def _get_cookie_hash(request: requests.PreparedRequest) -> Optional[str]:
+    cookie = request.headers.get('Cookie')
+    if not cookie:
+        return None
+    return hashlib.sha256(cookie.encode()).hexdigest()
+
+
+def _get_cache_control(headers: Mapping[str, str]) -> Set[str]:
+    value = requests.structures.CaseInsensitiveDict(headers).get('Cache-Control', '')
+    return {directive.split('=')[0].strip().lower() for directive in value.split(',') if directive.strip()}
+
+
+def load(url: str, *, cache_dir: pathlib.Path = default_cache_dir) -> Optional[CacheEntry]:
+    path = _get_path(url, cache_dir=cache_dir)
+    entry = disk_cache.load(path)
+    if entry is None:
+        return None
+    if not isinstance(entry, CacheEntry) or entry.version != _CACHE_FORMAT_VERSION or entry.url != url:
+        logger.warning('broken cache: %s', str(path))
+        disk_cache.remove(path)
+        return None
+    disk_cache.touch(path)  # for LRU eviction
+    return entry
+
+
+def evict(*, cache_dir: pathlib.Path = default_cache_dir, max_size: int = default_max_size) -> None:
+    """evict removes least recently used responses until the total size becomes at most `max_size` bytes.
+    """
+
+    disk_cache.evict(cache_dir, max_size=max_size)
+
+
+def store(entry: CacheEntry, *, cache_dir: pathlib.Path = default_cache_dir, max_size: int = default_max_size) -> None:
+    path = _get_path(entry.url, cache_dir=cache_dir)
+    disk_cache.store(entry, path)
+    evict(cache_dir=cache_dir, max_size=max_size)
+
+
+class CachingAdapter(RateLimitedAdapter):
+    """CachingAdapter is an HTTPAdapter which caches responses of GET requests on disk. Only requests which are not answered from the cache go through the rate controller.
+    Mount this to a session, e.g. ``session.mount('https://', CachingAdapter())``, to cache all requests of the session, including requests made by online-judge-api-client.
+
+    :param max_age: is the number of seconds in which cached responses are used without asking the server. By default, cached responses are always revalidated, because pages change when you log in or when contests start.
+    """
+    def __init__(self, *, cache_dir: pathlib.Path = default_cache_dir, max_age: float = default_max_age, max_size: int = default_max_size, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.max_size = max_size
+
+    def _build_cached_response(self, request: requests.PreparedRequest, entry: CacheEntry) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.reason = 'OK'
+        resp.url = request.url or entry.url
+        resp.headers = requests.structures.CaseInsensitiveDict(entry.headers)
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        resp.raw = io.BytesIO(entry.body)
+        resp._content = entry.body  # type: ignore
+        resp.request = request
+        resp.connection = self
+        return resp
+
+    def _store(self, entry: CacheEntry) -> None:
+        try:
+            store(entry, cache_dir=self.cache_dir, max_size=self.max_size)
+        except OSError as e:
+            logger.warning('failed to write the cache: %s', e)
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, **kwargs: Any) -> requests.Response:  # type: ignore
+        if request.method != 'GET' or stream or request.url is None:
+            return super().send(request, stream=stream, **kwargs)
+        url = request.url
+        cookie_hash = _get_cookie_hash(request)
+
+        entry = load(url, cache_dir=self.cache_dir)
+        if entry is not None and entry.cookie_hash != cookie_hash:
+            logger.debug('the cached response is for another cookie: %s', url)
+            entry = None  # the response is replaced with a new one
+        if entry is not None:
+            if time.time() - entry.stored_at < self.max_age and 'no-cache' not in _get_cache_control(entry.headers):
+                logger.debug('use the cached response: %s', url)
+                return self._build_cached_response(request, entry)
+            cached_headers = requests.structures.CaseInsensitiveDict(entry.headers)
+            request = request.copy()
+            if 'ETag' in cached_headers:
+                request.headers['If-None-Match'] = cached_headers['ETag']
+            if 'Last-Modified' in cached_headers:
+                request.headers['If-Modified-Since'] = cached_headers['Last-Modified']
+
+        try:
+            resp = self._send_with_control(request, retry_connection_errors=entry is None, stream=stream, **kwargs)  # use the cache instead of retrying
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if entry is None:
+                raise
+            logger.warning('use the cached response because of a network error: %s: %s', url, e)
+            return self._build_cached_response(request, entry)
+
+        if resp.status_code == 304 and entry is not None:
+            logger.debug('the cached response is not modified: %s', url)
+            resp.close()
+            headers = requests.structures.CaseInsensitiveDict(entry.headers)
+            for key in ('ETag', 'Last-Modified', 'Content-Type'):
+                if key in resp.headers:
+                    headers[key] = resp.headers[key]
+            entry = entry._replace(stored_at=time.time(), headers=dict(headers))
+            self._store(entry)
+            return self._build_cached_response(request, entry)
+
+        if resp.status_code == 200 and 'no-store' not in _get_cache_control(resp.headers):
+            headers = {key: value for key, value in resp.headers.items() if key.lower() not in _IGNORED_HEADERS}
+            self._store(CacheEntry(version=_CACHE_FORMAT_VERSION, url=url, cookie_hash=cookie_hash, stored_at=time.time(), headers=headers, body=resp.content))
+        return resp
+
+
+def mount(session: requests.Session, **kwargs: Any) -> None:
+    """mount makes the session use :any:`CachingAdapter` for HTTP and HTTPS. `kwargs` are given to :any:`CachingAdapter`.
+    """
+
+    adapter = CachingAdapter(**kwargs)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
@@ -0,0 +1,159 @@
+"""
+the module to record and replay HTTP exchanges as fixture files
+
+この module はネットワークに接続せずに oj-prepare や oj-template を実行するためのものです。
+:any:`RecordingAdapter` は実際の通信の要求と応答の組を記録し、:any:`ReplayAdapter` は記録された応答を返します。
+記録は JSON ファイル (fixture) として保存され、ベンチマークやテストで使われます。
+要求のヘッダや本体 (cookie やパスワードを含みうるもの) は記録しませんが、応答の本体はそのまま記録されることに注意してください。
+"""
+
+import base64
+import contextlib
+import io
+import json
+import pathlib
+import threading
+from logging import getLogger
+from typing import *
+
+import requests
+import requests.adapters
+import requests.structures
+import requests.utils
+
+from onlinejudge_template.http_rate import RateLimitedAdapter
+
+logger = getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# headers which are not valid for the decoded body, or which are private
+_IGNORED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie')
+
+
+class Exchange(NamedTuple):
+    method: str
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+def dump_fixture(exchanges: List[Exchange], path: pathlib.Path) -> None:
+    data: List[Dict[str, Any]] = []
+    for exchange in exchanges:
+        item: Dict[str, Any] = {
+            'method': exchange.method,
+            'url': exchange.url,
+            'status_code': exchange.status_code,
+            'headers': exchange.headers,
+        }
+        try:
+            item['body'] = exchange.body.decode()
+        except UnicodeDecodeError:
+            item['body_base64'] = base64.b64encode(exchange.body).decode()
+        data.append(item)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump({'version': FORMAT_VERSION, 'exchanges': data}, fh, indent=2, ensure_ascii=False)
+        fh.write('\n')
+
+
+def load_fixture(path: pathlib.Path) -> List[Exchange]:
+    with open(path, encoding='utf-8') as fh:
+        data = json.load(fh)
+    if data.get('version') != FORMAT_VERSION:
+        raise ValueError(f"""unsupported version of the fixture: {path}""")
+    exchanges: List[Exchange] = []
+    for item in data['exchanges']:
+        if 'body_base64' in item:
+            body = base64.b64decode(item['body_base64'])
+        else:
+            body = item['body'].encode()
+        exchanges.append(Exchange(method=item['method'], url=item['url'], status_code=item['status_code'], headers=item['headers'], body=body))
+    return exchanges
+
+
+def _build_response(request: requests.PreparedRequest, exchange: Exchange, *, adapter: requests.adapters.BaseAdapter) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = exchange.status_code
+    resp.url = request.url or exchange.url
+    resp.headers = requests.structures.CaseInsensitiveDict(exchange.headers)
+    resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+    resp.raw = io.BytesIO(exchange.body)
+    resp._content = exchange.body  # type: ignore
+    resp.request = request
+    resp.connection = adapter
+    return resp
+
+
+class RecordingAdapter(RateLimitedAdapter):
+    """RecordingAdapter is an HTTPAdapter which records all responses. Use :any:`record` to write them.
+    """
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self.exchanges: List[Exchange] = []
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # type: ignore
+        resp = super().send(request, **kwargs)
+        headers = {key: value for key, value in resp.headers.items() if key.lower() not in _IGNORED_HEADERS}
+        exchange = Exchange(method=request.method or 'GET', url=request.url or '', status_code=resp.status_code, headers=headers, body=resp.content)
+        with self._lock:
+            self.exchanges.append(exchange)
+        return resp
+
+
+class ReplayAdapter(requests.adapters.BaseAdapter):
+    """ReplayAdapter is an adapter which returns recorded responses without network access.
+    When the same request is recorded many times, the responses are returned in the recorded order, and the last one is repeated.
+
+    :raises requests.exceptions.ConnectionError: for requests which are not recorded, as if the network is unavailable
+    """
+    def __init__(self, exchanges: List[Exchange]):
+        super().__init__()
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self._exchanges: Dict[Tuple[str, str], List[Exchange]] = {}
+        for exchange in exchanges:
+            self._exchanges.setdefault((exchange.method, exchange.url), []).append(exchange)
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # type: ignore
+        key = (request.method or 'GET', request.url or '')
+        with self._lock:
+            self.request_count += 1
+            exchanges = self._exchanges.get(key)
+            if not exchanges:
+                raise requests.exceptions.ConnectionError(f"""the request is not recorded: {key[0]} {key[1]}""", request=request)
+            exchange = exchanges[0]
+            if len(exchanges) >= 2:
+                exchanges.pop(0)
+        logger.debug('replay the response: %s %s', key[0], key[1])
+        return _build_response(request, exchange, adapter=self)
+
+    def close(self) -> None:
+        pass
+
+
+@contextlib.contextmanager
+def record(session: requests.Session, path: pathlib.Path, **kwargs: Any) -> Iterator[RecordingAdapter]:
+    """record records all HTTP exchanges of the session in the block, and writes them to `path`. `kwargs` are given to :any:`RecordingAdapter`.
+    """
+
+    adapter = RecordingAdapter(**kwargs)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    try:
+        yield adapter
+    finally:
+        dump_fixture(adapter.exchanges, path)
+        logger.info('write the HTTP fixture: %s (%d exchanges)', str(path), len(adapter.exchanges))
+
+
+def replay(session: requests.Session, path: pathlib.Path) -> None:
+    """replay makes the session return responses recorded in `path` instead of accessing the network.
+    """
+
+    adapter = ReplayAdapter(load_fixture(path))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
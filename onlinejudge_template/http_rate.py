@@ -0,0 +1,221 @@
+"""
+the module to control the rate of HTTP requests
+
+この module はジャッジのサーバに負荷をかけすぎないように HTTP の要求を制御する :any:`RateController` を提供します。
+ホストごとの同時接続数の上限 (429 や 503 が返ると半分になり、成功すると少しずつ戻ります)、token bucket による要求の間隔の調整、429 や 5xx や接続の失敗に対するジッタ付きの指数バックオフによる再試行、全体の要求数の上限 (budget) を扱います。
+:any:`RateLimitedAdapter` を session に mount すると、その session のすべての要求が制御されます。
+"""
+
+import email.utils
+import random
+import threading
+import time
+import urllib.parse
+from logging import getLogger
+from typing import *
+
+import requests
+import requests.adapters
+
+import onlinejudge_template.tracing as tracing
+
+logger = getLogger(__name__)
+
+RETRIED_STATUS_CODES = (429, 500, 502, 503, 504)
+THROTTLED_STATUS_CODES = (429, 503)
+RETRIED_METHODS = ('GET', 'HEAD')
+
+
+class RequestBudgetExceeded(requests.exceptions.RequestException):
+    pass
+
+
+class _HostState:
+    """_HostState is the state of a host, which has a concurrency limit with AIMD and a token bucket.
+    """
+    def __init__(self, *, max_connections: int, requests_per_second: Optional[float], burst: int):
+        self.condition = threading.Condition()
+        self.max_connections = max_connections
+        self.limit = float(max_connections)
+        self.active = 0
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def acquire_token(self) -> float:
+        """acquire_token takes a token from the bucket, and returns the seconds waited.
+        """
+
+        if self.requests_per_second is None:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self.condition:
+                now = time.monotonic()
+                self.tokens = min(float(self.burst), self.tokens + (now - self.updated) * self.requests_per_second)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.requests_per_second
+            time.sleep(delay)
+            waited += delay
+
+    def acquire_connection(self) -> float:
+        """acquire_connection waits until the number of active requests becomes less than the current limit, and returns the seconds waited.
+        """
+
+        start = time.monotonic()
+        with self.condition:
+            while self.active >= max(1, int(self.limit)):
+                self.condition.wait()
+            self.active += 1
+        return time.monotonic() - start
+
+    def release_connection(self, *, throttled: bool) -> None:
+        with self.condition:
+            self.active -= 1
+            if throttled:
+                self.limit = max(1.0, self.limit / 2)  # multiplicative decrease
+            else:
+                self.limit = min(float(self.max_connections), self.limit + 1 / self.limit)  # additive increase
+            self.condition.notify_all()
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
+
+
+class RateController:
+    """RateController is shared among threads to control requests of a session.
+
+    :param max_connections_per_host: is the maximum number of concurrent requests to each host. The actual limit is halved when the host answers 429 or 503, and recovers gradually.
+    :param requests_per_second: is the rate of requests to each host. None means no limits.
+    :param burst: is the number of requests which can be sent at once before pacing begins.
+    :param max_retries: is the number of retries for 429, 5xx, and connection errors. Only GET and HEAD requests are retried.
+    :param backoff_base: is the base of exponential backoff in seconds. The delay before the `k`-th retry is random in ``[0, min(backoff_max, backoff_base * 2 ** k)]``, or Retry-After if the server sends it.
+    :param max_requests: is the budget of requests (including retries) through this controller. None means no limits.
+    """
+    def __init__(self, *, max_connections_per_host: int = 4, requests_per_second: Optional[float] = 5.0, burst: Optional[int] = None, max_retries: int = 4, backoff_base: float = 1.0, backoff_max: float = 30.0, max_requests: Optional[int] = None):
+        self.max_connections_per_host = max(1, max_connections_per_host)
+        self.requests_per_second = requests_per_second
+        self.burst = max(1, burst if burst is not None else int(requests_per_second or 1))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_requests = max_requests
+
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, _HostState] = {}
+        self.request_count = 0
+        self.retry_count = 0
+        self.throttled_count = 0
+        self.wait_seconds = 0.0
+
+    def _get_host(self, host: str) -> _HostState:
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = _HostState(max_connections=self.max_connections_per_host, requests_per_second=self.requests_per_second, burst=self.burst)
+            return self._hosts[host]
+
+    def _count_request(self, url: str) -> None:
+        with self._lock:
+            if self.max_requests is not None and self.request_count >= self.max_requests:
+                raise RequestBudgetExceeded(f"""the budget of HTTP requests is exceeded ({self.max_requests} requests): {url}""")
+            self.request_count += 1
+
+    def _wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_seconds += seconds
+
+    def _get_backoff(self, attempt: int, *, retry_after: Optional[float] = None) -> float:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))  # full jitter
+        if retry_after is not None:
+            delay = max(delay, min(self.backoff_max, retry_after))
+        return delay
+
+    def send(self, request: requests.PreparedRequest, send: Callable[[], requests.Response], *, retry_connection_errors: bool = True) -> requests.Response:
+        """send calls `send` for the request with limits and retries.
+
+        :param retry_connection_errors: should be False if the caller has a fallback for connection errors (e.g. the cache).
+        :raises RequestBudgetExceeded:
+        """
+
+        url = request.url or ''
+        host = urllib.parse.urlparse(url).netloc
+        state = self._get_host(host)
+        retryable = (request.method or 'GET').upper() in RETRIED_METHODS
+        attempt = 0
+        while True:
+            self._count_request(url)
+            with tracing.span('http_wait', host=host):
+                self._wait(state.acquire_token() + state.acquire_connection())
+            throttled = False
+            try:
+                resp = send()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if not retryable or not retry_connection_errors or attempt >= self.max_retries:
+                    raise
+                delay = self._get_backoff(attempt)
+                logger.warning('HTTP request failed: %s: %s; retry in %.1f sec (%d/%d)', url, e, delay, attempt + 1, self.max_retries)
+            else:
+                throttled = resp.status_code in THROTTLED_STATUS_CODES
+                if not retryable or resp.status_code not in RETRIED_STATUS_CODES or attempt >= self.max_retries:
+                    return resp
+                delay = self._get_backoff(attempt, retry_after=_parse_retry_after(resp.headers.get('Retry-After')))
+                logger.warning('HTTP %d from %s; retry in %.1f sec (%d/%d)', resp.status_code, url, delay, attempt + 1, self.max_retries)
+                resp.close()
+            finally:
+                state.release_connection(throttled=throttled)
+
+            with self._lock:
+                self.retry_count += 1
+                if throttled:
+                    self.throttled_count += 1
+            with tracing.span('http_backoff', host=host):
+                time.sleep(delay)
+            self._wait(delay)
+            attempt += 1
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'requests': self.request_count,
+                'retries': self.retry_count,
+                'throttled': self.throttled_count,
+                'wait_seconds': self.wait_seconds,
+            }
+
+    def log_stats(self) -> None:
+        stats = self.get_stats()
+        logger.info('HTTP requests: %d (retries: %d, throttled: %d, waiting: %.3f sec)', stats['requests'], stats['retries'], stats['throttled'], stats['wait_seconds'])
+
+
+class RateLimitedAdapter(requests.adapters.HTTPAdapter):
+    """RateLimitedAdapter is an HTTPAdapter whose requests are controlled by a :any:`RateController`. Share the controller among adapters to share limits.
+
+    :param controller: None means no control.
+    """
+    def __init__(self, *, controller: Optional[RateController] = None, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.controller = controller
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # type: ignore
+        return self._send_with_control(request, **kwargs)
+
+    def _send_with_control(self, request: requests.PreparedRequest, *, retry_connection_errors: bool = True, **kwargs: Any) -> requests.Response:
+        send = lambda: super(RateLimitedAdapter, self).send(request, **kwargs)
+        if self.controller is None:
+            return send()
+        return self.controller.send(request, send, retry_connection_errors=retry_connection_errors)
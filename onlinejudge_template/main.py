@@ -1,48 +1,57 @@
 import argparse
+import contextlib
+import functools
+import pathlib
 import sys
 from logging import DEBUG, INFO, basicConfig, getLogger
 from typing import *
 
 import colorlog
+import requests
 
 import onlinejudge.dispatch
 import onlinejudge.utils
+import onlinejudge_template.analyzer.cache
 import onlinejudge_template.analyzer.combined as analyzer
+import onlinejudge_template.analyzer.metrics
 import onlinejudge_template.generator._main as generator
+import onlinejudge_template.http_cache as http_cache
+import onlinejudge_template.http_fixtures as http_fixtures
+import onlinejudge_template.http_rate as http_rate
 import onlinejudge_template.network as network
+import onlinejudge_template.profiling as profiling
+import onlinejudge_template.serialization as serialization
+from onlinejudge_template.types import *
+from onlinejudge_template.utils import LazyFormat
 
 logger = getLogger(__name__)
 
 
-def main(args: Optional[List[str]] = None) -> None:
-    parser = argparse.ArgumentParser()
-    parser.add_argument('url')
-    parser.add_argument('-t', '--template', default='main.cpp')
-    parser.add_argument('-v', '--verbose', action='store_true')
-    parser.add_argument('-c', '--cookie', default=onlinejudge.utils.default_cookie_path)
-    parsed = parser.parse_args(args=args)
-
-    # configure logging
-    handler = colorlog.StreamHandler()
-    handler.setFormatter(colorlog.ColoredFormatter('%(log_color)s%(levelname)s%(reset)s:%(name)s:%(message)s'))
-    level = INFO
-    if parsed.verbose:
-        level = DEBUG
-    basicConfig(level=level, handlers=[handler])
-
-    exceptions: List[Exception] = []
-
+def _download_and_analyze(url: str, *, cookie: pathlib.Path, use_cache: bool, use_http_cache: bool, record_http: Optional[pathlib.Path] = None, replay_http: Optional[pathlib.Path] = None, memory_budget: Optional[int], exceptions: List[Exception]) -> AnalyzerResult:
     # download
-    url = parsed.url
     problem = onlinejudge.dispatch.problem_from_url(url)
     if problem is not None:
         url = problem.get_url()  # normalize url
         url = url.replace('judge.yosupo.jp', 'old.yosupo.jp')  # TODO: support the new pages
     logger.debug('url: %s', url)
     try:
-        with onlinejudge.utils.with_cookiejar(onlinejudge.utils.get_default_session(), path=parsed.cookie) as session:
-            html = network.download_html(url, session=session)
-            sample_cases = network.download_sample_cases(url, session=session)
+        with contextlib.ExitStack() as stack:
+            if replay_http is not None:
+                session = requests.Session()  # don't touch the cookie file of the user
+            else:
+                session = stack.enter_context(onlinejudge.utils.with_cookiejar(onlinejudge.utils.get_default_session(), path=cookie))
+            controller = http_rate.RateController()
+            if replay_http is not None:
+                http_fixtures.replay(session, replay_http)
+            elif record_http is not None:
+                stack.enter_context(http_fixtures.record(session, record_http, controller=controller))
+            elif use_http_cache:
+                http_cache.mount(session, controller=controller)
+            else:
+                adapter = http_rate.RateLimitedAdapter(controller=controller)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+            html, sample_cases = network.download_problem(url, session=session)
     except Exception as e:
         exceptions.append(e)
         logger.error('failed to download sample cases')
@@ -52,22 +61,79 @@ def main(args: Optional[List[str]] = None) -> None:
 
     # analyze
     resources = analyzer.prepare_from_html(html, url=url, sample_cases=sample_cases)
-    logger.debug('analyzer resources: %s', resources._replace(html=b'...skipped...'))
+    logger.debug('analyzer resources: %s', LazyFormat(lambda: resources._replace(html=b'...skipped...')))
     try:
-        analyzed = analyzer.run(resources)
+        if use_cache:
+            analyzed = onlinejudge_template.analyzer.cache.run(resources, memory_budget=memory_budget)
+        else:
+            analyzed = analyzer.run(resources, memory_budget=memory_budget)
     except Exception as e:
         exceptions.append(e)
         logger.exception('failed to analyze the problem')
         analyzed = analyzer.get_empty_analyzer_result(resources)
-    logger.debug('analyzed result: %s', analyzed._replace(resources=analyzed.resources._replace(html=b'...skipped...')))
+    logger.debug('analyzed result: %s', LazyFormat(lambda: analyzed._replace(resources=analyzed.resources._replace(html=b'...skipped...'))))
+    if analyzed.metrics is not None:
+        logger.debug('metrics of analyzers: %s', LazyFormat(functools.partial(onlinejudge_template.analyzer.metrics.format_metrics, analyzed.metrics)))
+    return analyzed
 
-    # generate
-    try:
-        code = generator.run(analyzed, template_file=parsed.template)
-        sys.stdout.buffer.write(code)
-    except Exception as e:
-        exceptions.append(e)
-        logger.exception('failed to generate code')
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('url', nargs='?')
+    parser.add_argument('-t', '--template', default='main.cpp')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    parser.add_argument('-c', '--cookie', type=pathlib.Path, default=onlinejudge.utils.default_cookie_path)
+    parser.add_argument('--no-cache', action='store_true', help='analyze the problem without the cache of results of analyzers')
+    parser.add_argument('--no-http-cache', action='store_true', help='download the problem without the cache of HTTP responses')
+    parser.add_argument('--record-http', type=pathlib.Path, metavar='FILE', help='record HTTP requests and responses to the file as a fixture for tests and benchmarks')
+    parser.add_argument('--replay-http', type=pathlib.Path, metavar='FILE', help='use HTTP responses recorded with --record-http instead of accessing the network')
+    parser.add_argument('--dump-analysis', type=pathlib.Path, help='write the result of analysis to the file as JSON')
+    parser.add_argument('--from-analysis', type=pathlib.Path, help='read the result of analysis from the file instead of downloading and analyzing the problem')
+    parser.add_argument('--profile', type=pathlib.Path, metavar='DIR', help='write profiles of cProfile (.pstats) and collapsed stacks for flamegraphs (.collapsed.txt) to the directory')
+    parser.add_argument('--memory-budget', type=int, metavar='MIB', help='analyze only parts of sample cases if analyzing them entirely seems to use more memory than this (in MiB)')
+    parsed = parser.parse_args(args=args)
+    if (parsed.url is None) == (parsed.from_analysis is None):
+        parser.error('exactly one of url or --from-analysis is required')
+    if parsed.record_http is not None and parsed.replay_http is not None:
+        parser.error('--record-http and --replay-http cannot be used together')
+
+    # configure logging
+    handler = colorlog.StreamHandler()
+    handler.setFormatter(colorlog.ColoredFormatter('%(log_color)s%(levelname)s%(reset)s:%(name)s:%(message)s'))
+    level = INFO
+    if parsed.verbose:
+        level = DEBUG
+    basicConfig(level=level, handlers=[handler])
+
+    exceptions: List[Exception] = []
+
+    profile_path: Optional[pathlib.Path] = None
+    if parsed.profile is not None:
+        profile_path = parsed.profile / profiling.get_profile_name(parsed.url if parsed.url is not None else parsed.from_analysis.stem)
+
+    with profiling.profile(profile_path):
+        if parsed.from_analysis is not None:
+            # load
+            with open(parsed.from_analysis) as fh:
+                analyzed = serialization.loads(fh.read())
+            logger.debug('loaded result: %s', LazyFormat(lambda: analyzed._replace(resources=analyzed.resources._replace(html=b'...skipped...'))))
+        else:
+            memory_budget = parsed.memory_budget * 1024 * 1024 if parsed.memory_budget is not None else None
+            analyzed = _download_and_analyze(parsed.url, cookie=parsed.cookie, use_cache=not parsed.no_cache, use_http_cache=not parsed.no_http_cache, record_http=parsed.record_http, replay_http=parsed.replay_http, memory_budget=memory_budget, exceptions=exceptions)
+
+        # dump
+        if parsed.dump_analysis is not None:
+            logger.info('write the result of analysis: %s', str(parsed.dump_analysis))
+            with open(parsed.dump_analysis, 'w') as fh:
+                fh.write(serialization.dumps(analyzed))
+
+        # generate
+        try:
+            code = generator.run(analyzed, template_file=parsed.template)
+            sys.stdout.buffer.write(code)
+        except Exception as e:
+            exceptions.append(e)
+            logger.exception('failed to generate code')
 
     if exceptions:
         raise exceptions[0]
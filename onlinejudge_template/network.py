@@ -2,11 +2,15 @@
 the module to access networks
 
 この module はネットワークアクセスを行い、問題の HTML やサンプルケースを取得します。
+:any:`download_problem` は問題のページを一度だけ取得し、サンプルケースもその HTML から取り出します。
+online-judge-api-client はサンプルケースを取得する際に問題のページを再び取得しますが、その要求に対しては取得済みの応答を返すことで二重の取得を避けています。
+AtCoder や Codeforces のコンテストについては、:any:`download_contest_problems` が全問題の問題文を含むページを一度だけ取得し、問題ごとの HTML に分割します。
 """
 
 from logging import getLogger
 from typing import *
 
+import bs4
 import requests
 
 import onlinejudge
@@ -16,21 +20,198 @@ from onlinejudge_template.types import *
 logger = getLogger(__name__)
 
 
-def download_html(url: str, *, session: Optional[requests.Session] = None) -> bytes:
-    session = session or onlinejudge.utils.get_default_session()
+class _SessionProxy:
+    """_SessionProxy wraps a session to count HTTP requests, and to return prefetched responses instead of sending the same GET requests again.
+    Other attributes (e.g. cookies) are the ones of the wrapped session.
+    """
+    def __init__(self, session: requests.Session):
+        self._session = session
+        self._prefetched: Dict[str, requests.Response] = {}
+        self.request_count = 0
+        self.reuse_count = 0
+
+    def prefetch(self, resp: requests.Response, *, url: str) -> None:
+        self._prefetched[url] = resp
+        self._prefetched[resp.url] = resp
+
+    def discard_prefetched(self) -> None:
+        self._prefetched.clear()
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        if method.upper() == 'GET' and url in self._prefetched:
+            logger.debug('reuse the downloaded page: %s', url)
+            self.reuse_count += 1
+            return self._prefetched[url]
+        self.request_count += 1
+        return self._session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault('allow_redirects', True)
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._session, name)
+
+
+def _make_response(content: bytes, *, url: str) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.url = url
+    resp._content = content  # type: ignore
+    resp.encoding = 'utf-8'
+    return resp
+
+
+def _download_html(url: str, *, session: requests.Session) -> requests.Response:
     resp = session.get(url)
     logger.debug('HTTP response: %s', resp)
     resp.raise_for_status()
-    return resp.content
+    return resp
+
+
+def download_html(url: str, *, session: Optional[requests.Session] = None) -> bytes:
+    session = session or onlinejudge.utils.get_default_session()
+    return _download_html(url, session=session).content
+
+
+def _download_sample_cases(url: str, *, session: requests.Session) -> List[SampleCase]:
+    problem = onlinejudge.dispatch.problem_from_url(url)
+    assert problem is not None
+    sample_cases = problem.download_sample_cases(session=session)
+    return [SampleCase(input=case.input_data, output=case.output_data) for case in sample_cases]
 
 
 def download_sample_cases(url: str, *, session: Optional[requests.Session] = None) -> Optional[List[SampleCase]]:
     session = session or onlinejudge.utils.get_default_session()
     try:
-        problem = onlinejudge.dispatch.problem_from_url(url)
-        assert problem is not None
-        sample_cases = problem.download_sample_cases(session=session)
-        return [SampleCase(input=case.input_data, output=case.output_data) for case in sample_cases]
+        return _download_sample_cases(url, session=session)
     except Exception as e:
         logger.error('downloading sample cases failed: %s', e)
         return None
+
+
+def download_problem(url: str, *, session: Optional[requests.Session] = None) -> Tuple[bytes, Optional[List[SampleCase]]]:
+    """download_problem downloads the HTML and the sample cases of the problem.
+    The sample cases are extracted from the downloaded HTML if the service reads them from the same page, and are downloaded separately otherwise.
+    If extracting them from the downloaded HTML fails, they are downloaded again as a fallback.
+
+    :raises requests.exceptions.RequestException: if downloading the HTML failed
+    :returns: the HTML and the sample cases. The sample cases are None if they are not available.
+    """
+
+    proxy = _SessionProxy(session or onlinejudge.utils.get_default_session())
+    session = cast(requests.Session, proxy)
+    try:
+        resp = _download_html(url, session=session)
+        proxy.prefetch(resp, url=url)
+        try:
+            sample_cases: Optional[List[SampleCase]] = _download_sample_cases(url, session=session)
+        except Exception as e:
+            if proxy.reuse_count:
+                logger.debug('failed to get sample cases from the downloaded page, so download them again: %s', e)
+                proxy.discard_prefetched()
+                sample_cases = download_sample_cases(url, session=session)
+            else:
+                logger.error('downloading sample cases failed: %s', e)
+                sample_cases = None
+    finally:
+        logger.debug('HTTP requests for the problem: %d (%s)', proxy.request_count, url)
+    return resp.content, sample_cases
+
+
+def _get_problems_page_url(url: str) -> Optional[str]:
+    """_get_problems_page_url returns the URL of the page which has statements of all problems of the contest, if the service has such pages.
+    """
+
+    contest = onlinejudge.dispatch.contest_from_url(url)
+    if isinstance(contest, onlinejudge.service.atcoder.AtCoderContest):
+        return contest.get_url() + '/tasks_print'  # e.g. https://atcoder.jp/contests/abc080/tasks_print
+    if isinstance(contest, onlinejudge.service.codeforces.CodeforcesContest) and contest.kind in ('contest', 'gym'):
+        return contest.get_url() + '/problems'  # e.g. https://codeforces.com/contest/1360/problems
+    return None
+
+
+def _split_problems_page(html: bytes, *, url: str, problem_urls: List[str]) -> Dict[str, bytes]:
+    """_split_problems_page splits the page of all problems into the HTML of each problem.
+
+    :returns: a dict from URLs of problems. Problems which are not found in the page are not in the dict.
+    """
+
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+    fragments: Dict[str, bytes] = {}
+    if 'atcoder.jp' in url:
+        # Problems have no IDs in the page, so they are matched in the order.
+        tags = soup.find_all('div', id='task-statement')
+        if len(tags) != len(problem_urls):
+            logger.debug('the numbers of problems are different: %d in the page, %d in the contest', len(tags), len(problem_urls))
+            return {}
+        for problem_url, tag in zip(problem_urls, tags):
+            fragments[problem_url] = str(tag).encode()
+
+    elif 'codeforces.com' in url:
+        indices: Dict[str, str] = {}
+        for problem_url in problem_urls:
+            problem = onlinejudge.dispatch.problem_from_url(problem_url)
+            if isinstance(problem, onlinejudge.service.codeforces.CodeforcesProblem):
+                indices[problem.index] = problem_url
+        for tag in soup.find_all('div', class_='problemindexholder'):
+            problem_url_ = indices.get(tag.get('problemindex'))
+            if problem_url_ is not None:
+                fragments[problem_url_] = str(tag).encode()
+
+    return fragments
+
+
+def get_statement(html: bytes, *, url: str) -> bytes:
+    """get_statement extracts the statement from the HTML of a problem, in the same way to :any:`download_contest_problems`. Other parts of the page (e.g. CSRF tokens and the current time) are ignored, so this is used to check whether the problem is updated.
+
+    :returns: the whole HTML if the statement is not found
+    """
+
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+    tag: Optional[bs4.Tag] = None
+    if 'atcoder.jp' in url:
+        tag = soup.find('div', id='task-statement')
+    elif 'codeforces.com' in url:
+        tag = soup.find('div', class_='problemindexholder')
+    if tag is None:
+        return html
+    return str(tag).encode()
+
+
+def download_contest_problems(url: str, *, problem_urls: List[str], session: Optional[requests.Session] = None) -> Dict[str, Tuple[bytes, Optional[List[SampleCase]]]]:
+    """download_contest_problems downloads the page which has statements of all problems of the contest (e.g. https://atcoder.jp/contests/abc080/tasks_print), and splits it into the HTML and the sample cases of each problem.
+    Problems which fail to be split are not in the result, so use :any:`download_problem` for them.
+
+    :param url: is the URL of the contest
+    :returns: a dict from URLs of problems. This is empty if the service has no such pages or downloading fails.
+    """
+
+    page_url = _get_problems_page_url(url)
+    if page_url is None:
+        return {}
+    session = session or onlinejudge.utils.get_default_session()
+    try:
+        resp = _download_html(page_url, session=session)
+    except requests.exceptions.RequestException as e:
+        logger.warning('failed to download the page of all problems: %s', e)
+        return {}
+
+    result: Dict[str, Tuple[bytes, Optional[List[SampleCase]]]] = {}
+    for problem_url, html in _split_problems_page(resp.content, url=page_url, problem_urls=problem_urls).items():
+        # read sample cases from the fragment, as if it is the page of the problem
+        proxy = _SessionProxy(session)
+        proxy.prefetch(_make_response(html, url=problem_url), url=problem_url)
+        try:
+            sample_cases = _download_sample_cases(problem_url, session=cast(requests.Session, proxy))
+        except Exception as e:
+            logger.debug('failed to get sample cases from the page of all problems: %s: %s', problem_url, e)
+            continue
+        if not sample_cases:
+            continue
+        result[problem_url] = (html, sample_cases)
+    logger.debug('problems found in the page of all problems: %d of %d', len(result), len(problem_urls))
+    return result
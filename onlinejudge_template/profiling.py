@@ -0,0 +1,113 @@
+"""
+the module to profile commands with cProfile
+
+この module は ``--profile`` オプションのためのもので、:py:mod:`cProfile` によるプロファイルを問題ごとにファイルへ書き出します。
+``.pstats`` ファイルは :py:mod:`pstats` や snakeviz などで、``.collapsed.txt`` ファイルは flamegraph.pl や speedscope などで読むことができます。
+
+cProfile は関数の呼び出し元と呼び出し先の組ごとの時間しか記録しないため、collapsed stack 形式への変換は近似です。
+ある関数の時間は、その関数への各呼び出し元からの時間の比に従って、それぞれのスタックへ按分されます。
+"""
+
+import contextlib
+import cProfile
+import pathlib
+import pstats
+import re
+from logging import getLogger
+from typing import *
+
+logger = getLogger(__name__)
+
+_Func = Tuple[str, int, str]  # (filename, lineno, funcname) as in pstats
+
+
+def get_profile_name(s: str) -> str:
+    """get_profile_name makes a string usable as a filename from a URL or something.
+    """
+
+    name = re.sub(r'[^0-9A-Za-z]+', '_', re.sub(r'^https?://', '', s)).strip('_')
+    return name or 'profile'
+
+
+def _format_func(func: _Func) -> str:
+    filename, lineno, funcname = func
+    if filename == '~':
+        return funcname.replace(';', ',')  # built-in functions like <built-in method time.perf_counter>
+    return f"""{funcname} ({pathlib.Path(filename).name}:{lineno})""".replace(';', ',')
+
+
+def format_collapsed_stacks(stats: pstats.Stats, *, max_depth: int = 100) -> str:
+    """format_collapsed_stacks converts the result of cProfile to the collapsed stack format (e.g. ``main;run;evaluate 1234``). The values are in microseconds.
+    """
+
+    entries = stats.stats  # type: ignore
+    callees: Dict[_Func, Dict[_Func, float]] = {}
+    roots: List[_Func] = []
+    for func, (_, _, _, _, callers) in entries.items():
+        if not callers:
+            roots.append(func)
+        for caller, (_, _, _, ct) in callers.items():
+            callees.setdefault(caller, {})[func] = ct
+
+    lines: Dict[str, float] = {}
+
+    def dfs(func: _Func, *, time: float, stack: List[str], visited: Set[_Func]) -> None:
+        _, _, tt, ct, _ = entries[func]
+        if time < 1e-6 or ct <= 0:
+            return  # too small to be shown
+        ratio = min(1.0, time / ct)
+        stack.append(_format_func(func))
+        visited.add(func)
+        key = ';'.join(stack)
+        lines[key] = lines.get(key, 0.0) + tt * ratio
+        if len(stack) < max_depth:
+            for callee, edge in callees.get(func, {}).items():
+                if callee not in visited:  # cut recursions
+                    dfs(callee, time=edge * ratio, stack=stack, visited=visited)
+        visited.remove(func)
+        stack.pop()
+
+    for root in roots:
+        dfs(root, time=entries[root][3], stack=[], visited=set())
+
+    result: List[str] = []
+    for key, seconds in sorted(lines.items()):
+        micros = int(seconds * 1000000)
+        if micros > 0:
+            result.append(f"""{key} {micros}\n""")
+    return ''.join(result)
+
+
+def write_profile(profiler: cProfile.Profile, *, path_prefix: pathlib.Path) -> None:
+    """write_profile writes ``{path_prefix}.pstats`` and ``{path_prefix}.collapsed.txt``.
+    """
+
+    path_prefix.parent.mkdir(parents=True, exist_ok=True)
+    pstats_path = path_prefix.parent / (path_prefix.name + '.pstats')
+    collapsed_path = path_prefix.parent / (path_prefix.name + '.collapsed.txt')
+    profiler.dump_stats(str(pstats_path))
+    stats = pstats.Stats(profiler)
+    with open(collapsed_path, 'w') as fh:
+        fh.write(format_collapsed_stacks(stats))
+    logger.info('write profiles: %s, %s', str(pstats_path), str(collapsed_path))
+
+
+@contextlib.contextmanager
+def profile(path_prefix: Optional[pathlib.Path]) -> Iterator[None]:
+    """profile profiles the block with cProfile and writes the result with :any:`write_profile`. If `path_prefix` is None, this does nothing.
+    Only the current thread is profiled.
+    """
+
+    if path_prefix is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        try:
+            write_profile(profiler, path_prefix=path_prefix)
+        except OSError as e:
+            logger.error('failed to write profiles: %s', e)
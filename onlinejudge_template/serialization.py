@@ -0,0 +1,308 @@
+"""
+the module to serialize results of analyzers
+
+この module は解析結果 (:any:`AnalyzerResult`) を JSON に変換し、また JSON から復元します。
+解析を一度だけ行い、その結果を複数の環境で複数のテンプレートに適用するために使われます。
+JSON の形式は ``version`` の値によって識別され、形式を変更する際にはこの値を変更します。
+"""
+
+import base64
+import json
+from logging import getLogger
+from typing import *
+
+from onlinejudge_template.types import *
+
+logger = getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+class SerializationError(TemplateAnalyzerGeneratorError):
+    pass
+
+
+def _encode_bytes(data: Optional[bytes]) -> Optional[str]:
+    if data is None:
+        return None
+    return base64.b64encode(data).decode()
+
+
+def _decode_bytes(data: Optional[str]) -> Optional[bytes]:
+    if data is None:
+        return None
+    return base64.b64decode(data.encode())
+
+
+def _encode_var_type(type: Optional[VarType]) -> Optional[str]:
+    if type is None:
+        return None
+    return type.value
+
+
+def _decode_var_type(type: Optional[str]) -> Optional[VarType]:
+    if type is None:
+        return None
+    return VarType(type)
+
+
+def _encode_format_node(node: Optional[FormatNode]) -> Optional[Dict[str, Any]]:
+    if node is None:
+        return None
+    elif isinstance(node, ItemNode):
+        return {'kind': 'item', 'name': node.name, 'indices': list(node.indices)}
+    elif isinstance(node, NewlineNode):
+        return {'kind': 'newline'}
+    elif isinstance(node, SequenceNode):
+        return {'kind': 'sequence', 'items': [_encode_format_node(item) for item in node.items]}
+    elif isinstance(node, LoopNode):
+        return {'kind': 'loop', 'size': node.size, 'name': node.name, 'body': _encode_format_node(node.body)}
+    else:
+        assert False
+
+
+def _decode_format_node(data: Optional[Dict[str, Any]]) -> Optional[FormatNode]:
+    if data is None:
+        return None
+    elif data['kind'] == 'item':
+        return ItemNode(name=data['name'], indices=data['indices'])
+    elif data['kind'] == 'newline':
+        return NewlineNode()
+    elif data['kind'] == 'sequence':
+        items: List[FormatNode] = []
+        for item in data['items']:
+            node = _decode_format_node(item)
+            if node is None:
+                raise SerializationError('null is not allowed in the items of sequences')
+            items.append(node)
+        return SequenceNode(items=items)
+    elif data['kind'] == 'loop':
+        body = _decode_format_node(data['body'])
+        if body is None:
+            raise SerializationError('null is not allowed in the body of loops')
+        return LoopNode(size=data['size'], name=data['name'], body=body)
+    else:
+        raise SerializationError(f"""unknown kind of format nodes: {repr(data['kind'])}""")
+
+
+def _encode_variables(variables: Optional[Dict[VarName, VarDecl]]) -> Optional[List[Dict[str, Any]]]:
+    if variables is None:
+        return None
+    return [{
+        'name': decl.name,
+        'type': _encode_var_type(decl.type),
+        'dims': list(decl.dims),
+        'bases': list(decl.bases),
+        'depending': sorted(decl.depending),
+        'observed_range': list(decl.observed_range) if decl.observed_range is not None else None,
+        'lower_bound': decl.lower_bound,
+        'upper_bound': decl.upper_bound,
+    } for decl in variables.values()]
+
+
+def _decode_variables(data: Optional[List[Dict[str, Any]]]) -> Optional[Dict[VarName, VarDecl]]:
+    if data is None:
+        return None
+    variables: Dict[VarName, VarDecl] = {}
+    for item in data:
+        observed_range = item.get('observed_range')
+        variables[VarName(item['name'])] = VarDecl(
+            name=VarName(item['name']),
+            type=_decode_var_type(item['type']),
+            dims=list(map(Expr, item['dims'])),
+            bases=list(map(Expr, item['bases'])),
+            depending=set(map(VarName, item['depending'])),
+            observed_range=(observed_range[0], observed_range[1]) if observed_range is not None else None,
+            lower_bound=item.get('lower_bound'),
+            upper_bound=item.get('upper_bound'),
+        )
+    return variables
+
+
+def _encode_output_type(output_type: Optional[OutputType]) -> Optional[Dict[str, Any]]:
+    if output_type is None:
+        return None
+    elif isinstance(output_type, YesNoOutputType):
+        return {'kind': 'yes_no', 'name': output_type.name, 'yes': output_type.yes, 'no': output_type.no}
+    elif isinstance(output_type, OneOutputType):
+        return {'kind': 'one', 'name': output_type.name, 'type': _encode_var_type(output_type.type)}
+    elif isinstance(output_type, TwoOutputType):
+        return {
+            'kind': 'two',
+            'name1': output_type.name1,
+            'type1': _encode_var_type(output_type.type1),
+            'name2': output_type.name2,
+            'type2': _encode_var_type(output_type.type2),
+            'print_newline_after_item': output_type.print_newline_after_item,
+        }
+    elif isinstance(output_type, VectorOutputType):
+        return {
+            'kind': 'vector',
+            'name': output_type.name,
+            'type': _encode_var_type(output_type.type),
+            'subscripted_name': output_type.subscripted_name,
+            'counter_name': output_type.counter_name,
+            'print_size': output_type.print_size,
+            'print_newline_after_size': output_type.print_newline_after_size,
+            'print_newline_after_item': output_type.print_newline_after_item,
+        }
+    else:
+        assert False
+
+
+def _decode_output_type(data: Optional[Dict[str, Any]]) -> Optional[OutputType]:
+    if data is None:
+        return None
+    elif data['kind'] == 'yes_no':
+        return YesNoOutputType(name=Expr(data['name']), yes=data['yes'], no=data['no'])
+    elif data['kind'] == 'one':
+        return OneOutputType(name=Expr(data['name']), type=_decode_var_type(data['type']))
+    elif data['kind'] == 'two':
+        return TwoOutputType(
+            name1=Expr(data['name1']),
+            type1=_decode_var_type(data['type1']),
+            name2=Expr(data['name2']),
+            type2=_decode_var_type(data['type2']),
+            print_newline_after_item=data['print_newline_after_item'],
+        )
+    elif data['kind'] == 'vector':
+        return VectorOutputType(
+            name=VarName(data['name']),
+            type=_decode_var_type(data['type']),
+            subscripted_name=data['subscripted_name'],
+            counter_name=VarName(data['counter_name']),
+            print_size=data['print_size'],
+            print_newline_after_size=data['print_newline_after_size'],
+            print_newline_after_item=data['print_newline_after_item'],
+        )
+    else:
+        raise SerializationError(f"""unknown kind of output types: {repr(data['kind'])}""")
+
+
+def _encode_topcoder_class_definition(definition: Optional[TopcoderClassDefinition]) -> Optional[Dict[str, Any]]:
+    if definition is None:
+        return None
+    return {
+        'class_name': definition.class_name,
+        'method_name': definition.method_name,
+        'formal_arguments': [[type.value, name] for type, name in definition.formal_arguments],
+        'return_type': definition.return_type.value,
+    }
+
+
+def _decode_topcoder_class_definition(data: Optional[Dict[str, Any]]) -> Optional[TopcoderClassDefinition]:
+    if data is None:
+        return None
+    return TopcoderClassDefinition(
+        class_name=data['class_name'],
+        method_name=data['method_name'],
+        formal_arguments=[(TopcoderType(type), VarName(name)) for type, name in data['formal_arguments']],
+        return_type=TopcoderType(data['return_type']),
+    )
+
+
+def _encode_resources(resources: AnalyzerResources) -> Dict[str, Any]:
+    return {
+        'url': resources.url,
+        'html': _encode_bytes(resources.html),
+        'input_format_string': resources.input_format_string,
+        'output_format_string': resources.output_format_string,
+        'sample_cases': [{'input': _encode_bytes(case.input), 'output': _encode_bytes(case.output)} for case in resources.sample_cases] if resources.sample_cases is not None else None,
+    }
+
+
+def _decode_resources(data: Dict[str, Any]) -> AnalyzerResources:
+    sample_cases: Optional[List[SampleCase]] = None
+    if data['sample_cases'] is not None:
+        sample_cases = []
+        for case in data['sample_cases']:
+            input = _decode_bytes(case['input'])
+            output = _decode_bytes(case['output'])
+            if input is None or output is None:
+                raise SerializationError('null is not allowed in sample cases')
+            sample_cases.append(SampleCase(input=input, output=output))
+    return AnalyzerResources(
+        url=data['url'],
+        html=_decode_bytes(data['html']),
+        input_format_string=data['input_format_string'],
+        output_format_string=data['output_format_string'],
+        sample_cases=sample_cases,
+    )
+
+
+def _encode_metrics(metrics: Optional[AnalyzerMetrics]) -> Optional[Dict[str, Any]]:
+    if metrics is None:
+        return None
+    return {'timers': metrics.timers, 'counters': metrics.counters}
+
+
+def _decode_metrics(data: Optional[Dict[str, Any]]) -> Optional[AnalyzerMetrics]:
+    if data is None:
+        return None
+    return AnalyzerMetrics(timers=dict(data['timers']), counters=dict(data['counters']))
+
+
+def encode_analyzer_result(result: AnalyzerResult) -> Dict[str, Any]:
+    """encode_analyzer_result converts the result to a JSON-compatible object.
+    """
+
+    return {
+        'version': FORMAT_VERSION,
+        'resources': _encode_resources(result.resources),
+        'input_format': _encode_format_node(result.input_format),
+        'input_variables': _encode_variables(result.input_variables),
+        'output_format': _encode_format_node(result.output_format),
+        'output_variables': _encode_variables(result.output_variables),
+        'constants': [{'name': decl.name, 'value': decl.value, 'type': _encode_var_type(decl.type)} for decl in result.constants.values()],
+        'output_type': _encode_output_type(result.output_type),
+        'topcoder_class_definition': _encode_topcoder_class_definition(result.topcoder_class_definition),
+        'fingerprints': result.fingerprints,
+        'metrics': _encode_metrics(result.metrics),
+    }
+
+
+def decode_analyzer_result(data: Dict[str, Any]) -> AnalyzerResult:
+    """decode_analyzer_result is the inverse of :any:`encode_analyzer_result`.
+
+    :raises SerializationError:
+    """
+
+    if not isinstance(data, dict) or data.get('version') != FORMAT_VERSION:
+        raise SerializationError(f"""unsupported format: version {repr(data.get('version') if isinstance(data, dict) else None)} is given, but version {FORMAT_VERSION} is expected""")
+    try:
+        constants: Dict[VarName, ConstantDecl] = {}
+        for item in data['constants']:
+            type = _decode_var_type(item['type'])
+            if type is None:
+                raise SerializationError('null is not allowed in the types of constants')
+            constants[VarName(item['name'])] = ConstantDecl(name=VarName(item['name']), value=item['value'], type=type)
+        return AnalyzerResult(
+            resources=_decode_resources(data['resources']),
+            input_format=_decode_format_node(data['input_format']),
+            input_variables=_decode_variables(data['input_variables']),
+            output_format=_decode_format_node(data['output_format']),
+            output_variables=_decode_variables(data['output_variables']),
+            constants=constants,
+            output_type=_decode_output_type(data['output_type']),
+            topcoder_class_definition=_decode_topcoder_class_definition(data['topcoder_class_definition']),
+            fingerprints=data.get('fingerprints'),
+            metrics=_decode_metrics(data.get('metrics')),
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise SerializationError(f"""broken analyzer result: {e}""") from e
+
+
+def dumps(result: AnalyzerResult) -> str:
+    return json.dumps(encode_analyzer_result(result), indent=2, sort_keys=True)
+
+
+def loads(s: str) -> AnalyzerResult:
+    """
+    :raises SerializationError:
+    """
+
+    try:
+        data = json.loads(s)
+    except ValueError as e:
+        raise SerializationError(f"""invalid JSON: {e}""") from e
+    return decode_analyzer_result(data)
@@ -0,0 +1,132 @@
+"""
+the module to record timelines in the trace event format of Chrome
+
+この module は ``--trace`` オプションのためのもので、処理の区間 (span) を Chrome の trace event 形式の JSON に記録します。
+出力されたファイルは ``about:tracing`` や Perfetto (https://ui.perfetto.dev/) で読むことができます。
+記録はプロセス全体で共有され、複数のスレッドから同時に記録しても構いません。スレッドごとに別の行として表示されます。
+:any:`trace` の外側で :any:`span` を使っても何もしません。
+"""
+
+import contextlib
+import json
+import os
+import pathlib
+import threading
+import time
+from logging import getLogger
+from typing import *
+
+logger = getLogger(__name__)
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = []
+        self._thread_names: Dict[int, str] = {}
+        self._start = time.perf_counter()
+
+    def _now(self) -> float:
+        """_now returns the timestamp in microseconds.
+        """
+
+        return (time.perf_counter() - self._start) * 1000000
+
+    @contextlib.contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        thread = threading.current_thread()
+        begin = self._now()
+        try:
+            yield
+        finally:
+            end = self._now()
+            event = {
+                'name': name,
+                'ph': 'X',  # complete event
+                'ts': begin,
+                'dur': end - begin,
+                'pid': os.getpid(),
+                'tid': thread.ident,
+                'args': {key: str(value) for key, value in args.items()},
+            }
+            with self._lock:
+                self._events.append(event)
+                self._thread_names[thread.ident or 0] = thread.name
+
+    def instant(self, name: str, **args: Any) -> None:
+        thread = threading.current_thread()
+        event = {
+            'name': name,
+            'ph': 'i',  # instant event
+            's': 'p',  # drawn over the whole process
+            'ts': self._now(),
+            'pid': os.getpid(),
+            'tid': thread.ident,
+            'args': {key: str(value) for key, value in args.items()},
+        }
+        with self._lock:
+            self._events.append(event)
+            self._thread_names[thread.ident or 0] = thread.name
+
+    def get_trace_events(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+        for tid, name in thread_names.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}})
+        return events
+
+    def dump(self, path: pathlib.Path) -> None:
+        with open(path, 'w') as fh:
+            json.dump({'traceEvents': self.get_trace_events(), 'displayTimeUnit': 'ms'}, fh)
+
+
+_tracer: Optional[Tracer] = None
+
+
+@contextlib.contextmanager
+def trace(path: Optional[pathlib.Path]) -> Iterator[None]:
+    """trace records spans in the block from all threads, and writes them to `path`. If `path` is None, this does nothing.
+    """
+
+    global _tracer
+    if path is None:
+        yield
+        return
+    tracer = Tracer()
+    previous = _tracer
+    _tracer = tracer
+    try:
+        yield
+    finally:
+        _tracer = previous
+        try:
+            tracer.dump(path)
+            logger.info('write the trace: %s', str(path))
+        except OSError as e:
+            logger.error('failed to write the trace: %s', e)
+
+
+def span(name: str, **args: Any) -> ContextManager[None]:
+    """span records the block as a span with the name. `args` are shown with the span, e.g. the URL of the problem.
+    """
+
+    tracer = _tracer
+    if tracer is None:
+        return _null_context()
+    return tracer.span(name, **args)
+
+
+def instant(name: str, **args: Any) -> None:
+    """instant records a moment with the name, e.g. when the first file is written.
+    """
+
+    tracer = _tracer
+    if tracer is None:
+        return
+    tracer.instant(name, **args)
+
+
+@contextlib.contextmanager
+def _null_context() -> Iterator[None]:
+    yield
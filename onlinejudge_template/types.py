@@ -8,9 +8,7 @@ Expr = NewType('Expr', str)  # An expr. The type is always int. For example, "n
 
 class FormatNode(abc.ABC):
     def __repr__(self) -> str:
-        keys = dir(self)
-        keys = list(filter(lambda key: not key.startswith('_'), keys))
-        keys.sort()
+        keys = sorted(key for key in vars(self) if not key.startswith('_'))
         items = ', '.join([key + '=' + repr(getattr(self, key)) for key in keys])
         return f"{self.__class__.__name__}({items})"
 
@@ -75,6 +73,9 @@ class VarDecl(NamedTuple):
     dims: List[Expr]
     bases: List[Expr]
     depending: Set[VarName]
+    observed_range: Optional[Tuple[int, int]] = None  # The minimum and maximum of integer values which appear in sample cases. This is not a bound of the variable.
+    lower_bound: Optional[Expr] = None  # An inclusive lower bound given in the constraints of the problem.
+    upper_bound: Optional[Expr] = None  # An inclusive upper bound given in the constraints of the problem.
 
 
 class ConstantDecl(NamedTuple):
@@ -159,6 +160,11 @@ class TopcoderClassDefinition(NamedTuple):
     return_type: TopcoderType
 
 
+class AnalyzerMetrics(NamedTuple):
+    timers: Dict[str, float]  # wall-time of each stage in seconds
+    counters: Dict[str, int]
+
+
 class AnalyzerResult(NamedTuple):
     resources: AnalyzerResources
     input_format: Optional[FormatNode]
@@ -168,6 +174,8 @@ class AnalyzerResult(NamedTuple):
     constants: Dict[VarName, ConstantDecl]
     output_type: Optional[OutputType]
     topcoder_class_definition: Optional[TopcoderClassDefinition]
+    fingerprints: Optional[Dict[str, str]] = None  # hashes of parts of the resources, to reuse this result when some of them are changed
+    metrics: Optional[AnalyzerMetrics] = None
 
 
 class TemplateAnalyzerGeneratorError(RuntimeError):
@@ -0,0 +1,27 @@
+"""
+the module for small utilities shared by analyzers and generators
+
+この module は analyzer と generator の両方から使われる小さな便利関数やクラスを含みます。
+"""
+
+from typing import *
+
+
+class LazyFormat:
+    """LazyFormat wraps a function and calls it only when the object is converted to a string.
+    This is for arguments of logging which are expensive to compute, e.g. ``logger.debug('tokens: %s', LazyFormat(lambda: list(lexer.clone())))``.
+    The logging module formats arguments only when the logger is enabled for the level, so the function is not called in usual runs.
+
+    ログのための文字列の計算を、そのレベルのログが実際に出力されるときまで遅延させます。
+    """
+
+    __slots__ = ('_func', )
+
+    def __init__(self, func: Callable[[], Any]):
+        self._func = func
+
+    def __str__(self) -> str:
+        return str(self._func())
+
+    def __repr__(self) -> str:
+        return repr(self._func())
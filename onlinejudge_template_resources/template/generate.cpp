@@ -14,6 +14,8 @@
     data["config"]["rep_macro"] = "REP"
     data["config"]["using_namespace_std"] = True
     data["config"]["long_long_int"] = "int64_t"
+    data["config"]["unsigned_long_long_int"] = "uint64_t"
+    data["config"]["narrow_int"] = "int32_t"
     if platform.system() == "Linux" and "clang" not in os.environ.get("CXX", "g++"):
         include = "#include <bits/stdc++.h>"
     else:
@@ -24,7 +24,7 @@ setup(
         'requests >= 2.23',
         'toml >= 0.10',
     ],
-    packages=find_packages(exclude=('tests', 'docs')),
+    packages=find_packages(exclude=('tests', 'docs', 'benchmarks')),
     package_data={
         'onlinejudge_template_resources': ['*', 'template/*'],
     },
@@ -0,0 +1,105 @@
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import onlinejudge_template.analyzer.cache as cache
+import onlinejudge_template.analyzer.combined
+from onlinejudge_template.types import *
+
+
+def _get_resources(n: int) -> AnalyzerResources:
+    return AnalyzerResources(
+        url='https://atcoder.jp/contests/abc999/tasks/abc999_a',
+        html=b'<html>' + b'x' * 1000 + b'</html>',
+        input_format_string='N\r\nA_1 A_2 ... A_N\r\n',
+        output_format_string=None,
+        sample_cases=[
+            SampleCase(input='{}\n{}\n'.format(n, ' '.join(map(str, range(n)))).encode(), output=b'1\n'),
+        ],
+    )
+
+
+class TestCache(unittest.TestCase):
+    def test_key(self) -> None:
+        a = _get_resources(3)
+        self.assertEqual(cache.get_cache_key(a), cache.get_cache_key(_get_resources(3)))
+        self.assertNotEqual(cache.get_cache_key(a), cache.get_cache_key(_get_resources(4)))
+        self.assertNotEqual(cache.get_cache_key(a), cache.get_cache_key(a._replace(html=b'')))
+        self.assertNotEqual(cache.get_cache_key(a), cache.get_cache_key(a._replace(sample_cases=None)))
+        self.assertNotEqual(cache.get_cache_key(a._replace(html=b'ab', output_format_string='')), cache.get_cache_key(a._replace(html=b'a', output_format_string='b')))
+
+    def test_hit(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            cache_dir = pathlib.Path(tempdir)
+            resources = _get_resources(3)
+            expected = cache.run(resources, cache_dir=cache_dir)
+
+            with mock.patch.object(onlinejudge_template.analyzer.combined, 'run', side_effect=AssertionError('the analyzer must not run')):
+                actual = cache.run(_get_resources(3), cache_dir=cache_dir)
+            self.assertEqual(str(actual.input_format), str(expected.input_format))
+            self.assertEqual(actual.input_variables, expected.input_variables)
+            self.assertEqual(actual.resources, resources)
+            self.assertEqual(expected.metrics.counters['cache_misses'], 1)
+            self.assertEqual(actual.metrics.counters, {'cache_hits': 1})
+
+    def test_broken(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            cache_dir = pathlib.Path(tempdir)
+            resources = _get_resources(3)
+            cache.run(resources, cache_dir=cache_dir)
+            path, = cache_dir.glob('*.pickle')
+            path.write_bytes(b'broken')
+
+            self.assertIsNone(cache.load(resources, cache_dir=cache_dir))
+            self.assertFalse(path.exists())
+
+    def test_eviction(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            cache_dir = pathlib.Path(tempdir)
+            cache.run(_get_resources(1), cache_dir=cache_dir)
+            size = sum(path.stat().st_size for path in cache_dir.glob('*.pickle'))
+            for n in range(2, 6):
+                cache.run(_get_resources(n), cache_dir=cache_dir, max_size=3 * size)
+
+            self.assertLessEqual(sum(path.stat().st_size for path in cache_dir.glob('*.pickle')), 3 * size)
+            self.assertIsNotNone(cache.load(_get_resources(5), cache_dir=cache_dir))
+            self.assertIsNone(cache.load(_get_resources(1), cache_dir=cache_dir))
+
+    def test_previous_result(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            cache_dir = pathlib.Path(tempdir)
+            cache.run(_get_resources(3), cache_dir=cache_dir)
+
+            run = onlinejudge_template.analyzer.combined.run
+            with mock.patch.object(onlinejudge_template.analyzer.combined, 'run', wraps=run) as mocked:
+                cache.run(_get_resources(4), cache_dir=cache_dir)
+            previous = mocked.call_args[1]['previous']
+            self.assertIsNotNone(previous)
+            self.assertEqual(previous.fingerprints, onlinejudge_template.analyzer.combined.get_fingerprints(_get_resources(3)))
+
+    def test_eviction_of_latest(self) -> None:
+        """Pointers to the last results are removed with the results.
+        """
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            cache_dir = pathlib.Path(tempdir)
+            cache.run(_get_resources(1), cache_dir=cache_dir)
+            size = sum(path.stat().st_size for path in cache_dir.glob('*.pickle'))
+            for n in range(2, 6):
+                resources = _get_resources(n)
+                cache.run(resources._replace(url='{}?{}'.format(resources.url, n)), cache_dir=cache_dir, max_size=3 * size)
+
+            self.assertEqual(len(list((cache_dir / 'latest').glob('*.txt'))), len(list(cache_dir.glob('*.pickle'))))
+
+    def test_dangling_latest(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            cache_dir = pathlib.Path(tempdir)
+            resources = _get_resources(3)
+            cache.run(resources, cache_dir=cache_dir)
+            path, = cache_dir.glob('*.pickle')
+            path.unlink()
+
+            assert resources.url is not None
+            self.assertIsNone(cache.load_latest(resources.url, cache_dir=cache_dir))
+            self.assertEqual(list((cache_dir / 'latest').glob('*.txt')), [])
@@ -1,6 +1,10 @@
+import contextlib
 import unittest
+from unittest import mock
 
 import onlinejudge_template.analyzer.combined as analyzer
+import onlinejudge_template.analyzer.minimum_tree
+import onlinejudge_template.analyzer.simple_patterns
 from onlinejudge_template.types import *
 
 
@@ -34,3 +38,131 @@ class TestAnalyzerCombined(unittest.TestCase):
         analyzed = analyzer.run(resources)
         self.assertEqual(str(analyzed.input_format), str(input_format))
         self.assertEqual(str(analyzed.output_format), str(output_format))
+
+
+class TestAnalyzerCombinedConcurrency(unittest.TestCase):
+    """TestAnalyzerCombinedConcurrency is a class for stress tests to check run() is thread-safe.
+    """
+    def _list_resources(self) -> List[AnalyzerResources]:
+        return [
+            AnalyzerResources(
+                url='https://atcoder.jp/contests/arc093/tasks/arc093_a',
+                html=b'...skipped...',
+                input_format_string='N\r\nA_1 A_2 ... A_N\r\n',
+                output_format_string=None,
+                sample_cases=[
+                    SampleCase(input=b'3\n3 5 -1\n', output=b'12\n8\n10\n'),
+                    SampleCase(input=b'5\n1 1 1 2 0\n', output=b'4\n4\n4\n2\n4\n'),
+                ],
+            ),
+            AnalyzerResources(
+                url=None,
+                html=None,
+                input_format_string=None,
+                output_format_string=None,
+                sample_cases=[
+                    SampleCase(input=b'3\n1 2 3\n4 5 6\n7 8 9\n', output=b'Yes\n'),
+                    SampleCase(input=b'1\n1 1 1\n', output=b'No\n'),
+                ],
+            ),
+            AnalyzerResources(
+                url=None,
+                html=None,
+                input_format_string='H W\r\nS_1\r\n:\r\nS_H\r\n',
+                output_format_string='ans\r\n',
+                sample_cases=[
+                    SampleCase(input=b'2 3\n#.#\n...\n', output=b'2\n'),
+                ],
+            ),
+        ]
+
+    def _summarize(self, analyzed: AnalyzerResult) -> Tuple[str, str, str, str]:
+        return (str(analyzed.input_format), str(analyzed.output_format), str(analyzed.input_variables), str(analyzed.output_variables))
+
+    def test_run_many_thread(self) -> None:
+        resources_list = self._list_resources() * 10
+        expected = [self._summarize(analyzer.run(resources)) for resources in resources_list]
+        actual = analyzer.run_many(resources_list, workers=8, executor='thread')
+        self.assertEqual([self._summarize(analyzed) for analyzed, _ in actual], expected)
+        self.assertEqual([e for _, e in actual], [None] * len(resources_list))
+
+    def test_run_many_process(self) -> None:
+        resources_list = self._list_resources()
+        expected = [self._summarize(analyzer.run(resources)) for resources in resources_list]
+        actual = analyzer.run_many(resources_list, workers=2, executor='process')
+        self.assertEqual([self._summarize(analyzed) for analyzed, _ in actual], expected)
+
+    def test_run_many_with_failures(self) -> None:
+        broken = AnalyzerResources(url=None, html=None, input_format_string=None, output_format_string=None, sample_cases=[SampleCase(input=b'\xff\n', output=b'1\n')])
+        resources_list = [broken, *self._list_resources()]
+        actual = analyzer.run_many(resources_list, workers=4)
+        self.assertIsInstance(actual[0][1], UnicodeDecodeError)
+        self.assertIsNone(actual[0][0].input_format)
+        self.assertEqual([e for _, e in actual[1:]], [None] * (len(resources_list) - 1))
+        self.assertIsNotNone(actual[1][0].input_format)
+
+
+class TestAnalyzerCombinedIncremental(unittest.TestCase):
+    """TestAnalyzerCombinedIncremental is a class to test reusing previous results.
+    """
+
+    resources = AnalyzerResources(
+        url='https://example.com/problem/a',
+        html=b'...skipped...',
+        input_format_string=None,
+        output_format_string=None,
+        sample_cases=[
+            SampleCase(input=b'3\n1 2 3\n4 5 6\n7 8 9\n', output=b'Yes\n'),
+            SampleCase(input=b'1\n1 1 1\n', output=b'No\n'),
+        ],
+    )
+
+    def _disable_search(self) -> Any:
+        error = AssertionError('the search must not run')
+        stack = contextlib.ExitStack()
+        stack.enter_context(mock.patch.object(onlinejudge_template.analyzer.minimum_tree, 'construct_minimum_input_format_tree', side_effect=error))
+        stack.enter_context(mock.patch.object(onlinejudge_template.analyzer.minimum_tree, 'construct_minimum_output_format_tree', side_effect=error))
+        stack.enter_context(mock.patch.object(onlinejudge_template.analyzer.minimum_tree, 'construct_minimum_output_format_tree_using_input_format', side_effect=error))
+        stack.enter_context(mock.patch.object(onlinejudge_template.analyzer.simple_patterns, 'guess_format_with_pattern_matching', side_effect=error))
+        stack.enter_context(mock.patch.object(onlinejudge_template.analyzer.simple_patterns, 'guess_output_format_with_pattern_matching_using_input_format', side_effect=error))
+        return stack
+
+    def test_unchanged(self) -> None:
+        previous = analyzer.run(self.resources)
+        self.assertIsNotNone(previous.input_format)
+        with self._disable_search():
+            analyzed = analyzer.run(self.resources, previous=previous)
+        self.assertEqual(str(analyzed.input_format), str(previous.input_format))
+        self.assertEqual(str(analyzed.output_format), str(previous.output_format))
+        self.assertEqual(analyzed.input_variables, previous.input_variables)
+
+    def test_statement_changed(self) -> None:
+        """A fix of the statement (or a token in the page) doesn't invalidate the searched trees.
+        """
+
+        previous = analyzer.run(self.resources)
+        resources = self.resources._replace(html=b'...skipped, and fixed...')
+        with self._disable_search():
+            analyzed = analyzer.run(resources, previous=previous)
+        self.assertEqual(str(analyzed.input_format), str(previous.input_format))
+        self.assertEqual(str(analyzed.output_format), str(previous.output_format))
+        self.assertEqual(analyzed.fingerprints, previous.fingerprints)
+
+    def test_sample_added(self) -> None:
+        previous = analyzer.run(self.resources)
+        resources = self.resources._replace(sample_cases=[*self.resources.sample_cases, SampleCase(input=b'2\n100 200 300\n-1 -2 -3\n', output=b'Yes\n')])
+        expected = analyzer.run(resources)
+        with self._disable_search():
+            analyzed = analyzer.run(resources, previous=previous)
+        self.assertEqual(str(analyzed.input_format), str(expected.input_format))
+        self.assertEqual(str(analyzed.output_format), str(expected.output_format))
+        self.assertEqual(analyzed.input_variables, expected.input_variables)  # types and ranges are recomputed
+        self.assertEqual(analyzed.fingerprints, expected.fingerprints)
+
+    def test_sample_added_with_another_format(self) -> None:
+        previous = analyzer.run(self.resources)
+        resources = self.resources._replace(sample_cases=[*self.resources.sample_cases, SampleCase(input=b'1\n1 1\n', output=b'No\n')])
+        expected = analyzer.run(resources)
+        analyzed = analyzer.run(resources, previous=previous)
+        self.assertNotEqual(str(analyzed.input_format), str(previous.input_format))
+        self.assertEqual(str(analyzed.input_format), str(expected.input_format))
@@ -0,0 +1,69 @@
+import unittest
+
+import onlinejudge_template.analyzer.constraints as analyzer
+from onlinejudge_template.types import *
+
+
+class TestConstraintsParser(unittest.TestCase):
+    """TestConstraintsParser is a class for unit tests about the parser of constraints (without network access).
+    """
+    def test_atcoder(self) -> None:
+        url = 'https://atcoder.jp/contests/abc999/tasks/abc999_a'
+        html = r"""<div class="part"><section><h3>Constraints</h3><ul>
+        <li><var>1 \leq N \leq 2 \times 10^5</var></li>
+        <li><var>1 \leq A_i \leq 10^9 \ (1 \leq i \leq N)</var></li>
+        <li><var>0 \leq K &lt; N</var></li>
+        <li><var>1 \leq X, Y \leq 10^{18}</var></li>
+        <li>All values in input are integers.</li>
+        </ul></section></div>""".encode()
+        expected = {
+            'N': ('1', '200000'),
+            'A': ('1', '1000000000'),
+            'K': ('0', 'N - 1'),
+            'X': ('1', '1000000000000000000'),
+            'Y': ('1', '1000000000000000000'),
+        }
+
+        self.assertEqual(analyzer.parse_constraints(html, url=url), expected)
+
+    def test_codeforces(self) -> None:
+        url = 'https://codeforces.com/contest/1/problem/A'
+        html = r"""<div class="input-specification"><div class="section-title">Input</div>
+        <p>The first line contains one integer $$$t$$$ ($$$1 \le t \le 10^4$$$) &mdash; the number of test cases.</p>
+        <p>The first line of each test case contains $$$n$$$ ($$$2 \le n \le 2 \cdot 10^5$$$). The second line contains $$$a_1, a_2, \dots, a_n$$$ ($$$-10^9 \le a_i \le 10^9$$$).</p>
+        </div>""".encode()
+        expected = {
+            't': ('1', '10000'),
+            'n': ('2', '200000'),
+            'a': ('- 1000000000', '1000000000'),
+        }
+
+        self.assertEqual(analyzer.parse_constraints(html, url=url), expected)
+
+    def test_yukicoder(self) -> None:
+        url = 'https://yukicoder.me/problems/no/1'
+        html = r"""<div class="block"><h4>入力</h4><pre>N M</pre>
+        <p>$1 \leq N \leq 100\,000$</p>
+        <p>\(2 \le M \lt 2^{30}\)</p>
+        </div>""".encode()
+        expected = {
+            'N': ('1', '100000'),
+            'M': ('2', '1073741823'),
+        }
+
+        self.assertEqual(analyzer.parse_constraints(html, url=url), expected)
+
+    def test_contradicting_samples(self) -> None:
+        variables = {
+            VarName('N'): VarDecl(name=VarName('N'), type=VarType.IndexInt, dims=[], bases=[], depending=set(), observed_range=(1, 100)),
+            VarName('S'): VarDecl(name=VarName('S'), type=VarType.String, dims=[], bases=[], depending=set()),
+        }
+        constraints = {
+            VarName('N'): (Expr('1'), Expr('10')),
+            VarName('S'): (Expr('1'), Expr('10')),
+        }
+
+        updated = analyzer.update_variables_with_constraints(variables=variables, constraints=constraints)
+        self.assertIsNone(updated[VarName('N')].lower_bound)
+        self.assertIsNone(updated[VarName('N')].upper_bound)
+        self.assertIsNone(updated[VarName('S')].upper_bound)
@@ -44,3 +44,24 @@ class TestMinimumTree(unittest.TestCase):
 
         actual = analyzer.match_format(node=node, data=data, variables={decl.name: decl for decl in variables})
         self.assertEqual(actual, expected)
+
+    def test_callback(self) -> None:
+        node = SequenceNode(items=[
+            ItemNode(indices=[], name='n'),
+            NewlineNode(),
+            LoopNode(name='i', size='n', body=ItemNode(indices=['i'], name='a')),
+            NewlineNode(),
+        ])
+        data = textwrap.dedent("""\
+        3
+        5 3 2
+        """)
+        variables = [
+            VarDecl(name=VarName('n'), type=None, dims=[], bases=[], depending=set()),
+            VarDecl(name=VarName('a'), type=None, dims=[Expr('n')], bases=[Expr('0')], depending={VarName('n')}),
+        ]
+
+        events: List[Tuple[VarName, Tuple[int, ...], Union[int, float, str]]] = []
+        actual = analyzer.match_format(node=node, data=data, variables={decl.name: decl for decl in variables}, callback=lambda name, index, value: events.append((name, index, value)))
+        self.assertEqual(events, [('n', (), 3), ('a', (0, ), 5), ('a', (1, ), 3), ('a', (2, ), 2)])
+        self.assertEqual(actual, {'n': {(): 3}, 'a': {}})  # values which are not used as sizes are not stored
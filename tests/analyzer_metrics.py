@@ -0,0 +1,90 @@
+import threading
+import tracemalloc
+import unittest
+
+import onlinejudge_template.analyzer.combined as analyzer
+import onlinejudge_template.analyzer.metrics as metrics
+from onlinejudge_template.types import *
+
+
+class TestMetrics(unittest.TestCase):
+    def test_collect(self) -> None:
+        with metrics.collect() as collector:
+            metrics.count('foo')
+            metrics.count('foo', 2)
+            metrics.maximize('bar', 3)
+            metrics.maximize('bar', 1)
+            with metrics.timer('baz'):
+                pass
+            with metrics.collect() as inner:
+                metrics.count('foo')
+        result = collector.get_metrics()
+        self.assertEqual(result.counters, {'foo': 3, 'bar': 3})
+        self.assertEqual(list(result.timers.keys()), ['baz'])
+        self.assertEqual(inner.get_metrics().counters, {'foo': 1})
+
+    def test_without_collect(self) -> None:
+        metrics.count('foo')
+        with metrics.timer('bar'):
+            pass
+
+    def test_threads(self) -> None:
+        def target() -> None:
+            for _ in range(1000):
+                metrics.count('foo')
+
+        with metrics.collect() as collector:
+            thread = threading.Thread(target=target)
+            thread.start()
+            thread.join()
+            metrics.count('foo')
+        self.assertEqual(collector.get_metrics().counters, {'foo': 1})
+
+    def test_format(self) -> None:
+        result = AnalyzerMetrics(timers={'typing': 0.0125, 'total': 0.5}, counters={'match': 2, 'evaluate': 10})
+        self.assertEqual(metrics.format_metrics(result), 'total=0.500s typing=0.013s evaluate=10 match=2')
+
+    @unittest.skipUnless(hasattr(tracemalloc, 'reset_peak'), 'tracemalloc.reset_peak requires Python 3.9')
+    def test_peak_memory(self) -> None:
+        tracemalloc.start()
+        try:
+            with metrics.collect() as collector:
+                with metrics.timer('outer'):
+                    with metrics.timer('large'):
+                        data = [0] * 1000000
+                        del data
+                    with metrics.timer('small'):
+                        data = [0] * 1000
+                        del data
+        finally:
+            tracemalloc.stop()
+        counters = collector.get_metrics().counters
+        self.assertGreaterEqual(counters['peak_memory:large'], 8000000)
+        self.assertLess(counters['peak_memory:small'], 1000000)
+        self.assertGreaterEqual(counters['peak_memory:outer'], counters['peak_memory:large'])
+
+    def test_peak_memory_without_tracemalloc(self) -> None:
+        with metrics.collect() as collector:
+            with metrics.timer('foo'):
+                pass
+        self.assertEqual(collector.get_metrics().counters, {})
+
+
+class TestAnalyzerMetrics(unittest.TestCase):
+    def test_run(self) -> None:
+        resources = AnalyzerResources(
+            url='https://atcoder.jp/contests/arc093/tasks/arc093_a',
+            html=None,
+            input_format_string='N\r\nA_1 A_2 ... A_N\r\n',
+            output_format_string=None,
+            sample_cases=[
+                SampleCase(input=b'3\n3 5 -1\n', output=b'12\n8\n10\n'),
+                SampleCase(input=b'5\n1 1 1 2 0\n', output=b'4\n4\n4\n2\n4\n'),
+            ],
+        )
+        analyzed = analyzer.run(resources)
+        self.assertIsNotNone(analyzed.metrics)
+        for name in ('total', 'format_parse', 'pattern_match', 'typing', 'constants', 'output_type'):
+            self.assertIn(name, analyzed.metrics.timers)
+        self.assertGreater(analyzed.metrics.counters['match'], 0)
+        self.assertGreater(analyzed.metrics.counters['simplify'], 0)
@@ -217,3 +217,23 @@ class TestMinimumTree(unittest.TestCase):
         actual = analyzer.construct_minimum_input_format_tree(instances=instances, multiple_test_cases=True)
         print(actual)
         self.assertEqual(str(actual), str(expected))
+
+    def test_multiple_test_cases_with_many_cases(self) -> None:
+        """The sample is split into many small test cases before searching.
+        """
+        instances = [
+            '200\n' + ''.join(['{}\n{}\n'.format(i % 5 + 1, ' '.join(map(str, range(i % 5 + 1)))) for i in range(200)]),
+        ]
+        expected = SequenceNode(items=[
+            ItemNode(name='testcases'),
+            NewlineNode(),
+            LoopNode(size='testcases', name='i', body=SequenceNode(items=[
+                ItemNode(name='a', indices=['i']),
+                NewlineNode(),
+                LoopNode(size='a_i', name='j', body=ItemNode(name='b', indices=['i', 'j'])),
+                NewlineNode(),
+            ])),
+        ])
+
+        actual = analyzer.construct_minimum_input_format_tree(instances=instances, multiple_test_cases=True)
+        self.assertEqual(str(actual), str(expected))
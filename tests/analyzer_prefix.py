@@ -0,0 +1,82 @@
+import unittest
+
+import onlinejudge_template.analyzer.combined
+import onlinejudge_template.analyzer.prefix as analyzer
+from onlinejudge_template.types import *
+
+
+class TestPrefix(unittest.TestCase):
+    def test_truncate_horizontal(self) -> None:
+        data = '1000 3\n' + ' '.join(map(str, range(1000))) + '\n'
+        expected = '10 3\n' + ' '.join(map(str, range(10))) + '\n'
+        self.assertEqual(analyzer.truncate_sample(data, max_lines=10, max_tokens=10), expected)
+
+    def test_truncate_vertical(self) -> None:
+        data = '1000\n' + ''.join('{} {}\n'.format(i, i * i) for i in range(1000))
+        expected = '5\n' + ''.join('{} {}\n'.format(i, i * i) for i in range(5))
+        self.assertEqual(analyzer.truncate_sample(data, max_lines=5, max_tokens=10), expected)
+
+    def test_truncate_avoids_other_values(self) -> None:
+        data = '10 1000\n' + ' '.join(map(str, range(1000))) + '\n'
+        expected = '10 9\n' + ' '.join(map(str, range(9))) + '\n'
+        self.assertEqual(analyzer.truncate_sample(data, max_lines=10, max_tokens=10), expected)
+
+    def test_small_or_unknown(self) -> None:
+        self.assertIsNone(analyzer.truncate_sample('3\n1 2 3\n', max_lines=10, max_tokens=10))
+        self.assertIsNone(analyzer.truncate_sample('abc\n' + 'x\n' * 100, max_lines=10, max_tokens=10))
+
+    def test_combined_with_large_sample(self) -> None:
+        """The result with truncation must be the same to the result without truncation.
+        """
+
+        n = 3000
+        resources = AnalyzerResources(
+            url=None,
+            html=None,
+            input_format_string=None,
+            output_format_string=None,
+            sample_cases=[
+                SampleCase(input=('{}\n'.format(n) + ''.join('{} {} {}\n'.format(i, i % 7, i * 3) for i in range(n))).encode(), output=b'42\n'),
+                SampleCase(input=b'2\n1 2 3\n4 5 6\n', output=b'7\n'),
+            ],
+        )
+
+        expected = onlinejudge_template.analyzer.combined.run(resources, max_sample_lines=None, max_sample_tokens=None)
+        actual = onlinejudge_template.analyzer.combined.run(resources, max_sample_lines=100, max_sample_tokens=100)
+        self.assertIsNotNone(actual.input_format)
+        self.assertEqual(str(actual.input_format), str(expected.input_format))
+        self.assertEqual(actual.input_variables, expected.input_variables)
+        self.assertEqual(str(actual.output_format), str(expected.output_format))
+        self.assertEqual(actual.output_variables, expected.output_variables)
+
+    def test_truncate_long_line(self) -> None:
+        """Very long lines are read without splitting them at once.
+        """
+
+        data = '100000\n' + ' '.join(map(str, range(100000))) + '\n'
+        expected = '10\n' + ' '.join(map(str, range(10))) + '\n'
+        self.assertEqual(analyzer.truncate_sample(data, max_lines=10, max_tokens=10), expected)
+
+    def test_combined_with_memory_budget(self) -> None:
+        n = 3000
+        large = SampleCase(input=('{}\n'.format(n) + ''.join('{} {} {}\n'.format(i, i % 7, i * 3) for i in range(n))).encode(), output=b'42\n')
+        small = SampleCase(input=b'2\n1 2 3\n4 5 6\n', output=b'7\n')
+        resources = AnalyzerResources(url=None, html=None, input_format_string=None, output_format_string=None, sample_cases=[large, small])
+        memory_budget = onlinejudge_template.analyzer.combined.estimate_memory_usage([small])
+
+        expected = onlinejudge_template.analyzer.combined.run(resources)
+        actual = onlinejudge_template.analyzer.combined.run(resources, memory_budget=memory_budget)
+        self.assertIsNotNone(actual.input_format)
+        self.assertEqual(str(actual.input_format), str(expected.input_format))
+        self.assertIsNotNone(actual.output_format)
+        self.assertEqual(str(actual.output_format), str(expected.output_format))
+        assert actual.input_variables is not None
+        self.assertTrue(all(decl.observed_range is None for decl in actual.input_variables.values()))
+        assert actual.metrics is not None
+        self.assertEqual(actual.metrics.counters.get('memory_budget_exceeded'), 1)
+
+        # the budget is not used when the samples are small enough
+        unlimited = onlinejudge_template.analyzer.combined.run(resources, memory_budget=onlinejudge_template.analyzer.combined.estimate_memory_usage([large, small]))
+        assert unlimited.metrics is not None
+        self.assertNotIn('memory_budget_exceeded', unlimited.metrics.counters)
+        self.assertEqual(unlimited.input_variables, expected.input_variables)
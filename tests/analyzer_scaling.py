@@ -0,0 +1,122 @@
+"""
+tests to check the growth rates of analyzers
+
+これらのテストは合成した sample や入力フォーマットの大きさを変えながら解析器の実行時間を測り、log-log 平面での最小二乗法で実行時間の増加の指数を推定します。
+推定した指数が宣言した上限を超えた場合に失敗します。
+大きさの上限はデフォルトでは 10^4 で、環境変数 ``ONLINEJUDGE_TEMPLATE_SCALING_MAX_SIZE`` で 10^6 などに変更できます。
+"""
+
+import math
+import os
+import time
+import unittest
+from typing import *
+
+import onlinejudge_template.analyzer.match as match
+import onlinejudge_template.analyzer.minimum_tree as minimum_tree
+import onlinejudge_template.analyzer.parser as parser
+import onlinejudge_template.analyzer.simple_patterns as simple_patterns
+import onlinejudge_template.analyzer.typing as typing
+import onlinejudge_template.analyzer.variables as variables
+from onlinejudge_template.types import *
+
+LINEAR_BOUND = 1.3  # the bound for exponents of analyzers which should run in linear time
+
+
+def get_sizes() -> List[int]:
+    max_size = int(os.environ.get('ONLINEJUDGE_TEMPLATE_SCALING_MAX_SIZE', 10**4))
+    sizes: List[int] = []
+    k = 4
+    while round(10**(k / 2)) <= max_size:
+        sizes.append(round(10**(k / 2)))
+        k += 1
+    return sizes
+
+
+def measure(f: Callable[[], Any], *, repeat: int = 3) -> float:
+    """measure returns the best of wall-times, to reduce noises.
+    """
+
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def fit_exponent(sizes: List[int], seconds: List[float]) -> float:
+    """fit_exponent returns `k` such that `seconds` is approximately proportional to `sizes` ** `k`, with the least squares method on log-log.
+    """
+
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in seconds]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    numerator = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys))
+    denominator = sum((x - x_mean)**2 for x in xs)
+    return numerator / denominator
+
+
+def make_sample(n: int) -> str:
+    return f"""{n}\n""" + ' '.join(str(i) for i in range(n)) + '\n'
+
+
+def make_format_string(n: int) -> str:
+    return ' '.join(f"""a_{i}""" for i in range(1, n + 1)) + '\n'
+
+
+class TestFitExponent(unittest.TestCase):
+    def test_linear(self) -> None:
+        self.assertAlmostEqual(fit_exponent([10, 100, 1000], [0.1, 1.0, 10.0]), 1.0)
+
+    def test_quadratic(self) -> None:
+        self.assertAlmostEqual(fit_exponent([10, 100, 1000], [0.01, 1.0, 100.0]), 2.0)
+
+
+class TestScaling(unittest.TestCase):
+    def setUp(self) -> None:
+        self.format = parser.run("N\nA_1 A_2 ... A_N\n")
+        self.variables = variables.list_declared_variables(self.format)
+
+    def assertScaling(self, f: Callable[[int], Callable[[], Any]], *, bound: float) -> None:
+        sizes = get_sizes()
+        seconds = [measure(f(n)) for n in sizes]
+        exponent = fit_exponent(sizes, seconds)
+        message = 'measured exponent {:.2f} exceeds the bound {:.2f}: {}'.format(exponent, bound, ', '.join(f"""n={n}: {t:.4f}s""" for n, t in zip(sizes, seconds)))
+        self.assertLessEqual(exponent, bound, msg=message)
+
+    def test_match_format(self) -> None:
+        def f(n: int) -> Callable[[], Any]:
+            sample = make_sample(n)
+            return lambda: match.match_format(self.format, sample, variables=self.variables)
+
+        self.assertScaling(f, bound=LINEAR_BOUND)
+
+    def test_infer_types_from_instances(self) -> None:
+        def f(n: int) -> Callable[[], Any]:
+            sample = make_sample(n)
+            return lambda: typing.infer_types_from_instances(self.format, variables=self.variables, instances=[sample])
+
+        self.assertScaling(f, bound=LINEAR_BOUND)
+
+    def test_guess_format_with_pattern_matching(self) -> None:
+        def f(n: int) -> Callable[[], Any]:
+            sample = make_sample(n)
+            return lambda: simple_patterns.guess_format_with_pattern_matching(instances=[sample])
+
+        self.assertScaling(f, bound=LINEAR_BOUND)
+
+    def test_construct_minimum_input_format_tree(self) -> None:
+        def f(n: int) -> Callable[[], Any]:
+            sample = make_sample(n)
+            return lambda: minimum_tree.construct_minimum_input_format_tree(instances=[sample])
+
+        self.assertScaling(f, bound=LINEAR_BOUND)
+
+    def test_parser_run(self) -> None:
+        def f(n: int) -> Callable[[], Any]:
+            format_string = make_format_string(n)
+            return lambda: parser.run(format_string)
+
+        self.assertScaling(f, bound=LINEAR_BOUND)
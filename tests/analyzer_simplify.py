@@ -1,3 +1,4 @@
+import concurrent.futures
 import unittest
 
 import onlinejudge_template.analyzer.simplify as simplify
@@ -161,3 +162,18 @@ class TestVariableUtils(unittest.TestCase):
 
         actual = simplify.format_subscripted_variable(name=name, indices=indices)
         self.assertEqual(actual, expected)
+
+
+class TestConcurrency(unittest.TestCase):
+    def test_threads(self) -> None:
+        """The PLY parsers are built in many threads at the same time.
+        """
+
+        exprs = [Expr('(n + {}) * (n - {}) / {} + a_{{{}}}'.format(k, k, k + 1, k % 3)) for k in range(64)]
+        env = {VarName('n'): 7, VarName('a'): [100, 200, 300]}
+        expected = [(simplify.simplify(expr), simplify.evaluate(expr, env=env)) for expr in exprs]
+        simplify._parse.cache_clear()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+            actual = list(executor.map(lambda expr: (simplify.simplify(expr), simplify.evaluate(expr, env=env)), exprs))
+        self.assertEqual(actual, expected)
@@ -0,0 +1,84 @@
+import textwrap
+import unittest
+
+import onlinejudge_template.analyzer.typing as analyzer
+from onlinejudge_template.analyzer.match import FormatMatchError
+from onlinejudge_template.types import *
+
+
+class TestTyping(unittest.TestCase):
+    def test_ranges(self) -> None:
+        node = SequenceNode(items=[
+            ItemNode(name='n'),
+            NewlineNode(),
+            LoopNode(name='i', size='n', body=ItemNode(name='a', indices=['i'])),
+            NewlineNode(),
+            ItemNode(name='s'),
+            NewlineNode(),
+        ])
+        variables = {
+            VarName('n'): VarDecl(name=VarName('n'), type=None, dims=[], bases=[], depending=set()),
+            VarName('a'): VarDecl(name=VarName('a'), type=None, dims=[Expr('n')], bases=[Expr('0')], depending={VarName('n')}),
+            VarName('s'): VarDecl(name=VarName('s'), type=None, dims=[], bases=[], depending=set()),
+        }
+        instances = [
+            textwrap.dedent("""\
+            3
+            -5 3 18446744073709551615
+            abc
+            """),
+            textwrap.dedent("""\
+            1
+            7
+            123
+            """),
+        ]
+
+        types, ranges = analyzer.infer_types_and_ranges_from_instances(node, variables=variables, instances=instances)
+        self.assertEqual(types, {'n': VarType.IndexInt, 'a': VarType.ValueInt, 's': VarType.String})
+        self.assertEqual(ranges, {'n': (1, 3), 'a': (-5, 18446744073709551615)})
+
+        variables = analyzer.update_variables_with_types(variables=variables, types=types)
+        variables = analyzer.update_variables_with_ranges(variables=variables, ranges=ranges)
+        self.assertEqual(variables[VarName('n')].observed_range, (1, 3))
+        self.assertEqual(variables[VarName('a')].observed_range, (-5, 18446744073709551615))
+        self.assertIsNone(variables[VarName('s')].observed_range)
+
+    def test_saturation(self) -> None:
+        node = SequenceNode(items=[
+            ItemNode(name='s'),
+            ItemNode(name='t'),
+            NewlineNode(),
+        ])
+        variables = {
+            VarName('s'): VarDecl(name=VarName('s'), type=None, dims=[], bases=[], depending=set()),
+            VarName('t'): VarDecl(name=VarName('t'), type=None, dims=[], bases=[], depending=set()),
+        }
+        instances = [
+            'abc def\n',
+            '1 2\n',
+        ]
+
+        types, ranges = analyzer.infer_types_and_ranges_from_instances(node, variables=variables, instances=instances)
+        self.assertEqual(types, {'s': VarType.String, 't': VarType.String})
+        self.assertEqual(ranges, {})
+
+        # the rest of instances are still matched after saturation
+        with self.assertRaises(FormatMatchError):
+            analyzer.infer_types_and_ranges_from_instances(node, variables=variables, instances=['abc def\n', 'this does not match\n'])
+
+    def test_no_values(self) -> None:
+        node = SequenceNode(items=[
+            ItemNode(name='n'),
+            NewlineNode(),
+            LoopNode(name='i', size='n', body=ItemNode(name='a', indices=['i'])),
+            NewlineNode(),
+        ])
+        variables = {
+            VarName('n'): VarDecl(name=VarName('n'), type=None, dims=[], bases=[], depending=set()),
+            VarName('a'): VarDecl(name=VarName('a'), type=None, dims=[Expr('n')], bases=[Expr('0')], depending={VarName('n')}),
+        }
+
+        self.assertRaises(analyzer.TypingError, lambda: analyzer.infer_types_and_ranges_from_instances(node, variables=variables, instances=['0\n\n']))
+        types, _ = analyzer.infer_types_and_ranges_from_instances(node, variables=variables, instances=['0\n\n', '2\n1.5 2\n'])
+        self.assertEqual(types, {'n': VarType.IndexInt, 'a': VarType.Float})
@@ -0,0 +1,50 @@
+import unittest
+from unittest import mock
+
+import onlinejudge_command.download_history
+
+import benchmarks.memory
+import benchmarks.prepare
+import benchmarks.run
+from benchmarks.corpus import load_corpus
+from tests.http_fixtures import make_atcoder_contest_exchanges
+
+
+class TestBenchmarks(unittest.TestCase):
+    """TestBenchmarks is a class to check that the benchmark suite works (without network access).
+    """
+    def test_corpus(self) -> None:
+        problems = load_corpus()
+        self.assertGreaterEqual(len(problems), 10)
+        for site in ('atcoder', 'codeforces', 'yukicoder', 'librarychecker', 'topcoder'):
+            self.assertTrue(any(problem.name.startswith(site + '_') for problem in problems))
+
+    def test_run_benchmarks(self) -> None:
+        problems = [problem for problem in load_corpus() if problem.name in ('atcoder_agc041_b', 'topcoder_11213')]
+        result = benchmarks.run.run_benchmarks(problems, repeat=2, templates=['main.py'])
+        for name in ('atcoder_agc041_b', 'topcoder_11213'):
+            stages = result['problems'][name]
+            for stage in ('prepare_from_html', 'analyze:total', 'generate:main.py'):
+                self.assertEqual(stages[stage]['count'], 2)
+                self.assertLessEqual(stages[stage]['min'], stages[stage]['median'])
+                self.assertLessEqual(stages[stage]['median'], stages[stage]['max'])
+        self.assertIn('analyze:format_parse', result['problems']['atcoder_agc041_b'])
+        self.assertIn('analyze:total', result['total'])
+
+    def test_percentile(self) -> None:
+        self.assertEqual(benchmarks.run.percentile([3.0, 1.0, 2.0], 50), 2.0)
+        self.assertEqual(benchmarks.run.percentile([1.0, 2.0], 50), 1.5)
+        self.assertEqual(benchmarks.run.percentile([1.0, 2.0, 3.0, 4.0, 5.0], 90), 4.6)
+        self.assertEqual(benchmarks.run.percentile([7.0], 99), 7.0)
+
+    def test_memory(self) -> None:
+        for name in ('array', 'edges', 'grid'):
+            result = benchmarks.memory.measure_case(name, 300)
+            self.assertGreater(result['sample_bytes'], 300)
+            self.assertNotEqual(result['input_format'], 'None')
+
+    def test_prepare_benchmarks(self) -> None:
+        with mock.patch.object(onlinejudge_command.download_history.DownloadHistory, 'add'), mock.patch.object(onlinejudge_command.download_history.DownloadHistory, 'remove'):
+            result = benchmarks.prepare.run_benchmarks('https://atcoder.jp/contests/abc080', exchanges=make_atcoder_contest_exchanges(), repeat=1, workers=2, templates=['main.py'], executor='thread')
+        self.assertEqual(result['stats']['requests']['max'], 2)  # the tasks page and the tasks_print page
+        self.assertLessEqual(result['stats']['time_to_first_file']['max'], result['stats']['time_to_last_file']['max'])
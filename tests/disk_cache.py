@@ -0,0 +1,38 @@
+import os
+import pathlib
+import tempfile
+import unittest
+
+import onlinejudge_template.disk_cache as disk_cache
+
+
+class TestDiskCache(unittest.TestCase):
+    def test_store_and_load(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = pathlib.Path(tempdir) / 'sub' / 'a.pickle'
+            disk_cache.store({'a': 1}, path)
+            self.assertEqual(disk_cache.load(path), {'a': 1})
+            self.assertEqual(list(path.parent.glob('*.tmp')), [])
+
+    def test_load_missing(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            self.assertIsNone(disk_cache.load(pathlib.Path(tempdir) / 'a.pickle'))
+
+    def test_load_broken(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = pathlib.Path(tempdir) / 'a.pickle'
+            path.write_bytes(b'broken')
+            self.assertIsNone(disk_cache.load(path))
+            self.assertFalse(path.exists())
+
+    def test_evict(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            cache_dir = pathlib.Path(tempdir)
+            paths = [cache_dir / '{}.pickle'.format(i) for i in range(5)]
+            for i, path in enumerate(paths):
+                disk_cache.store(b'x' * 1000, path)
+                os.utime(path, (i, i))
+            disk_cache.touch(paths[0])  # the most recently used
+            removed = disk_cache.evict(cache_dir, max_size=3500)
+            self.assertEqual(removed, paths[1:3])
+            self.assertEqual(sorted(cache_dir.glob('*.pickle')), sorted([paths[0], paths[3], paths[4]]))
@@ -0,0 +1,31 @@
+import unittest
+from typing import *
+
+import onlinejudge_template.generator.cplusplus as cplusplus
+from onlinejudge_template.types import *
+
+
+def _decl(*, dims: Optional[List[str]] = None, observed_range: Optional[Tuple[int, int]] = None, lower_bound: Optional[str] = None, upper_bound: Optional[str] = None) -> VarDecl:
+    return VarDecl(name=VarName('a'), type=VarType.ValueInt, dims=[Expr(dim) for dim in dims or []], bases=[Expr('0') for _ in dims or []], depending=set(), observed_range=observed_range, lower_bound=None if lower_bound is None else Expr(lower_bound), upper_bound=None if upper_bound is None else Expr(upper_bound))
+
+
+class TestValueIntWidth(unittest.TestCase):
+    data: Dict[str, Any] = {'config': {}}
+
+    def test_array(self) -> None:
+        self.assertEqual(cplusplus._get_value_int_width(_decl(dims=['n'], lower_bound='1', upper_bound='1000000000'), data=self.data), 'int32')
+
+    def test_scalar(self) -> None:
+        self.assertEqual(cplusplus._get_value_int_width(_decl(lower_bound='1', upper_bound='1000000000'), data=self.data), 'int64')
+
+    def test_narrow_from_samples(self) -> None:
+        data = {'config': {'narrow_int_from_samples': True}}
+        self.assertEqual(cplusplus._get_value_int_width(_decl(dims=['n'], observed_range=(0, 100)), data=data), 'int32')
+        self.assertEqual(cplusplus._get_value_int_width(_decl(dims=['n'], observed_range=(0, 100)), data=self.data), 'int64')
+
+    def test_unsigned(self) -> None:
+        self.assertEqual(cplusplus._get_value_int_width(_decl(observed_range=(0, 2**64 - 1)), data=self.data), 'uint64')
+
+    def test_too_wide(self) -> None:
+        with self.assertLogs(cplusplus.logger, level='WARNING'):
+            self.assertEqual(cplusplus._get_value_int_width(_decl(observed_range=(-5, 2**64 - 1)), data=self.data), 'int64')
@@ -0,0 +1,135 @@
+import io
+import pathlib
+import tempfile
+import unittest
+from typing import *
+from unittest import mock
+
+import requests
+import requests.adapters
+
+import onlinejudge_template.http_cache as http_cache
+
+URL = 'https://atcoder.jp/contests/abc080/tasks/abc080_a'
+
+
+class FakeServer:
+    """FakeServer replaces the network of HTTPAdapter. It answers 304 to conditional requests with the current ETag.
+    """
+    def __init__(self) -> None:
+        self.body = b'<html>A</html>'
+        self.etag = '"1"'
+        self.offline = False
+        self.cache_control: Optional[str] = None
+        self.requests: List[requests.PreparedRequest] = []
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        if self.offline:
+            raise requests.exceptions.ConnectionError('offline')
+        self.requests.append(request)
+        resp = requests.Response()
+        resp.url = request.url or ''
+        resp.request = request
+        if request.headers.get('If-None-Match') == self.etag:
+            resp.status_code = 304
+            resp._content = b''  # type: ignore
+        else:
+            resp.status_code = 200
+            resp._content = self.body  # type: ignore
+            resp.headers['ETag'] = self.etag
+            resp.headers['Content-Type'] = 'text/html; charset=utf-8'
+            if self.cache_control is not None:
+                resp.headers['Cache-Control'] = self.cache_control
+        resp.raw = io.BytesIO(resp._content)  # type: ignore
+        return resp
+
+
+class TestCachingAdapter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.cache_dir = pathlib.Path(self.tempdir.name)
+        self.server = FakeServer()
+        self.patch = mock.patch.object(requests.adapters.HTTPAdapter, 'send', side_effect=self.server.send)
+        self.patch.start()
+
+    def tearDown(self) -> None:
+        self.patch.stop()
+        self.tempdir.cleanup()
+
+    def get(self, *, max_age: float = 0, cookies: Optional[Dict[str, str]] = None) -> requests.Response:
+        session = requests.Session()
+        http_cache.mount(session, cache_dir=self.cache_dir, max_age=max_age)
+        return session.get(URL, cookies=cookies)
+
+    def test_fresh(self) -> None:
+        self.assertEqual(self.get(max_age=60).content, b'<html>A</html>')
+        resp = self.get(max_age=60)
+        self.assertEqual(resp.content, b'<html>A</html>')
+        self.assertEqual(resp.text, '<html>A</html>')
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_not_modified(self) -> None:
+        self.get()
+        resp = self.get()
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content, b'<html>A</html>')
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.server.requests[1].headers['If-None-Match'], '"1"')
+
+    def test_modified(self) -> None:
+        self.get()
+        self.server.body = b'<html>B</html>'
+        self.server.etag = '"2"'
+        self.assertEqual(self.get().content, b'<html>B</html>')
+        self.server.offline = True
+        self.assertEqual(self.get().content, b'<html>B</html>')
+
+    def test_offline(self) -> None:
+        self.get()
+        self.server.offline = True
+        self.assertEqual(self.get().content, b'<html>A</html>')
+
+    def test_offline_without_cache(self) -> None:
+        self.server.offline = True
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.get()
+
+    def test_cookie(self) -> None:
+        """Responses for logged-in users are not used for others, and vice versa. The cached response is replaced.
+        """
+
+        self.get(max_age=60)
+        self.server.body = b'<html>logged in</html>'
+        self.server.etag = '"2"'
+        self.assertEqual(self.get(max_age=60, cookies={'session': 'x'}).content, b'<html>logged in</html>')
+        self.assertNotIn('If-None-Match', self.server.requests[1].headers)
+        self.assertEqual(self.get(max_age=60, cookies={'session': 'x'}).content, b'<html>logged in</html>')
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(len(list(self.cache_dir.glob('*.pickle'))), 1)
+
+        self.server.body = b'<html>A</html>'
+        self.server.etag = '"1"'
+        self.assertEqual(self.get(max_age=60).content, b'<html>A</html>')
+        self.assertNotIn('If-None-Match', self.server.requests[2].headers)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_no_store(self) -> None:
+        self.server.cache_control = 'private, no-store'
+        self.get(max_age=60)
+        self.server.offline = True
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.get(max_age=60)
+
+    def test_no_cache(self) -> None:
+        self.server.cache_control = 'no-cache'
+        self.get(max_age=60)
+        self.get(max_age=60)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.server.requests[1].headers['If-None-Match'], '"1"')
+
+    def test_eviction(self) -> None:
+        for i in range(5):
+            http_cache.store(http_cache.CacheEntry(version=http_cache._CACHE_FORMAT_VERSION, url=f"""{URL}?{i}""", cookie_hash=None, stored_at=0.0, headers={}, body=b'x' * 1000), cache_dir=self.cache_dir, max_size=3000)
+        self.assertLessEqual(sum(path.stat().st_size for path in self.cache_dir.glob('*.pickle')), 3000)
+        self.assertIsNotNone(http_cache.load(f"""{URL}?4""", cache_dir=self.cache_dir))
+        self.assertIsNone(http_cache.load(f"""{URL}?0""", cache_dir=self.cache_dir))
@@ -0,0 +1,84 @@
+import io
+import pathlib
+import tempfile
+import unittest
+from typing import *
+from unittest import mock
+
+import requests
+import requests.adapters
+
+import onlinejudge_template.http_fixtures as http_fixtures
+
+
+def make_atcoder_contest_exchanges() -> List[http_fixtures.Exchange]:
+    """make_atcoder_contest_exchanges makes a fixture of a contest with two problems, which has the tasks page and the tasks_print page.
+    """
+
+    tasks = '<html><body><table><tbody>'
+    statements = ''
+    for i, c in enumerate('ab'):
+        tasks += f"""<tr><td>{c.upper()}</td><td><a href="/contests/abc080/tasks/abc080_{c}">Problem {c.upper()}</a></td><td>2 sec</td><td>256 MB</td><td></td></tr>"""
+        statements += f"""<div class="col-sm-12"><span class="h2">{c.upper()} - Problem {c.upper()}</span><div id="task-statement"><span class="lang"><span class="lang-en">
+<div class="part"><section><h3>Input</h3><p>Input is given from Standard Input in the following format:</p><pre><var>N</var>
+</pre></section></div>
+<div class="part"><section><h3>Output</h3><p>Print the answer.</p></section></div>
+<div class="part"><section><h3>Sample Input 1</h3><pre>{i + 1}
+</pre></section></div>
+<div class="part"><section><h3>Sample Output 1</h3><pre>{i + 2}
+</pre></section></div>
+</span></span></div></div>"""
+    tasks += '</tbody></table></body></html>'
+    headers = {'Content-Type': 'text/html; charset=utf-8'}
+    return [
+        http_fixtures.Exchange(method='GET', url='https://atcoder.jp/contests/abc080/tasks', status_code=200, headers=headers, body=tasks.encode()),
+        http_fixtures.Exchange(method='GET', url='https://atcoder.jp/contests/abc080/tasks_print', status_code=200, headers=headers, body=('<html><body>' + statements + '</body></html>').encode()),
+    ]
+
+
+class TestHTTPFixtures(unittest.TestCase):
+    def test_record_and_replay(self) -> None:
+        def send(request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+            resp = requests.Response()
+            resp.status_code = 200
+            resp.url = request.url or ''
+            resp.headers['Content-Type'] = 'application/octet-stream'
+            resp.headers['Set-Cookie'] = 'secret'
+            resp._content = b'\xff\x00' if request.url and request.url.endswith('.bin') else b'<html>' + (request.url or '').encode() + b'</html>'  # type: ignore
+            resp.raw = io.BytesIO(resp._content)  # type: ignore
+            return resp
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir) / 'fixture.json'
+            session = requests.Session()
+            with mock.patch.object(requests.adapters.HTTPAdapter, 'send', side_effect=send):
+                with http_fixtures.record(session, path):
+                    session.get('https://example.com/a')
+                    session.get('https://example.com/b.bin')
+            self.assertNotIn('secret', path.read_text())
+
+            session = requests.Session()
+            http_fixtures.replay(session, path)
+            self.assertEqual(session.get('https://example.com/a').content, b'<html>https://example.com/a</html>')
+            self.assertEqual(session.get('https://example.com/b.bin').content, b'\xff\x00')
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                session.get('https://example.com/c')
+
+    def test_replay_in_order(self) -> None:
+        exchanges = [http_fixtures.Exchange(method='GET', url='https://example.com/', status_code=200, headers={}, body=str(i).encode()) for i in range(2)]
+        adapter = http_fixtures.ReplayAdapter(exchanges)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        self.assertEqual([session.get('https://example.com/').content for _ in range(3)], [b'0', b'1', b'1'])
+        self.assertEqual(adapter.request_count, 3)
+
+    def test_redirect(self) -> None:
+        exchanges = [
+            http_fixtures.Exchange(method='GET', url='https://example.com/old', status_code=302, headers={'Location': 'https://example.com/new'}, body=b''),
+            http_fixtures.Exchange(method='GET', url='https://example.com/new', status_code=200, headers={}, body=b'new'),
+        ]
+        session = requests.Session()
+        session.mount('https://', http_fixtures.ReplayAdapter(exchanges))
+        resp = session.get('https://example.com/old')
+        self.assertEqual(resp.content, b'new')
+        self.assertEqual(resp.url, 'https://example.com/new')
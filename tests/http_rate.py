@@ -0,0 +1,150 @@
+import io
+import threading
+import time
+import unittest
+from typing import *
+from unittest import mock
+
+import requests
+import requests.adapters
+
+import onlinejudge_template.http_rate as http_rate
+
+URL = 'https://atcoder.jp/contests/abc080/tasks_print'
+
+
+def make_response(status_code: int, *, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status_code
+    resp.url = URL
+    resp.headers.update(headers or {})
+    resp._content = b''  # type: ignore
+    resp.raw = io.BytesIO(b'')  # type: ignore
+    return resp
+
+
+class TestRateController(unittest.TestCase):
+    def get(self, controller: http_rate.RateController, responses: List[Any], *, method: str = 'GET') -> Tuple[Union[requests.Response, Exception], int]:
+        """get sends a request with fake responses, and returns the result and the number of sent requests.
+        """
+
+        session = requests.Session()
+        session.mount('https://', http_rate.RateLimitedAdapter(controller=controller))
+        with mock.patch.object(requests.adapters.HTTPAdapter, 'send', side_effect=responses) as send:
+            try:
+                result: Union[requests.Response, Exception] = session.request(method, URL)
+            except Exception as e:
+                result = e
+        return result, send.call_count
+
+    def test_retry(self) -> None:
+        controller = http_rate.RateController(backoff_base=0.001)
+        resp, count = self.get(controller, [make_response(503), make_response(429), make_response(200)])
+        assert isinstance(resp, requests.Response)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(count, 3)
+        stats = controller.get_stats()
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['retries'], 2)
+        self.assertEqual(stats['throttled'], 2)
+
+    def test_give_up(self) -> None:
+        controller = http_rate.RateController(backoff_base=0.001, max_retries=2)
+        resp, count = self.get(controller, [make_response(500)] * 3)
+        assert isinstance(resp, requests.Response)
+        self.assertEqual(resp.status_code, 500)
+        self.assertEqual(count, 3)
+
+    def test_connection_error(self) -> None:
+        controller = http_rate.RateController(backoff_base=0.001, max_retries=2)
+        error = requests.exceptions.ConnectionError('reset')
+        result, count = self.get(controller, [error, make_response(200)])
+        assert isinstance(result, requests.Response)
+        self.assertEqual(count, 2)
+
+        result, count = self.get(controller, [error] * 3)
+        self.assertIsInstance(result, requests.exceptions.ConnectionError)
+        self.assertEqual(count, 3)
+
+    def test_post_is_not_retried(self) -> None:
+        controller = http_rate.RateController(backoff_base=0.001)
+        resp, count = self.get(controller, [make_response(503), make_response(200)], method='POST')
+        assert isinstance(resp, requests.Response)
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(count, 1)
+
+    def test_retry_after(self) -> None:
+        controller = http_rate.RateController(backoff_base=0.001, backoff_max=0.05)
+        start = time.perf_counter()
+        self.get(controller, [make_response(503, headers={'Retry-After': '1'}), make_response(200)])
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)  # Retry-After is capped by backoff_max
+        self.assertGreaterEqual(controller.get_stats()['wait_seconds'], 0.05)
+
+    def test_budget(self) -> None:
+        controller = http_rate.RateController(max_requests=2)
+        self.get(controller, [make_response(200)])
+        self.get(controller, [make_response(200)])
+        result, count = self.get(controller, [make_response(200)])
+        self.assertIsInstance(result, http_rate.RequestBudgetExceeded)
+        self.assertEqual(count, 0)
+
+    def test_token_bucket(self) -> None:
+        controller = http_rate.RateController(requests_per_second=100, burst=1)
+        start = time.perf_counter()
+        for _ in range(6):
+            self.get(controller, [make_response(200)])
+        self.assertGreaterEqual(time.perf_counter() - start, 0.04)
+
+    def test_concurrency(self) -> None:
+        controller = http_rate.RateController(max_connections_per_host=2, requests_per_second=None)
+        lock = threading.Lock()
+        running = [0, 0]  # the current and the maximum
+
+        def send(request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+            with lock:
+                running[0] += 1
+                running[1] = max(running[1], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return make_response(200)
+
+        session = requests.Session()
+        session.mount('https://', http_rate.RateLimitedAdapter(controller=controller))
+        with mock.patch.object(requests.adapters.HTTPAdapter, 'send', side_effect=send):
+            threads = [threading.Thread(target=session.get, args=(URL, )) for _ in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(running[1], 2)
+
+
+class TestHostState(unittest.TestCase):
+    def test_aimd(self) -> None:
+        state = http_rate._HostState(max_connections=4, requests_per_second=None, burst=1)
+        state.acquire_connection()
+        state.release_connection(throttled=True)
+        self.assertEqual(state.limit, 2.0)
+        state.acquire_connection()
+        state.release_connection(throttled=True)
+        state.acquire_connection()
+        state.release_connection(throttled=True)
+        self.assertEqual(state.limit, 1.0)
+        for _ in range(10):
+            state.acquire_connection()
+            state.release_connection(throttled=False)
+        self.assertEqual(state.limit, 4.0)
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_seconds(self) -> None:
+        self.assertEqual(http_rate._parse_retry_after('120'), 120.0)
+
+    def test_date(self) -> None:
+        value = http_rate._parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT')
+        self.assertEqual(value, 0.0)  # in the past
+
+    def test_invalid(self) -> None:
+        self.assertIsNone(http_rate._parse_retry_after('soon'))
+        self.assertIsNone(http_rate._parse_retry_after(None))
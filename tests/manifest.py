@@ -0,0 +1,44 @@
+import pathlib
+import tempfile
+import unittest
+
+import onlinejudge_prepare.manifest as manifest
+from onlinejudge_template.types import *
+
+URL = 'https://atcoder.jp/contests/abc080/tasks/abc080_a'
+
+
+class TestManifest(unittest.TestCase):
+    def make_manifest(self) -> manifest.Manifest:
+        content_hash = manifest.get_content_hash(url=URL, statement=b'<div></div>', sample_cases=[SampleCase(input=b'1\n', output=b'2\n')])
+        entry = manifest.FileEntry(template='main.py', template_hash='t', content_hash=content_hash, output_hash=manifest.hash_bytes(b'code'))
+        return manifest.Manifest(url=URL, content_hash=content_hash, files={'main.py': entry}, samples={'test/sample-1.in': manifest.hash_bytes(b'1\n')})
+
+    def test_store_and_load(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manifest.store(self.make_manifest(), pathlib.Path(tmpdir))
+            self.assertEqual(manifest.load(pathlib.Path(tmpdir), url=URL), self.make_manifest())
+            self.assertIsNone(manifest.load(pathlib.Path(tmpdir), url=URL + '?'))
+
+    def test_broken(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            (pathlib.Path(tmpdir) / manifest.MANIFEST_FILENAME).write_text('{')
+            self.assertIsNone(manifest.load(pathlib.Path(tmpdir), url=URL))
+
+    def test_another_version(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manifest.store(self.make_manifest()._replace(tool_version='0.0.0'), pathlib.Path(tmpdir))
+            loaded = manifest.load(pathlib.Path(tmpdir), url=URL)
+            assert loaded is not None
+            entry = loaded.files['main.py']
+            self.assertFalse(manifest.is_fresh(entry, template='main.py', template_hash='t', content_hash=loaded.content_hash))
+            self.assertEqual(entry.output_hash, manifest.hash_bytes(b'code'))
+
+    def test_is_fresh(self) -> None:
+        m = self.make_manifest()
+        entry = m.files['main.py']
+        self.assertTrue(manifest.is_fresh(entry, template='main.py', template_hash='t', content_hash=m.content_hash))
+        self.assertFalse(manifest.is_fresh(entry, template='main.cpp', template_hash='t', content_hash=m.content_hash))
+        self.assertFalse(manifest.is_fresh(entry, template='main.py', template_hash='u', content_hash=m.content_hash))
+        self.assertFalse(manifest.is_fresh(entry, template='main.py', template_hash='t', content_hash='x'))
+        self.assertFalse(manifest.is_fresh(None, template='main.py', template_hash='t', content_hash=m.content_hash))
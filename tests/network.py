@@ -0,0 +1,165 @@
+import unittest
+from typing import *
+
+import requests
+
+import onlinejudge_template.analyzer.html
+import onlinejudge_template.network as network
+from onlinejudge_template.types import *
+
+CODEFORCES_URL = 'https://codeforces.com/contest/1360/problem/A'
+
+CODEFORCES_HTML = b'''<html><body><div class="problem-statement">
+<div class="sample-tests">
+<div class="input"><div class="title">Input</div><pre>2
+3 2
+4 2
+</pre></div>
+<div class="output"><div class="title">Output</div><pre>16
+16
+</pre></div>
+</div>
+</div></body></html>
+'''
+
+
+class FakeSession:
+    """FakeSession is a session which returns the given pages without network access, and records requests.
+    """
+    def __init__(self, pages: Dict[str, bytes]):
+        self.pages = pages
+        self.requests: List[Tuple[str, str]] = []
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        self.requests.append((method, url))
+        resp = requests.Response()
+        resp.url = url
+        if url in self.pages:
+            resp.status_code = 200
+            resp._content = self.pages[url]  # type: ignore
+        else:
+            resp.status_code = 404
+            resp._content = b''  # type: ignore
+        resp.encoding = 'utf-8'
+        return resp
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+
+class TestDownloadProblem(unittest.TestCase):
+    def test_single_request(self) -> None:
+        session = FakeSession({CODEFORCES_URL: CODEFORCES_HTML})
+        with self.assertLogs(network.logger, level='DEBUG') as logs:
+            html, sample_cases = network.download_problem(CODEFORCES_URL, session=cast(requests.Session, session))
+        self.assertIn('HTTP requests for the problem: 1 ({})'.format(CODEFORCES_URL), '\n'.join(logs.output))
+        self.assertEqual(html, CODEFORCES_HTML)
+        self.assertEqual(sample_cases, [SampleCase(input=b'2\n3 2\n4 2\n', output=b'16\n16\n')])
+        self.assertEqual(session.requests, [('GET', CODEFORCES_URL)])
+
+    def test_fallback(self) -> None:
+        """If the sample cases cannot be extracted from the downloaded page, they are downloaded again.
+        """
+
+        session = FakeSession({CODEFORCES_URL: b'<html><body><div class="input"></div></body></html>'})
+        _, sample_cases = network.download_problem(CODEFORCES_URL, session=cast(requests.Session, session))
+        self.assertIsNone(sample_cases)
+        self.assertEqual(session.requests, [('GET', CODEFORCES_URL), ('GET', CODEFORCES_URL)])
+
+    def test_not_found(self) -> None:
+        session = FakeSession({})
+        with self.assertRaises(requests.exceptions.HTTPError):
+            network.download_problem(CODEFORCES_URL, session=cast(requests.Session, session))
+        self.assertEqual(len(session.requests), 1)
+
+
+ATCODER_PROBLEM_URLS = [
+    'https://atcoder.jp/contests/abc080/tasks/abc080_a',
+    'https://atcoder.jp/contests/abc080/tasks/abc080_b',
+]
+
+ATCODER_TASKS_PRINT_URL = 'https://atcoder.jp/contests/abc080/tasks_print'
+
+
+def make_atcoder_statement(sample_input: str, sample_output: str) -> str:
+    return f'''<div id="task-statement"><span class="lang"><span class="lang-en">
+<div class="part"><section><h3>Input</h3><p>Input is given from Standard Input in the following format:</p><pre><var>N</var>
+</pre></section></div>
+<div class="part"><section><h3>Sample Input 1</h3><pre>{sample_input}</pre></section></div>
+<div class="part"><section><h3>Sample Output 1</h3><pre>{sample_output}</pre></section></div>
+</span></span></div>'''
+
+
+ATCODER_TASKS_PRINT_HTML = ('<html><body>' + ''.join(f"""<div class="col-sm-12"><span class="h2">{c} - Problem</span>{make_atcoder_statement(str(i), str(i * 2))}</div>""" for i, c in enumerate('AB')) + '</body></html>').encode()
+
+CODEFORCES_PROBLEMS_URL = 'https://codeforces.com/contest/1360/problems'
+
+CODEFORCES_PROBLEMS_HTML = b'''<html><body>
+<div class="problemindexholder" problemindex="A"><div class="ttypography"><div class="problem-statement">
+<div class="sample-tests">
+<div class="input"><div class="title">Input</div><pre>1
+</pre></div>
+<div class="output"><div class="title">Output</div><pre>2
+</pre></div>
+</div>
+</div></div></div>
+<div class="problemindexholder" problemindex="C"><div class="ttypography"><div class="problem-statement">
+<div class="sample-tests">
+<div class="input"><div class="title">Input</div><pre>3
+</pre></div>
+<div class="output"><div class="title">Output</div><pre>4
+</pre></div>
+</div>
+</div></div></div>
+</body></html>
+'''
+
+
+class TestDownloadContestProblems(unittest.TestCase):
+    def test_atcoder(self) -> None:
+        session = FakeSession({ATCODER_TASKS_PRINT_URL: ATCODER_TASKS_PRINT_HTML})
+        result = network.download_contest_problems('https://atcoder.jp/contests/abc080', problem_urls=ATCODER_PROBLEM_URLS, session=cast(requests.Session, session))
+        self.assertEqual(sorted(result.keys()), ATCODER_PROBLEM_URLS)
+        self.assertEqual(result[ATCODER_PROBLEM_URLS[1]][1], [SampleCase(input=b'1\n', output=b'2\n')])
+        self.assertEqual(session.requests, [('GET', ATCODER_TASKS_PRINT_URL)])
+
+        # the HTML of each problem can be analyzed
+        html = result[ATCODER_PROBLEM_URLS[0]][0]
+        self.assertEqual(onlinejudge_template.analyzer.html.parse_input_format_string(html, url=ATCODER_PROBLEM_URLS[0]), '<var>N</var>\r\n')
+
+    def test_atcoder_different_number_of_problems(self) -> None:
+        session = FakeSession({ATCODER_TASKS_PRINT_URL: ATCODER_TASKS_PRINT_HTML})
+        result = network.download_contest_problems('https://atcoder.jp/contests/abc080', problem_urls=ATCODER_PROBLEM_URLS + ['https://atcoder.jp/contests/abc080/tasks/abc080_c'], session=cast(requests.Session, session))
+        self.assertEqual(result, {})
+
+    def test_codeforces(self) -> None:
+        problem_urls = ['https://codeforces.com/contest/1360/problem/' + c for c in 'ABC']
+        session = FakeSession({CODEFORCES_PROBLEMS_URL: CODEFORCES_PROBLEMS_HTML})
+        result = network.download_contest_problems('https://codeforces.com/contest/1360', problem_urls=problem_urls, session=cast(requests.Session, session))
+        self.assertEqual(sorted(result.keys()), [problem_urls[0], problem_urls[2]])  # B is not in the page
+        self.assertEqual(result[problem_urls[2]][1], [SampleCase(input=b'3\n', output=b'4\n')])
+        self.assertEqual(session.requests, [('GET', CODEFORCES_PROBLEMS_URL)])
+
+    def test_not_found(self) -> None:
+        session = FakeSession({})
+        result = network.download_contest_problems('https://codeforces.com/contest/1360', problem_urls=['https://codeforces.com/contest/1360/problem/A'], session=cast(requests.Session, session))
+        self.assertEqual(result, {})
+
+    def test_unsupported(self) -> None:
+        session = FakeSession({})
+        result = network.download_contest_problems('https://yukicoder.me/contests/300', problem_urls=['https://yukicoder.me/problems/no/1000'], session=cast(requests.Session, session))
+        self.assertEqual(result, {})
+        self.assertEqual(session.requests, [])
+
+
+class TestGetStatement(unittest.TestCase):
+    def test_atcoder(self) -> None:
+        statement = make_atcoder_statement('1\n', '2\n')
+        html = f"""<html><head><script>var csrfToken = "{{token}}"</script></head><body>{statement}</body></html>"""
+        a = network.get_statement(html.format(token='abc').encode(), url=ATCODER_PROBLEM_URLS[0])
+        b = network.get_statement(html.format(token='def').encode(), url=ATCODER_PROBLEM_URLS[0])
+        self.assertEqual(a, b)
+        self.assertIn(b'Sample Input 1', a)
+
+    def test_not_found(self) -> None:
+        self.assertEqual(network.get_statement(b'<html></html>', url=ATCODER_PROBLEM_URLS[0]), b'<html></html>')
@@ -0,0 +1,367 @@
+import logging
+import pathlib
+import pstats
+import tempfile
+import threading
+import time
+import unittest
+from typing import *
+from unittest import mock
+
+import onlinejudge
+import onlinejudge_command.download_history
+import requests
+
+import onlinejudge_prepare.main
+import onlinejudge_template.http_fixtures as http_fixtures
+from onlinejudge_prepare.main import chdir, main, prepare_contest, write_sample_cases
+from onlinejudge_template.types import *
+from tests.http_fixtures import make_atcoder_contest_exchanges
+
+
+class TestWriteSampleCases(unittest.TestCase):
+    def test_write(self) -> None:
+        problem = onlinejudge.dispatch.problem_from_url('https://atcoder.jp/contests/abc080/tasks/abc080_a')
+        assert problem is not None
+        sample_cases = [
+            SampleCase(input=b'7 17 120\n', output=b'119\n'),
+            SampleCase(input=b'5 20 100\n', output=b'100\n'),
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir_:
+            tmpdir = pathlib.Path(tmpdir_)
+            with chdir(tmpdir), mock.patch.object(onlinejudge_command.download_history.DownloadHistory, 'add') as add, mock.patch.object(onlinejudge_command.download_history.DownloadHistory, 'remove'):
+                write_sample_cases(sample_cases, problem=problem, directory=tmpdir)
+                add.assert_called_once_with(problem, directory=tmpdir)
+            self.assertEqual(sorted(path.name for path in (tmpdir / 'test').iterdir()), ['sample-1.in', 'sample-1.out', 'sample-2.in', 'sample-2.out'])
+            self.assertEqual((tmpdir / 'test' / 'sample-2.in').read_bytes(), b'5 20 100\n')
+            self.assertEqual((tmpdir / 'test' / 'sample-2.out').read_bytes(), b'100\n')
+
+    def test_file_exists(self) -> None:
+        problem = onlinejudge.dispatch.problem_from_url('https://atcoder.jp/contests/abc080/tasks/abc080_a')
+        assert problem is not None
+        with tempfile.TemporaryDirectory() as tmpdir_:
+            tmpdir = pathlib.Path(tmpdir_)
+            (tmpdir / 'test').mkdir()
+            (tmpdir / 'test' / 'sample-1.out').write_bytes(b'mine\n')
+            with chdir(tmpdir), mock.patch.object(onlinejudge_command.download_history.DownloadHistory, 'add') as add:
+                with self.assertRaises(FileExistsError):
+                    write_sample_cases([SampleCase(input=b'1\n', output=b'2\n')], problem=problem, directory=tmpdir)
+                add.assert_not_called()
+            self.assertFalse((tmpdir / 'test' / 'sample-1.in').exists())
+            self.assertEqual((tmpdir / 'test' / 'sample-1.out').read_bytes(), b'mine\n')
+
+
+class TestWriteSampleCasesStage(unittest.TestCase):
+    def _run(self, *, download_problem: Any) -> onlinejudge_prepare.main._ProblemState:
+        problem = onlinejudge.dispatch.problem_from_url('https://atcoder.jp/contests/abc080/tasks/abc080_a')
+        assert problem is not None
+        state = onlinejudge_prepare.main._ProblemState(problem, contest=None)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config = {'problem_directory': str(pathlib.Path(tmpdir) / '{problem_id}')}
+            with mock.patch.object(onlinejudge_prepare.main.network, 'download_problem', side_effect=download_problem):
+                onlinejudge_prepare.main._download_stage(state, config=config, session=mock.Mock())
+            onlinejudge_prepare.main._write_sample_cases_stage(state, config=config, clock=onlinejudge_prepare.main.FileClock())
+        return state
+
+    def test_download_failed(self) -> None:
+        """A failure of downloading is reported only once.
+        """
+
+        state = self._run(download_problem=requests.exceptions.ConnectionError('offline'))
+        self.assertEqual(len(state.exceptions), 1)
+        self.assertIsInstance(state.exceptions[0], requests.exceptions.ConnectionError)
+
+    def test_no_sample_cases(self) -> None:
+        state = self._run(download_problem=lambda url, **kwargs: (b'', []))
+        self.assertEqual(len(state.exceptions), 1)
+        self.assertIsInstance(state.exceptions[0], RuntimeError)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.messages: List[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+
+
+class TestPrepareContest(unittest.TestCase):
+    def _run(self, *, workers: int, fail_fast: bool = False, failing: Optional[Set[str]] = None) -> Tuple[List[str], List[str], int]:
+        """_run runs prepare_contest with a fake contest, and returns the logs, the started problems, and the maximum number of concurrently downloaded problems.
+        """
+
+        names = ['a', 'b', 'c', 'd', 'e', 'f']
+        problems = []
+        for name in names:
+            problem = mock.Mock()
+            problem.get_url.return_value = name
+            problems.append(problem)
+        contest = mock.Mock()
+        contest.get_url.return_value = 'contest'
+        contest.list_problems.return_value = problems
+
+        lock = threading.Lock()
+        started: List[str] = []
+        running = [0, 0]  # the current and the maximum
+
+        def download_stage(state: Any, **kwargs: Any) -> None:
+            name = state.url
+            with lock:
+                started.append(name)
+                running[0] += 1
+                running[1] = max(running[1], running[0])
+            onlinejudge_prepare.main.logger.warning('start %s', name)
+            time.sleep(0.01 * (len(names) - names.index(name)))  # the later problems finish earlier
+            onlinejudge_prepare.main.logger.warning('end %s', name)
+            with lock:
+                running[0] -= 1
+            if failing is not None and name in failing:
+                raise RuntimeError(name)
+
+        handler = ListHandler()
+        root = logging.getLogger()
+        root.addHandler(handler)
+        try:
+            with mock.patch.object(onlinejudge_prepare.main, '_download_stage', side_effect=download_stage), mock.patch.object(onlinejudge_prepare.main, '_write_sample_cases_stage'), mock.patch.object(onlinejudge_prepare.main, '_analyze_stage'), mock.patch.object(onlinejudge_prepare.main, '_generate_stage'):
+                try:
+                    prepare_contest(contest, config={'templates': {}}, session=mock.Mock(), workers=workers, fail_fast=fail_fast, executor='thread')
+                except RuntimeError:
+                    pass
+        finally:
+            root.removeHandler(handler)
+        messages = [message for message in handler.messages if message.startswith(('start ', 'end '))]
+        return messages, started, running[1]
+
+    def test_concurrent(self) -> None:
+        messages, started, max_running = self._run(workers=3)
+        self.assertEqual(messages, [line for name in 'abcdef' for line in ('start ' + name, 'end ' + name)])
+        self.assertEqual(sorted(started), list('abcdef'))
+        self.assertGreaterEqual(max_running, 2)
+        self.assertLessEqual(max_running, 3)
+
+    def test_sequential(self) -> None:
+        messages, _, max_running = self._run(workers=1)
+        self.assertEqual(messages, [line for name in 'abcdef' for line in ('start ' + name, 'end ' + name)])
+        self.assertEqual(max_running, 1)
+
+    def test_fail_fast(self) -> None:
+        _, started, _ = self._run(workers=1, fail_fast=True, failing={'b'})
+        self.assertEqual(started, ['a', 'b'])
+
+    def test_without_fail_fast(self) -> None:
+        _, started, _ = self._run(workers=2, failing={'b'})
+        self.assertEqual(sorted(started), list('abcdef'))
+
+
+class TestPipeline(unittest.TestCase):
+    def _run(self, *, executor: str, contest_problems: Optional[Dict[str, Tuple[bytes, Optional[List[SampleCase]]]]] = None, profile_dir: Optional[pathlib.Path] = None) -> Tuple[List[str], List[str]]:
+        """_run runs prepare_contest with a fake contest of three problems, and returns the logs and the URLs of problems which are downloaded separately.
+        """
+
+        urls = [
+            'https://atcoder.jp/contests/abc080/tasks/abc080_a',
+            'https://atcoder.jp/contests/abc080/tasks/abc080_b',
+            'https://atcoder.jp/contests/abc080/tasks/abc080_c',
+        ]
+        problems = [onlinejudge.dispatch.problem_from_url(url) for url in urls]
+        contest = mock.Mock()
+        contest.get_url.return_value = 'https://atcoder.jp/contests/abc080'
+        contest.list_problems.return_value = problems
+
+        downloaded: List[str] = []
+
+        def download_problem(url: str, **kwargs: Any) -> Tuple[bytes, Optional[List[SampleCase]]]:
+            downloaded.append(url)
+            return b'', [SampleCase(input=b'3\n1 2 3\n', output=b'6\n')]
+
+        handler = ListHandler()
+        root = logging.getLogger()
+        root.addHandler(handler)
+        level = root.level
+        root.setLevel(logging.INFO)
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir_:
+                tmpdir = pathlib.Path(tmpdir_)
+                config = {
+                    'templates': {'main.py': 'main.py'},
+                    'problem_directory': str(tmpdir / '{problem_id}'),
+                }
+                with mock.patch.object(onlinejudge_prepare.main.network, 'download_problem', side_effect=download_problem), mock.patch.object(onlinejudge_prepare.main.network, 'download_contest_problems', return_value=contest_problems or {}), mock.patch.object(onlinejudge_command.download_history.DownloadHistory, 'add'), mock.patch.object(onlinejudge_command.download_history.DownloadHistory, 'remove'):
+                    prepare_contest(contest, config=config, session=mock.Mock(), use_cache=False, profile_dir=profile_dir, workers=2, executor=executor)
+                for name in ('abc080_a', 'abc080_b', 'abc080_c'):
+                    self.assertTrue((tmpdir / name / 'main.py').exists())
+                    self.assertEqual((tmpdir / name / 'test' / 'sample-1.in').read_bytes(), b'3\n1 2 3\n')
+        finally:
+            root.setLevel(level)
+            root.removeHandler(handler)
+        return handler.messages, sorted(downloaded)
+
+    def test_thread(self) -> None:
+        messages, _ = self._run(executor='thread')
+        self.assertTrue(any(message.startswith('time to the first file: ') for message in messages))
+
+    def test_process(self) -> None:
+        messages, _ = self._run(executor='process')
+        self.assertTrue(any(message.startswith('time to the first file: ') for message in messages))
+
+    def test_profile_process(self) -> None:
+        """Profiles of the analyze stage cover analyzers in worker processes.
+        """
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            profile_dir = pathlib.Path(tmpdir)
+            self._run(executor='process', profile_dir=profile_dir)
+            path = profile_dir / 'atcoder_jp_contests_abc080_tasks_abc080_a-analyze.pstats'
+            funcs = {funcname for _, _, funcname in pstats.Stats(str(path)).stats.keys()}  # type: ignore
+            self.assertIn('_run', funcs)
+
+    def test_logs_in_order(self) -> None:
+        messages, _ = self._run(executor='thread')
+        problems = [message for message in messages if message.startswith('prepare the problem: ')]
+        self.assertEqual(problems, ['prepare the problem: https://atcoder.jp/contests/abc080/tasks/abc080_' + c for c in 'abc'])
+
+    def test_contest_problems(self) -> None:
+        """Problems in the page of all problems are not downloaded separately.
+        """
+
+        contest_problems = {
+            'https://atcoder.jp/contests/abc080/tasks/abc080_a': (b'', [SampleCase(input=b'3\n1 2 3\n', output=b'6\n')]),
+            'https://atcoder.jp/contests/abc080/tasks/abc080_c': (b'', [SampleCase(input=b'3\n1 2 3\n', output=b'6\n')]),
+        }
+        _, downloaded = self._run(executor='thread', contest_problems=contest_problems)
+        self.assertEqual(downloaded, ['https://atcoder.jp/contests/abc080/tasks/abc080_b'])
+
+
+class TestIncremental(unittest.TestCase):
+    """TestIncremental runs prepare_problem twice or more in the same directory.
+    """
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.tmpdir = pathlib.Path(self.tempdir.name)
+        self.template = self.tmpdir / 'template.py'
+        self.template.write_text('# template\n')
+        self.sample_cases = [SampleCase(input=b'3\n1 2 3\n', output=b'6\n')]
+        self.html = b'<html></html>'
+        self.config = {
+            'templates': {'main.py': str(self.template)},
+            'problem_directory': str(self.tmpdir / 'problem'),
+        }
+        self.main_py = self.tmpdir / 'problem' / 'main.py'
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def _run(self) -> Tuple[List[str], int]:
+        """_run returns the logs and the number of analyses.
+        """
+
+        problem = onlinejudge.dispatch.problem_from_url('https://atcoder.jp/contests/abc080/tasks/abc080_a')
+        handler = ListHandler()
+        root = logging.getLogger()
+        root.addHandler(handler)
+        level = root.level
+        root.setLevel(logging.INFO)
+        try:
+            with mock.patch.object(onlinejudge_prepare.main.network, 'download_problem', return_value=(self.html, self.sample_cases)), mock.patch.object(onlinejudge_prepare.main.analyzer, 'run', wraps=onlinejudge_prepare.main.analyzer.run) as run, mock.patch.object(onlinejudge_command.download_history.DownloadHistory, 'add'), mock.patch.object(onlinejudge_command.download_history.DownloadHistory, 'remove'):
+                onlinejudge_prepare.main.prepare_problem(problem, config=self.config, session=mock.Mock(), use_cache=False)
+        finally:
+            root.setLevel(level)
+            root.removeHandler(handler)
+        return handler.messages, run.call_count
+
+    def test_not_changed(self) -> None:
+        self._run()
+        messages, analyzed = self._run()
+        self.assertEqual(analyzed, 0)
+        self.assertIn('the problem is already prepared and not changed', messages)
+        self.assertFalse(any(message.startswith(('write file: ', 'file already exists: ')) for message in messages))
+
+    def test_template_changed(self) -> None:
+        self._run()
+        self.template.write_text('# updated\n')
+        messages, analyzed = self._run()
+        self.assertEqual(analyzed, 1)
+        self.assertIn('update file: ' + str(self.main_py), messages)
+        self.assertIn('sample cases are not changed', messages)
+        self.assertEqual(self.main_py.read_text(), '# updated\n')
+
+    def test_content_changed(self) -> None:
+        self._run()
+        self.html = b'<html><body>fixed</body></html>'
+        messages, analyzed = self._run()
+        self.assertEqual(analyzed, 1)
+        self.assertIn('sample cases are not changed', messages)
+
+        # the new content is recorded
+        messages, analyzed = self._run()
+        self.assertEqual(analyzed, 0)
+        self.assertIn('the problem is already prepared and not changed', messages)
+
+    def test_sample_cases_changed(self) -> None:
+        self._run()
+        sample_1_in = self.tmpdir / 'problem' / 'test' / 'sample-1.in'
+        sample_2_in = self.tmpdir / 'problem' / 'test' / 'sample-2.in'
+        self.sample_cases = [SampleCase(input=b'1\n', output=b'1\n'), SampleCase(input=b'2\n', output=b'2\n')]
+        messages, _ = self._run()
+        self.assertIn('update file: ' + str(sample_1_in), messages)
+        self.assertEqual(sample_1_in.read_bytes(), b'1\n')
+        self.assertEqual(sample_2_in.read_bytes(), b'2\n')
+
+        # removed sample cases are removed, and edited files are kept
+        sample_1_in.write_bytes(b'edited\n')
+        self.sample_cases = [SampleCase(input=b'3\n', output=b'3\n')]
+        messages, _ = self._run()
+        self.assertIn('file is edited, so it is not updated: ' + str(sample_1_in), messages)
+        self.assertEqual(sample_1_in.read_bytes(), b'edited\n')
+        self.assertFalse(sample_2_in.exists())
+
+    def test_edited(self) -> None:
+        self._run()
+        self.main_py.write_text('# edited\n')
+        self.template.write_text('# updated\n')
+        messages, _ = self._run()
+        self.assertIn('file is edited, so it is not updated: ' + str(self.main_py), messages)
+        self.assertEqual(self.main_py.read_text(), '# edited\n')
+
+        # the edited file is not checked again
+        messages, analyzed = self._run()
+        self.assertEqual(analyzed, 0)
+        self.assertEqual(self.main_py.read_text(), '# edited\n')
+
+    def test_removed(self) -> None:
+        self._run()
+        self.main_py.unlink()
+        messages, _ = self._run()
+        self.assertIn('write file: ' + str(self.main_py), messages)
+        self.assertTrue(self.main_py.exists())
+
+
+class TestReplay(unittest.TestCase):
+    """TestReplay runs the whole oj-prepare command without network access, with a fixture of HTTP.
+    """
+    def test_contest(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir_:
+            tmpdir = pathlib.Path(tmpdir_)
+            fixture = tmpdir / 'fixture.json'
+            http_fixtures.dump_fixture(make_atcoder_contest_exchanges(), fixture)
+            config_file = tmpdir / 'config.toml'
+            config_file.write_text('templates = { "main.py" = "main.py" }\n')
+            with chdir(tmpdir), mock.patch.object(onlinejudge_command.download_history.DownloadHistory, 'add'), mock.patch.object(onlinejudge_command.download_history.DownloadHistory, 'remove'):
+                main(['--config-file', str(config_file), '--cookie', str(tmpdir / 'cookie.jar'), '--no-cache', '--replay-http', str(fixture), 'https://atcoder.jp/contests/abc080'])
+            for i, name in enumerate(('abc080_a', 'abc080_b')):
+                self.assertTrue((tmpdir / name / 'main.py').exists())
+                self.assertEqual((tmpdir / name / 'test' / 'sample-1.in').read_bytes(), f"""{i + 1}\n""".encode())
+            self.assertFalse((tmpdir / 'cookie.jar').exists())
+
+
+class TestGetRateController(unittest.TestCase):
+    def test_config(self) -> None:
+        controller = onlinejudge_prepare.main.get_rate_controller({'http': {'max_connections_per_host': 2, 'max_requests': 100}})
+        self.assertEqual(controller.max_connections_per_host, 2)
+        self.assertEqual(controller.max_requests, 100)
+
+    def test_unknown_keys(self) -> None:
+        with self.assertLogs(onlinejudge_prepare.main.logger, level='WARNING') as logs:
+            onlinejudge_prepare.main.get_rate_controller({'http': {'max_connection': 2}})
+        self.assertIn('max_connection', '\n'.join(logs.output))
@@ -0,0 +1,76 @@
+import contextlib
+import cProfile
+import io
+import pathlib
+import pstats
+import tempfile
+import unittest
+from typing import *
+
+import onlinejudge_template.analyzer.combined
+import onlinejudge_template.profiling as profiling
+import onlinejudge_template.serialization as serialization
+from onlinejudge_template.main import main
+from onlinejudge_template.types import *
+
+
+def _leaf(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+def _middle(n: int) -> int:
+    return _leaf(n) + _leaf(n)
+
+
+def _top(n: int) -> int:
+    return _middle(n) + _leaf(n)
+
+
+class TestProfiling(unittest.TestCase):
+    def test_profile_name(self) -> None:
+        self.assertEqual(profiling.get_profile_name('https://atcoder.jp/contests/abc999/tasks/abc999_a'), 'atcoder_jp_contests_abc999_tasks_abc999_a')
+        self.assertEqual(profiling.get_profile_name('///'), 'profile')
+
+    def test_collapsed_stacks(self) -> None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        _top(100000)
+        profiler.disable()
+
+        stacks: Dict[str, int] = {}
+        for line in profiling.format_collapsed_stacks(pstats.Stats(profiler)).splitlines():
+            key, value = line.rsplit(' ', 1)
+            stacks[key] = int(value)
+        names = {key: [frame.split(' ')[0] for frame in key.split(';')] for key in stacks.keys()}
+        self.assertTrue(any(frames[-3:] == ['_top', '_middle', '_leaf'] for frames in names.values()))
+        self.assertTrue(any(frames[-2:] == ['_top', '_leaf'] for frames in names.values()))
+
+    def test_profile(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with profiling.profile(None):
+                _top(10)
+            self.assertEqual(list(pathlib.Path(tmpdir).iterdir()), [])
+
+            with profiling.profile(pathlib.Path(tmpdir) / 'foo' / 'bar'):
+                _top(10000)
+            self.assertEqual(sorted(path.name for path in (pathlib.Path(tmpdir) / 'foo').iterdir()), ['bar.collapsed.txt', 'bar.pstats'])
+            pstats.Stats(str(pathlib.Path(tmpdir) / 'foo' / 'bar.pstats'))  # readable
+
+    def test_command(self) -> None:
+        resources = AnalyzerResources(
+            url='https://atcoder.jp/contests/abc999/tasks/abc999_a',
+            html=None,
+            input_format_string='N\r\nA_1 A_2 ... A_N\r\n',
+            output_format_string=None,
+            sample_cases=[SampleCase(input=b'3\n3 5 -1\n', output=b'12\n')],
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir) / 'analysis.json'
+            with open(path, 'w') as fh:
+                fh.write(serialization.dumps(onlinejudge_template.analyzer.combined.run(resources)))
+
+            fh1: IO = io.TextIOWrapper(io.BytesIO(), write_through=True)
+            with contextlib.redirect_stdout(fh1):
+                main(['--from-analysis', str(path), '-t', 'main.py', '--profile', str(pathlib.Path(tmpdir) / 'profile')])
+            collapsed = (pathlib.Path(tmpdir) / 'profile' / 'analysis.collapsed.txt').read_text()
+            self.assertIn('run (_main.py:', collapsed)
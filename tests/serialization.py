@@ -0,0 +1,77 @@
+import contextlib
+import io
+import pathlib
+import tempfile
+import unittest
+from typing import *
+
+import onlinejudge_template.analyzer.combined
+import onlinejudge_template.generator._main as generator
+import onlinejudge_template.serialization as serialization
+from onlinejudge_template.main import main
+from onlinejudge_template.types import *
+
+
+def _get_analyzer_result() -> AnalyzerResult:
+    resources = AnalyzerResources(
+        url='https://atcoder.jp/contests/abc999/tasks/abc999_a',
+        html=b'<html>\xe5\x88\xb6\xe7\xb4\x84</html>',
+        input_format_string='N\r\nA_1 A_2 ... A_N\r\n',
+        output_format_string=None,
+        sample_cases=[
+            SampleCase(input=b'3\n3 5 -1\n', output=b'12\n'),
+            SampleCase(input=b'5\n1 1 1 2 0\n', output=b'4\n'),
+        ],
+    )
+    return onlinejudge_template.analyzer.combined.run(resources)
+
+
+class TestSerialization(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        result = _get_analyzer_result()
+        self.assertIsNotNone(result.input_format)
+        self.assertIsNotNone(result.output_type)
+
+        s = serialization.dumps(result)
+        loaded = serialization.loads(s)
+        self.assertEqual(serialization.dumps(loaded), s)
+        self.assertEqual(loaded.resources, result.resources)
+        self.assertEqual(str(loaded.input_format), str(result.input_format))
+        self.assertEqual(loaded.input_variables, result.input_variables)
+        self.assertEqual(loaded.metrics, result.metrics)
+        for template in ('main.cpp', 'main.py', 'generate.py'):
+            self.assertEqual(generator.run(loaded, template_file=template), generator.run(result, template_file=template))
+
+    def test_output_types_and_topcoder(self) -> None:
+        result = onlinejudge_template.analyzer.combined.get_empty_analyzer_result(AnalyzerResources(url=None, html=None, input_format_string=None, output_format_string=None, sample_cases=None))
+        output_types: List[OutputType] = [
+            YesNoOutputType(name=Expr('ans'), yes='Yes', no='No'),
+            OneOutputType(name=Expr('ans'), type=VarType.ValueInt),
+            TwoOutputType(name1=Expr('a'), type1=VarType.Float, name2=Expr('b'), type2=None, print_newline_after_item=True),
+            VectorOutputType(name=VarName('ans'), type=VarType.String, subscripted_name='ans[i]', counter_name=VarName('i'), print_size=True, print_newline_after_size=False, print_newline_after_item=True),
+        ]
+        definition = TopcoderClassDefinition(class_name='Foo', method_name='bar', formal_arguments=[(TopcoderType.IntList, VarName('a')), (TopcoderType.String, VarName('s'))], return_type=TopcoderType.Long)
+        for output_type in output_types:
+            result = result._replace(output_type=output_type, topcoder_class_definition=definition, constants={VarName('MOD'): ConstantDecl(name=VarName('MOD'), value='998244353', type=VarType.ValueInt)})
+            loaded = serialization.loads(serialization.dumps(result))
+            self.assertIs(type(loaded.output_type), type(output_type))
+            self.assertEqual(vars(loaded.output_type), vars(output_type))
+            self.assertEqual(loaded.topcoder_class_definition, definition)
+            self.assertEqual(loaded.constants, result.constants)
+
+    def test_unsupported_version(self) -> None:
+        self.assertRaises(serialization.SerializationError, lambda: serialization.loads('{"version": 0}'))
+        self.assertRaises(serialization.SerializationError, lambda: serialization.loads('[]'))
+        self.assertRaises(serialization.SerializationError, lambda: serialization.loads('{"version": 1}'))
+
+    def test_command(self) -> None:
+        result = _get_analyzer_result()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir) / 'analysis.json'
+            with open(path, 'w') as fh:
+                fh.write(serialization.dumps(result))
+
+            fh1: IO = io.TextIOWrapper(io.BytesIO(), write_through=True)
+            with contextlib.redirect_stdout(fh1):
+                main(['--from-analysis', str(path), '-t', 'main.py'])
+            self.assertEqual(fh1.buffer.getvalue(), generator.run(result, template_file='main.py'))  # type: ignore
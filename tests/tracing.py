@@ -0,0 +1,59 @@
+import json
+import pathlib
+import tempfile
+import threading
+import unittest
+
+import onlinejudge_template.analyzer.combined
+import onlinejudge_template.generator._main as generator
+import onlinejudge_template.tracing as tracing
+from onlinejudge_template.types import *
+
+
+class TestTracing(unittest.TestCase):
+    def test_without_trace(self) -> None:
+        with tracing.span('foo', url='https://example.com/'):
+            pass
+
+    def test_threads(self) -> None:
+        barrier = threading.Barrier(4)
+
+        def target(i: int) -> None:
+            with tracing.span('outer', index=i):
+                with tracing.span('inner', index=i):
+                    barrier.wait()  # make the spans overlap, and keep the identifiers of threads distinct
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir) / 'trace.json'
+            with tracing.trace(path):
+                threads = [threading.Thread(target=target, args=(i, )) for i in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            with open(path) as fh:
+                data = json.load(fh)
+
+        events = [event for event in data['traceEvents'] if event['ph'] == 'X']
+        self.assertEqual(len(events), 8)
+        self.assertEqual(len({event['tid'] for event in events}), 4)
+        self.assertEqual(sorted(event['args']['index'] for event in events if event['name'] == 'outer'), ['0', '1', '2', '3'])
+        for inner in events:
+            if inner['name'] == 'inner':
+                outer, = [event for event in events if event['name'] == 'outer' and event['tid'] == inner['tid']]
+                self.assertLessEqual(outer['ts'], inner['ts'])
+                self.assertLessEqual(inner['ts'] + inner['dur'], outer['ts'] + outer['dur'])
+        names = [event for event in data['traceEvents'] if event['ph'] == 'M']
+        self.assertEqual(len(names), 4)
+
+    def test_generator(self) -> None:
+        resources = AnalyzerResources(url=None, html=None, input_format_string=None, output_format_string=None, sample_cases=None)
+        analyzed = onlinejudge_template.analyzer.combined.get_empty_analyzer_result(resources)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir) / 'trace.json'
+            with tracing.trace(path):
+                generator.run(analyzed, template_file='main.py')
+            with open(path) as fh:
+                data = json.load(fh)
+        spans = [event for event in data['traceEvents'] if event['ph'] == 'X']
+        self.assertEqual([(event['name'], event['args']) for event in spans], [('render', {'template': 'main.py'})])
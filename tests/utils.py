@@ -0,0 +1,82 @@
+import io
+import logging
+import unittest
+from unittest import mock
+
+import onlinejudge_template.analyzer.combined as analyzer
+from onlinejudge_template.types import *
+from onlinejudge_template.utils import LazyFormat
+
+
+class TestLazyFormat(unittest.TestCase):
+    def test_format(self) -> None:
+        called = []
+
+        def func() -> List[int]:
+            called.append(None)
+            return [1, 2, 3]
+
+        lazy = LazyFormat(func)
+        self.assertEqual(called, [])
+        self.assertEqual(str(lazy), '[1, 2, 3]')
+        self.assertEqual(repr(lazy), '[1, 2, 3]')
+        self.assertEqual(len(called), 2)
+
+    def test_logging_disabled(self) -> None:
+        logger = logging.getLogger('onlinejudge_template.tests')
+        original_level = logger.level
+        logger.setLevel(logging.INFO)
+        try:
+            logger.debug('value: %s', LazyFormat(lambda: self.fail('must not be called')))
+        finally:
+            logger.setLevel(original_level)
+
+
+class TestDebugOnlyWork(unittest.TestCase):
+    """TestDebugOnlyWork is a regression test to check that runs with INFO level do no work only for debug logs, e.g. rendering format trees or HTML.
+    """
+    def _run(self, *, level: int) -> Dict[str, int]:
+        counter = {'lazy': 0, 'repr': 0}
+        original_lazy_str = LazyFormat.__str__
+        original_node_repr = FormatNode.__repr__
+
+        def lazy_str(self: LazyFormat) -> str:
+            counter['lazy'] += 1
+            return original_lazy_str(self)
+
+        def node_repr(self: FormatNode) -> str:
+            counter['repr'] += 1
+            return original_node_repr(self)
+
+        html = b'<html><body><h3>Input</h3><pre>N\nA_1 A_2 ... A_N\n</pre></body></html>'
+        url = 'https://atcoder.jp/contests/arc093/tasks/arc093_a'
+        sample_cases = [
+            SampleCase(input=b'3\n3 5 -1\n', output=b'12\n8\n10\n'),
+            SampleCase(input=b'5\n1 1 1 2 0\n', output=b'4\n4\n4\n2\n4\n'),
+        ]
+
+        logger = logging.getLogger('onlinejudge_template')
+        handler = logging.StreamHandler(io.StringIO())
+        handler.setLevel(logging.DEBUG)
+        original_level = logger.level
+        with mock.patch.object(LazyFormat, '__str__', lazy_str), mock.patch.object(FormatNode, '__repr__', node_repr):
+            logger.setLevel(level)
+            logger.addHandler(handler)
+            try:
+                resources = analyzer.prepare_from_html(html, url=url, sample_cases=sample_cases)
+                resources = resources._replace(input_format_string='N\nA_1 A_2 ... A_N\n')
+                analyzer.run(resources)
+            finally:
+                logger.removeHandler(handler)
+                logger.setLevel(original_level)
+        return counter
+
+    def test_info(self) -> None:
+        counter = self._run(level=logging.INFO)
+        self.assertEqual(counter, {'lazy': 0, 'repr': 0})
+
+    def test_debug(self) -> None:
+        # make sure that the above test is meaningful
+        counter = self._run(level=logging.DEBUG)
+        self.assertGreater(counter['lazy'], 0)
+        self.assertGreater(counter['repr'], 0)